@@ -91,7 +91,7 @@ def get_patients_name(name):
 
 def get_driver_list(cgc_path):
 
-    with open(cgc_path, 'rU') as ccg_file:
+    with open(cgc_path, 'r') as ccg_file:
 
         logger.debug('Reading cancer gene census file {}'.format(cgc_path))
         f_csv = csv.reader(ccg_file)
@@ -135,7 +135,8 @@ def get_driver_list(cgc_path):
 
 def get_output_fn_template(name, total_no_samples, subclone_detection=False, fpr=None, fdr=None,
                            min_absent_coverage=None, min_sa_coverage=None, min_sa_vaf=None,
-                           bi_e=None, bi_c0=None, max_absent_vaf=None, no_boot=None, mode=None, max_no_mps=None):
+                           bi_e=None, bi_c0=None, max_absent_vaf=None, no_boot=None, mode=None, max_no_mps=None,
+                           mp_mass=None):
     """
     Generate common name template for output files
     :param name: subject name or id
@@ -152,6 +153,7 @@ def get_output_fn_template(name, total_no_samples, subclone_detection=False, fpr
     :param no_boot: number of bootstrapping samples
     :param mode: mode of Treeomics
     :param max_no_mps: maximal number of considered most likely distinct mutation patterns per variant
+    :param mp_mass: probability mass covered by the considered most likely mutation patterns per variant
     :return: output filename pattern
     """
 
@@ -167,6 +169,7 @@ def get_output_fn_template(name, total_no_samples, subclone_detection=False, fpr
                ('_c0={}'.format(bi_c0) if bi_c0 is not None else '') +
                ('_af={}'.format(max_absent_vaf) if max_absent_vaf is not None else '') +
                ('_mps={}'.format(max_no_mps) if max_no_mps is not None else '') +
+               ('_mass={}'.format(mp_mass) if mp_mass is not None else '') +
                ('_b={}'.format(no_boot) if no_boot is not None and no_boot > 0 else '') +
                ('_s' if mode is not None and mode == 2 else ''))
 
@@ -243,13 +246,40 @@ def main():
     parser.add_argument('-b', '--boot', help='Number of bootstrapping samples', type=int,
                         default=settings.NO_BOOTSTRAP_SAMPLES)
 
+    parser.add_argument("--solver", help="MILP solver: IBM ILOG CPLEX or open-source HiGHS; or exact dynamic " +
+                                         "programming without MILP (laminar; fast for few samples); or greedy " +
+                                         "construction and local search with an optimality gap (heuristic); " +
+                                         "warm starts and the reuse of MILPs across replicates apply to CPLEX only",
+                        type=str, choices=['cplex', 'highs', 'laminar', 'heuristic'], default=settings.SOLVER)
+
     # limit search space exploration to decrease the run time
     parser.add_argument("-t", "--time_limit",
-                        help="maximum running time for CPLEX to solve the MILP",
+                        help="maximum running time for the MILP solver",
                         type=int, default=settings.TIME_LIMIT)
     parser.add_argument("-l", "--max_no_mps", help="limit the solution space size by the maximal number of " +
                                                    "explored mutation patterns per variant",
                         type=int, default=settings.MAX_NO_MPS)
+    parser.add_argument("--mp_mass", help="limit the solution space size by the probability mass covered by the " +
+                                          "explored most likely mutation patterns per variant (e.g. 0.999)",
+                        type=float, default=settings.MP_MASS)
+    parser.add_argument("--column_generation", help="generate the relevant mutation patterns iteratively instead " +
+                                                    "of exploring the full solution space (many samples)",
+                        action='store_true', default=settings.COLUMN_GENERATION)
+    parser.add_argument("--lazy_constraints", help="add evolutionary conflicts to the MILP only once they are " +
+                                                   "violated instead of generating all constraints upfront",
+                        action='store_true', default=settings.LAZY_CONSTRAINTS)
+    parser.add_argument("--lattice_cache", help="directory where the evolutionary conflicts among all mutation " +
+                                                "patterns are cached per number of samples and shared across runs",
+                        type=str, default=settings.LATTICE_CACHE_DIR)
+    parser.add_argument("--min_pattern_score", help="exclude mutation patterns with a lower reliability score " +
+                                                    "from the MILP (treated as conflicting)",
+                        type=float, default=settings.MIN_PATTERN_SCORE)
+    parser.add_argument("--min_rel_pattern_score", help="exclude mutation patterns with a lower reliability score " +
+                                                        "relative to the highest score from the MILP",
+                        type=float, default=settings.MIN_REL_PATTERN_SCORE)
+    parser.add_argument("--processes", help="number of processes computing the mutation pattern weights " +
+                                              "and solving the independent components of the MILP",
+                        type=int, default=settings.NO_PROCESSES)
 
     feature_parser = parser.add_mutually_exclusive_group(required=False)
     feature_parser.add_argument('-u', '--subclone_detection', dest='subclone_detection', action='store_true',
@@ -308,6 +338,34 @@ def main():
             raise AttributeError('Solution space can only be limited to a positive number of mutation patterns!')
         logger.info('Solution space is limited to the {} most likely mutation patterns per variant.'.format(
             args.max_no_mps))
+    if args.mp_mass is not None:
+        if not 0 < args.mp_mass <= 1:
+            raise AttributeError('Covered probability mass of the explored mutation patterns needs to be in (0, 1]!')
+        logger.info('Solution space is limited to the most likely mutation patterns covering {:.3%} '.format(
+            args.mp_mass) + 'of the probability mass of each variant.')
+    if args.column_generation:
+        if args.max_no_mps is not None or args.mp_mass is not None:
+            raise AttributeError('Column generation can not be combined with a limited solution space!')
+        logger.info('Mutation patterns are generated iteratively until the solution is proven optimal.')
+    if args.lazy_constraints:
+        logger.info('Evolutionary conflicts are added to the MILP once they are violated.')
+
+    if args.min_pattern_score is not None:
+        if args.min_pattern_score < 0:
+            raise AttributeError('Minimal reliability score of considered mutation patterns can not be negative!')
+        logger.info('Mutation patterns with a reliability score below {:.1e} are excluded from the MILP.'.format(
+            args.min_pattern_score))
+    if args.min_rel_pattern_score is not None:
+        if not 0 <= args.min_rel_pattern_score < 1:
+            raise AttributeError('Minimal relative reliability score of considered mutation patterns '
+                                 'needs to be in [0, 1)!')
+        logger.info('Mutation patterns with a reliability score below {:.1e} of the highest score '.format(
+            args.min_rel_pattern_score) + 'are excluded from the MILP.')
+
+    if args.processes < 1:
+        raise AttributeError('Number of processes needs to be positive!')
+    if args.processes > 1:
+        logger.info('Mutation pattern weights are computed by {} processes.'.format(args.processes))
 
     if args.max_absent_vaf < args.error_rate:
         raise AttributeError('The maximal absent VAF has to be larger than the error rate in the Bayesian model!')
@@ -321,7 +379,8 @@ def main():
     if args.boot > 0:
         logger.info('Number of samples for bootstrapping analysis: {}'.format(args.boot))
 
-    if args.subclone_detection and args.max_no_mps is not None:
+    if args.subclone_detection and (args.max_no_mps is not None or args.mp_mass is not None or
+                                    args.column_generation):
         logger.error('Subclone and partial solution space search are not supported to be performed at the same time! ')
         usage()
 
@@ -474,7 +533,7 @@ def main():
                                         min_absent_coverage=min_absent_cov, min_sa_coverage=args.min_median_coverage,
                                         min_sa_vaf=args.min_median_vaf, bi_e=patient.bi_error_rate,
                                         bi_c0=patient.bi_c0, max_absent_vaf=patient.max_absent_vaf,
-                                        max_no_mps=args.max_no_mps)
+                                        max_no_mps=args.max_no_mps, mp_mass=args.mp_mass)
 
     # create HTML analysis report
     html_report = HTMLReport(os.path.join(output_directory, fn_pattern+'_report.html'), patient_name)
@@ -499,12 +558,13 @@ def main():
             fn_tree = get_output_fn_template(
                 patient.name, read_no_samples, subclone_detection=args.subclone_detection,
                 min_sa_coverage=args.min_median_coverage, min_sa_vaf=args.min_median_vaf, no_boot=args.boot,
-                max_no_mps=args.max_no_mps, bi_e=patient.bi_error_rate, bi_c0=patient.bi_c0,
-                max_absent_vaf=patient.max_absent_vaf, mode=args.mode)
+                max_no_mps=args.max_no_mps, mp_mass=args.mp_mass, bi_e=patient.bi_error_rate,
+                bi_c0=patient.bi_c0, max_absent_vaf=patient.max_absent_vaf, mode=args.mode)
             fn_matrix = get_output_fn_template(
                 patient.name, read_no_samples, subclone_detection=args.subclone_detection,
                 min_sa_coverage=args.min_median_coverage, min_sa_vaf=args.min_median_vaf, max_no_mps=args.max_no_mps,
-                bi_e=patient.bi_error_rate, bi_c0=patient.bi_c0, max_absent_vaf=patient.max_absent_vaf, mode=args.mode)
+                mp_mass=args.mp_mass, bi_e=patient.bi_error_rate, bi_c0=patient.bi_c0,
+                max_absent_vaf=patient.max_absent_vaf, mode=args.mode)
             # determine mutation patterns based on standard binary classification to generate an overview graph
             phylogeny = ti.create_max_lh_tree(
                 patient, tree_filepath=os.path.join(output_directory, fn_tree+'_mlhtree.tex'),
@@ -512,7 +572,10 @@ def main():
                 mp_filepath=os.path.join(output_directory, fn_matrix+'_treeomics_mps.tsv'),
                 subclone_detection=args.subclone_detection, loh_frequency=settings.LOH_FREQUENCY,
                 drivers=subject_drivers, no_bootstrap_samples=args.boot, max_no_mps=args.max_no_mps,
-                time_limit=args.time_limit, plots=plots_report)
+                time_limit=args.time_limit, plots=plots_report, min_pattern_score=args.min_pattern_score,
+                min_rel_pattern_score=args.min_rel_pattern_score, no_processes=args.processes, mp_mass=args.mp_mass,
+                column_generation=args.column_generation, lazy_constraints=args.lazy_constraints,
+                lattice_cache=args.lattice_cache, solver=args.solver)
 
             # previously used for benchmarking
             # if plots_paper:     # generate Java Script D3 trees
@@ -527,14 +590,21 @@ def main():
                 # (convenient for large numbers of variants)
                 fn_mp_plot = get_output_fn_template(
                     patient.name, read_no_samples, min_sa_coverage=args.min_median_coverage, max_no_mps=args.max_no_mps,
-                    min_sa_vaf=args.min_median_vaf, bi_e=patient.bi_error_rate, bi_c0=patient.bi_c0,
-                    max_absent_vaf=patient.max_absent_vaf, mode=args.mode)
+                    mp_mass=args.mp_mass, min_sa_vaf=args.min_median_vaf, bi_e=patient.bi_error_rate,
+                    bi_c0=patient.bi_c0, max_absent_vaf=patient.max_absent_vaf, mode=args.mode)
 
                 if args.subclone_detection:
                     pg = ti.create_max_lh_tree(patient, tree_filepath=None, mm_filepath=None, mp_filepath=None,
                                                subclone_detection=False, loh_frequency=settings.LOH_FREQUENCY,
                                                drivers=subject_drivers, no_bootstrap_samples=0,
-                                               max_no_mps=args.max_no_mps, time_limit=args.time_limit, plots=False)
+                                               max_no_mps=args.max_no_mps, mp_mass=args.mp_mass,
+                                               time_limit=args.time_limit, plots=False,
+                                               min_pattern_score=args.min_pattern_score,
+                                               min_rel_pattern_score=args.min_rel_pattern_score,
+                                               no_processes=args.processes,
+                                               column_generation=args.column_generation,
+                                               lazy_constraints=args.lazy_constraints,
+                                               lattice_cache=args.lattice_cache, solver=args.solver)
                 else:
                     pg = phylogeny
 
@@ -566,7 +636,7 @@ def main():
         elif args.mode == 2:
 
             phylogeny = ti.infer_max_compatible_tree(os.path.join(output_directory, fn_pattern+'_btree.tex'),
-                                                     patient, drivers=subject_drivers)
+                                                     patient, drivers=subject_drivers, solver=args.solver)
 
             if plots_report:
                 # create mutation pattern overview plot
@@ -604,7 +674,7 @@ def main():
         # create input data file for circos conflict graph plots
         if plots_report:
             circos.create_raw_data_file(os.path.join(output_directory, 'fig_data_'+fn_pattern+'_mutdata.txt'),
-                                        patient.mutations, patient.mut_positions, data=patient.data,
+                                        patient.mutations, patient.mut_positions, data=patient.cls_states,
                                         sample_names=patient.sample_names)
 
             # create labels file if gene names are available
@@ -614,13 +684,13 @@ def main():
                     os.path.join(output_directory, 'fig_data_'+fn_pattern+'_mutlabels.txt'),
                     patient.mutations, patient.gene_names, patient.mut_positions, patient.driver_pathways)
 
-            if args.mode == 1 and len(patient.data) < 500:
+            if args.mode == 1 and len(patient.mut_keys) < 500:
                 # create input data files for circular plots with circos: conflict graph
                 circos.create_mlh_graph_files(
                     os.path.join(output_directory, 'mlh_nodes_'+fn_pattern+'.txt'),
                     os.path.join(output_directory, 'mlh_mutnode_labels_'+fn_pattern+'.txt'),
                     os.path.join(output_directory, 'mlh_mutnode_data_'+fn_pattern+'.txt'),
-                    patient.data, phylogeny, patient.gene_names, patient.driver_pathways)
+                    patient.cls_states, phylogeny, patient.gene_names, patient.driver_pathways)
 
             # if there are less than 10000 edges in the conflict graph
             elif args.mode == 2:
@@ -638,7 +708,7 @@ def main():
                     os.path.join(output_directory, 'cfg_mutnode_labels_'+fn_pattern+'.txt'),
                     os.path.join(output_directory, 'cfg_mutnode_data_'+fn_pattern+'.txt'),
                     os.path.join(output_directory, 'cfg_links_'+fn_pattern+'.txt'),
-                    phylogeny, patient.gene_names, patient.driver_pathways, data=patient.data,
+                    phylogeny, patient.gene_names, patient.driver_pathways, data=patient.cls_states,
                     min_node_weight=settings.MIN_MP_SCORE, max_no_mps=settings.CIRCOS_MAX_NO_MPS)
 
     else:
@@ -8,12 +8,13 @@ import numpy as np
 import math
 import settings
 import utils.int_settings as def_sets
-from utils.int_settings import NEG_UNKNOWN, POS_UNKNOWN
+from utils.int_settings import NEG_UNKNOWN, POS_UNKNOWN, ABSENT, PRESENT
 from utils.vcf_parser import read_vcf_files, read_vcf_file
 from utils.data_tables import read_mutation_table, read_csv_file, write_posterior_table
 from utils.statistics import calculate_present_pvalue, find_significant_mutations
 from utils.vaf_data import calculate_p_values
 from utils.statistics import get_log_p0
+from utils.sample_summary import SampleSummary
 
 
 __author__ = 'jreiter'
@@ -39,10 +40,11 @@ class Patient(object):
         # minimum coverage for an absent variant
         self.min_absent_cov = min_absent_cov
 
-        # observed Variant Allele Frequency
+        # observed Variant Allele Frequency (float32 matrix of variants x samples)
         self.vafs = None
-        # allele frequency data in each numbered sample (frequentist)
-        self.data = defaultdict(list)
+        # conventional binary classification in each numbered sample (frequentist) as int8 matrix of variants x samples
+        # states: present (PRESENT), absent (ABSENT), unknown but likely present (POS_UNKNOWN) or absent (NEG_UNKNOWN)
+        self.cls_states = None
 
         # tuple posterior: log probability that VAF = 0, lob probability that VAF > 0
         self.log_p01 = defaultdict(list)
@@ -59,6 +61,8 @@ class Patient(object):
         # median coverages per sample and median MAFs of all confirmed present mutations per sample
         self.sample_coverages = None
         self.sample_mafs = None
+        # summary statistics of each sample shared by the filtering, the inference, and the reports
+        self.sample_summary = None
         # estimated purities from the shared variants
         self.estimated_purities = None
 
@@ -71,14 +75,16 @@ class Patient(object):
 
         self.present_p_values = None
 
-        # sample contain which numbered mutations
-        self.samples = defaultdict(set)
         self.discarded_samples = 0
 
+        # derived products of the classified data are lazily computed and cached;
+        # see invalidate_derived_data() and the corresponding properties
+        # sample contain which numbered mutations
+        self._samples = None
         # mutation is present in which numbered samples
-        self.mutations = defaultdict(set)
+        self._mutations = None
         # list of mutations which are present in some of the samples
-        self.present_mutations = None
+        self._present_mutations = None
 
         self.n = 0      # read samples
         # holds the names for the numbered samples
@@ -95,26 +101,144 @@ class Patient(object):
         self.driver_pathways = dict()
 
         # mutations present in all samples
-        self.founders = set()
+        self._founders = None
         # mutations ordered via the numbered of shared samples
-        self.shared_muts = defaultdict(set)
+        self._shared_muts = None
 
         # mutations present in each sample inferred by maximum likelihood tree
         self.variants = defaultdict(list)
 
         # holds a dictionary with a frozenset of samples mapping to a set of mutations
         # present in exactly the same set
-        self.mps = None         # mutation patterns
+        self._mps = None         # mutation patterns
 
         self.subclones = None
         self.sc_names = None
         self.updated_clones = None
 
-        self.common_muts = []
-        self.add_muts = []
+        self._common_muts = None
+        self._add_muts = None
+
+        self._gen_dis = None        # genetic distance between any pair of samples
+        self._sim_coff = None       # Jaccard similarity coefficient between any pair of samples
+        self._sim_coff_ex = None    # Jaccard similarity coefficient excluding founders
+
+    def invalidate_derived_data(self):
+        """
+        Discard all cached products derived from the classified data such that they are recomputed
+        when they are accessed the next time; needs to be called whenever the classified data changes
+        """
+
+        self._samples = None
+        self._mutations = None
+        self._present_mutations = None
+        self._founders = None
+        self._shared_muts = None
+        self._mps = None
+        self._common_muts = None
+        self._add_muts = None
+        self._gen_dis = None
+        self._sim_coff = None
+        self._sim_coff_ex = None
+
+    @property
+    def samples(self):
+        """
+        Dictionary from the numbered samples to the numbered mutations present in them
+        """
+        if self._samples is None:
+            self._determine_present_samples()
+        return self._samples
+
+    @property
+    def mutations(self):
+        """
+        Dictionary from the numbered mutations to the frozenset of numbered samples where they are present
+        """
+        if self._mutations is None:
+            self._determine_present_samples()
+        return self._mutations
+
+    @property
+    def present_mutations(self):
+        """
+        List of mutations which are present in some of the samples
+        """
+        if self._present_mutations is None:
+            self._present_mutations = self._get_present_mutations()
+        return self._present_mutations
+
+    @property
+    def founders(self):
+        """
+        Set of mutations present in all samples
+        """
+        if self._founders is None:
+            self._determine_sharing_status()
+        return self._founders
+
+    @property
+    def shared_muts(self):
+        """
+        Dictionary from the number of samples to the mutations shared among exactly this number of samples
+        """
+        if self._shared_muts is None:
+            self._determine_sharing_status()
+        return self._shared_muts
+
+    @property
+    def mps(self):
+        """
+        Dictionary from mutation patterns (frozenset of samples) to the set of mutations present in exactly them
+        """
+        if self._mps is None:
+            self._determine_mutation_patterns()
+        return self._mps
+
+    @property
+    def common_muts(self):
+        """
+        Mutations present in both samples of each pair of samples
+        """
+        if self._common_muts is None:
+            self._compare_sample_pairs()
+        return self._common_muts
+
+    @property
+    def add_muts(self):
+        """
+        Mutations present in the first but not in the second sample of each pair of samples
+        """
+        if self._add_muts is None:
+            self._compare_sample_pairs()
+        return self._add_muts
+
+    @property
+    def gen_dis(self):
+        """
+        Genetic distance between any pair of samples
+        """
+        if self._gen_dis is None:
+            self._calculate_genetic_similarity()
+        return self._gen_dis
 
-        self.gen_dis = None         # genetic distance between any pair of samples
-        self.sim_coff = None        # Jaccard similarity coefficient between any pair of samples
+    @property
+    def sim_coff(self):
+        """
+        Jaccard similarity coefficient between any pair of samples
+        """
+        if self._sim_coff is None:
+            self._calculate_genetic_similarity()
+        return self._sim_coff
+
+    @property
+    def sim_coff_ex(self):
+        """
+        Jaccard similarity coefficient between any pair of samples excluding founders
+        """
+        if self._sim_coff_ex is None:
+            self._calculate_genetic_similarity()
+        return self._sim_coff_ex
 
     def process_raw_data(self, false_positive_rate, false_discovery_rate, min_absent_cov, min_sa_cov, min_sa_maf,
                          var_table=None, cov_table=None, csv_file=None, normal_sample=None, excluded_columns=set()):
@@ -193,15 +317,7 @@ class Patient(object):
                 del gene_names[mut_key]
                 continue
 
-            for sample_name in self.mut_reads[mut_key].keys():
-
-                if self.coverage[mut_key][sample_name] >= 0:
-                    self.sample_coverages[sample_name].append(self.coverage[mut_key][sample_name])
-
-                if self.mut_reads[mut_key][sample_name] > 2:
-                    maf = float(self.mut_reads[mut_key][sample_name]) / self.coverage[mut_key][sample_name]
-                    if maf > 0.01:      # ensure it's not due to sequencing errors
-                        self.sample_mafs[sample_name].append(maf)
+            self._add_sample_statistics(mut_key, self.mut_reads[mut_key].keys())
 
         if putative_sequencing_artifacts > 0:
             logger.warn('{} variants were detected that were also significantly present in the normal sample.'.format(
@@ -244,112 +360,207 @@ class Patient(object):
         self.mut_keys = []
         self.gene_names = []
 
-        # posterior log probability if no data was reported
-        non_log_p0 = math.log(def_sets.NO_DATA_P0)
-        non_log_p1 = math.log(1.0 - def_sets.NO_DATA_P0)
-
         self._calculate_hyperparameters()
 
-        self.vafs = np.zeros((len(gene_names), len(self.sample_names)))
+        self.vafs = np.zeros((len(gene_names), len(self.sample_names)), dtype=np.float32)
+        self.cls_states = np.zeros((len(gene_names), len(self.sample_names)), dtype=np.int8)
 
         # ##################################################################################
         # - - - - - - - - CLASSIFY MUTATIONS with BAYESIAN INFERENCE MODEL - - - - - - - - -
         # ##################################################################################
         for mut_key, gene_name in sorted(gene_names.items(), key=lambda k: k[1].lower()):
 
-            # add mutation name
-            self.mut_keys.append(mut_key)
-            # add gene name
-            self.gene_names.append(gene_names[mut_key])
+            self._classify_variant(mut_key, gene_name, sig_muts, min_absent_cov)
 
-            # determine exact position of variant
-            var = mut_key.split('__')
-            if var[0].lower().startswith('chr'):
-                if max(var[0].find('p'), var[0].find('q')) > -1:
-                    chrom = var[0][3:max(var[0].find('p'), var[0].find('q'))]
-                else:
-                    chrom = var[0][3:]
+        self.sample_summary.add_classifications(self.sample_names, self.log_p01, self.estimated_purities,
+                                                self.mut_reads, self.coverage)
+
+        for sample_name in self.sample_names:
+            logger.debug('Sample {} conventional classifications: '.format(sample_name) +
+                         '{} positives; {} negatives; {} unknowns;'.format(
+                         self.positives[sample_name], self.negatives[sample_name],
+                         self.unknowns[0][sample_name]+self.unknowns[1][sample_name]))
+
+        # for sample_name in self.sample_names:
+        #     logger.debug('Sample {} classifications: '.format(sample_name)
+        #                  + '{} positives; {} negatives; {} positive unknowns, {} negative unknowns;'.format(
+        #                  self.positives[sample_name], self.negatives[sample_name],
+        #                  self.unknowns[0][sample_name], self.unknowns[1][sample_name]))
+
+        logger.info("{} samples passed the filtering and have been processed. ".format(self.n))
+        logger.info("Completed reading of allele frequencies at {} mutated positions. ".format(len(self.mut_keys)))
+
+        return len(self.discarded_samples) + self.n
+
+    def add_variants(self, mut_reads, coverage, gene_names, false_positive_rate, false_discovery_rate):
+        """
+        Append further variants (e.g. from a second calling pass or a list of rescued low VAF variants)
+        to the already processed sequencing data of this patient
+        Posteriors are calculated with the previously estimated hyperparameters and the false discovery rate
+        of the conventional classification is controlled among the added variants
+        :param mut_reads: dictionary of mutation keys to dictionaries of sample names to the number of mutant reads
+        :param coverage: dictionary of mutation keys to dictionaries of sample names to the coverage
+        :param gene_names: dictionary of mutation keys to the names of the genes
+        :param false_positive_rate: false positive read of the used sequencing technology
+        :param false_discovery_rate: control the false-positives with the benjamini-hochberg procedure
+        :return: list of the indices of the added variants
+        """
+
+        if self.vafs is None:
+            raise RuntimeError('Sequencing data of patient {} needs to be processed before variants can be added.'
+                               .format(self.name))
+        if self.gene_names is None:
+            raise RuntimeError('Variants can only be added to sequencing data read from TSV or CSV files.')
+
+        new_gene_names = dict()
+        for mut_key in mut_reads.keys():
+            if mut_key in self.mut_reads:
+                logger.warn('Variant {} ({}) has already been processed and is ignored.'.format(
+                    mut_key, gene_names[mut_key]))
             else:
-                chrom = var[0]              # chromosome
-            start_pos = int(var[1])
-            ref, alt = var[2].split('>')
-            end_pos = start_pos + len(ref) - 1
+                new_gene_names[mut_key] = gene_names[mut_key]
 
-            # position data of this variant
-            self.mut_positions.append((chrom, start_pos, end_pos))
+        # calculate p-values of the new variants in all samples having passed the filtering
+        merged_p_values = dict()
+        for mut_key in new_gene_names.keys():
+            self.mut_reads[mut_key] = mut_reads[mut_key]
+            self.coverage[mut_key] = coverage[mut_key]
+            self._add_sample_statistics(mut_key, self.sample_names)
+            for sample_name in self.sample_names:
+                merged_p_values[(sample_name, mut_key)] = calculate_present_pvalue(
+                    mut_reads[mut_key][sample_name], coverage[mut_key][sample_name], false_positive_rate)
+
+        # find significantly mutated genes among the new variants using the Benjamini Hochberg procedure
+        sig_muts = find_significant_mutations(merged_p_values, false_discovery_rate)
 
-            # - - - - - - - - CLASSIFY MUTATIONS - - - - - - - - -
-            for sa_id, sample_name in enumerate(self.sample_names):
+        new_mut_ids = list(range(len(self.mut_keys), len(self.mut_keys)+len(new_gene_names)))
+        self.vafs = np.vstack((self.vafs, np.zeros((len(new_gene_names), len(self.sample_names)),
+                                                   dtype=np.float32)))
+        self.cls_states = np.vstack((self.cls_states, np.zeros((len(new_gene_names), len(self.sample_names)),
+                                                               dtype=np.int8)))
 
-                # add VAF
-                if self.coverage[mut_key][sample_name] > 0:
-                    self.vafs[len(self.mut_keys)-1, sa_id] = (float(self.mut_reads[mut_key][sample_name]) /
-                                                              self.coverage[mut_key][sample_name])
-                else:
-                    self.vafs[len(self.mut_keys) - 1, sa_id] = 0.0
+        for mut_key, gene_name in sorted(new_gene_names.items(), key=lambda k: k[1].lower()):
 
-                # calculate posterior: log probability that VAF = 0
-                if self.coverage[mut_key][sample_name] < 0:   # no sequencing data in this sample
-                    self.log_p01[len(self.mut_keys)-1].append([non_log_p0, non_log_p1])
+            self._classify_variant(mut_key, gene_name, sig_muts, self.min_absent_cov)
 
-                else:                          # calculate posterior according to prior, estimated purity and data
+        # coverage and MAF statistics include the added variants
+        self.sample_summary.update_sample_statistics(self.sample_coverages, self.sample_mafs, self.sample_names)
+        self.sample_summary.add_classifications(self.sample_names, self.log_p01, self.estimated_purities,
+                                                self.mut_reads, self.coverage)
 
-                    # calculate posterior: log probability that VAF = 0, log probability that VAF > 0
-                    p0, p1 = get_log_p0(self.coverage[mut_key][sample_name], self.mut_reads[mut_key][sample_name],
-                                        self.bi_error_rate, self.bi_c0, cutoff_f=self.get_cutoff_frequency(sample_name),
-                                        pseudo_alpha=def_sets.PSEUDO_ALPHA, pseudo_beta=self.betas[sample_name])
-                    self.log_p01[len(self.mut_keys)-1].append([p0, p1])
-                # logger.debug('p0: {;.2e}, k: {}, n: {}.'.format(
-                #     self.log_p0[len(self.mut_keys)-1], self.mut_reads[mut_key][sample_name],
-                #     self.phred_coverage[mut_key][sample_name]))
+        logger.info('Added {} variants to patient {}.'.format(len(new_mut_ids), self.name))
 
-                # conventional binary present/absent classification
-                # not used in inference model, just for artifact calculations
+        # products derived from the classified data need to include the added variants
+        self.invalidate_derived_data()
 
-                # logger.debug('Confidence p-value values {:.2e}, {:.2e} for {} mut-reads at {}x coverage'.format(
-                #     self.present_p_values[sample_name][mut_key], self.absent_p_values[sample_name][mut_key],
-                #     self.mut_reads[mut_key][sample_name], self.phred_coverage[mut_key][sample_name]))
+        return new_mut_ids
 
-                # was the null hypothesis rejected (declared as significant)?
-                if (sample_name, mut_key) in sig_muts:
+    def _add_sample_statistics(self, mut_key, sample_names):
+        """
+        Add the coverage and the MAF of the given variant to the statistics of the given samples
+        :param mut_key: key of the variant
+        :param sample_names: samples whose statistics are updated
+        """
 
-                    maf = float(self.mut_reads[mut_key][sample_name]) / self.coverage[mut_key][sample_name]
+        for sample_name in sample_names:
 
-                    self.data[len(self.mut_keys)-1].append(maf)
-                    self.positives[sample_name] += 1
+            if self.coverage[mut_key][sample_name] >= 0:
+                self.sample_coverages[sample_name].append(self.coverage[mut_key][sample_name])
 
-                # is there enough coverage supporting a conclusion
-                elif min_absent_cov == 0 or self.coverage[mut_key][sample_name] >= min_absent_cov \
-                        or self.coverage[mut_key][sample_name] == -1:     # coverage has not been reported
+            if self.mut_reads[mut_key][sample_name] > 2:
+                maf = float(self.mut_reads[mut_key][sample_name]) / self.coverage[mut_key][sample_name]
+                if maf > 0.01:      # ensure it's not due to sequencing errors
+                    self.sample_mafs[sample_name].append(maf)
 
-                    self.data[len(self.mut_keys)-1].append(0)
-                    self.negatives[sample_name] += 1
+    def _classify_variant(self, mut_key, gene_name, sig_muts, min_absent_cov):
+        """
+        Calculate the posterior probabilities of the given variant in each sample and
+        classify it with the conventional binary present/absent classification
+        Row of the variant in the VAF and classification matrices needs to be allocated before
+        :param mut_key: key of the variant in the raw sequencing data
+        :param gene_name: name of the gene in which the variant occurred
+        :param sig_muts: set of sample name - mutation key tuples which were declared as significantly mutated
+        :param min_absent_cov: minimum coverage at a non-significantly mutated position for absence classification
+        """
 
-                # not enough coverage at this position => unknown
-                else:
-                    if self.mut_reads[mut_key][sample_name] > 0:        # unknown present
-                        self.data[len(self.mut_keys)-1].append(POS_UNKNOWN)
-                        self.unknowns[0][sample_name] += 1
-                    else:                                               # unknown absent
-                        self.data[len(self.mut_keys)-1].append(NEG_UNKNOWN)
-                        self.unknowns[1][sample_name] += 1
+        # posterior log probability if no data was reported
+        non_log_p0 = math.log(def_sets.NO_DATA_P0)
+        non_log_p1 = math.log(1.0 - def_sets.NO_DATA_P0)
 
-        for sample_name in self.sample_names:
-            logger.debug('Sample {} conventional classifications: '.format(sample_name) +
-                         '{} positives; {} negatives; {} unknowns;'.format(
-                         self.positives[sample_name], self.negatives[sample_name],
-                         self.unknowns[0][sample_name]+self.unknowns[1][sample_name]))
+        # add mutation name
+        self.mut_keys.append(mut_key)
+        # add gene name
+        self.gene_names.append(gene_name)
 
-        # for sample_name in self.sample_names:
-        #     logger.debug('Sample {} classifications: '.format(sample_name)
-        #                  + '{} positives; {} negatives; {} positive unknowns, {} negative unknowns;'.format(
-        #                  self.positives[sample_name], self.negatives[sample_name],
-        #                  self.unknowns[0][sample_name], self.unknowns[1][sample_name]))
+        # determine exact position of variant
+        var = mut_key.split('__')
+        if var[0].lower().startswith('chr'):
+            if max(var[0].find('p'), var[0].find('q')) > -1:
+                chrom = var[0][3:max(var[0].find('p'), var[0].find('q'))]
+            else:
+                chrom = var[0][3:]
+        else:
+            chrom = var[0]              # chromosome
+        start_pos = int(var[1])
+        ref, alt = var[2].split('>')
+        end_pos = start_pos + len(ref) - 1
 
-        logger.info("{} samples passed the filtering and have been processed. ".format(self.n))
-        logger.info("Completed reading of allele frequencies at {} mutated positions. ".format(len(self.mut_keys)))
+        # position data of this variant
+        self.mut_positions.append((chrom, start_pos, end_pos))
 
-        return len(self.discarded_samples) + self.n
+        # - - - - - - - - CLASSIFY MUTATIONS - - - - - - - - -
+        for sa_id, sample_name in enumerate(self.sample_names):
+
+            # add VAF
+            if self.coverage[mut_key][sample_name] > 0:
+                self.vafs[len(self.mut_keys)-1, sa_id] = (float(self.mut_reads[mut_key][sample_name]) /
+                                                          self.coverage[mut_key][sample_name])
+            else:
+                self.vafs[len(self.mut_keys) - 1, sa_id] = 0.0
+
+            # calculate posterior: log probability that VAF = 0
+            if self.coverage[mut_key][sample_name] < 0:   # no sequencing data in this sample
+                self.log_p01[len(self.mut_keys)-1].append([non_log_p0, non_log_p1])
+
+            else:                          # calculate posterior according to prior, estimated purity and data
+
+                # calculate posterior: log probability that VAF = 0, log probability that VAF > 0
+                p0, p1 = get_log_p0(self.coverage[mut_key][sample_name], self.mut_reads[mut_key][sample_name],
+                                    self.bi_error_rate, self.bi_c0, cutoff_f=self.get_cutoff_frequency(sample_name),
+                                    pseudo_alpha=def_sets.PSEUDO_ALPHA, pseudo_beta=self.betas[sample_name])
+                self.log_p01[len(self.mut_keys)-1].append([p0, p1])
+            # logger.debug('p0: {;.2e}, k: {}, n: {}.'.format(
+            #     self.log_p0[len(self.mut_keys)-1], self.mut_reads[mut_key][sample_name],
+            #     self.phred_coverage[mut_key][sample_name]))
+
+            # conventional binary present/absent classification
+            # not used in inference model, just for artifact calculations
+
+            # logger.debug('Confidence p-value values {:.2e}, {:.2e} for {} mut-reads at {}x coverage'.format(
+            #     self.present_p_values[sample_name][mut_key], self.absent_p_values[sample_name][mut_key],
+            #     self.mut_reads[mut_key][sample_name], self.phred_coverage[mut_key][sample_name]))
+
+            # was the null hypothesis rejected (declared as significant)?
+            if (sample_name, mut_key) in sig_muts:
+
+                self.cls_states[len(self.mut_keys)-1, sa_id] = PRESENT
+                self.positives[sample_name] += 1
+
+            # is there enough coverage supporting a conclusion
+            elif min_absent_cov == 0 or self.coverage[mut_key][sample_name] >= min_absent_cov \
+                    or self.coverage[mut_key][sample_name] == -1:     # coverage has not been reported
+
+                self.cls_states[len(self.mut_keys)-1, sa_id] = ABSENT
+                self.negatives[sample_name] += 1
+
+            # not enough coverage at this position => unknown
+            else:
+                if self.mut_reads[mut_key][sample_name] > 0:        # unknown present
+                    self.cls_states[len(self.mut_keys)-1, sa_id] = POS_UNKNOWN
+                    self.unknowns[0][sample_name] += 1
+                else:                                               # unknown absent
+                    self.cls_states[len(self.mut_keys)-1, sa_id] = NEG_UNKNOWN
+                    self.unknowns[1][sample_name] += 1
 
     def read_maf_data(self, maf_filename):
         """
@@ -358,6 +569,9 @@ class Patient(object):
         :param maf_filename: path to the MAF file
         """
 
+        # allele frequencies of the numbered mutations in each sample
+        maf_rows = defaultdict(list)
+
         with open(maf_filename, 'r') as fData:
 
             for line in fData:
@@ -441,7 +655,7 @@ class Patient(object):
                                 else:
                                     raise ValueError('Cannot read input file {}'.format(maf_filename))
                             else:
-                                self.data[len(self.mut_keys)-1].append(float(afrs[sa_idx]))
+                                maf_rows[len(self.mut_keys)-1].append(float(afrs[sa_idx]))
 
                     # otherwise move to the next mutation
                     else:
@@ -451,6 +665,11 @@ class Patient(object):
             self.n = len(self.sample_names)
             logger.info("{} samples have been processed. ".format(self.n))
 
+            # given allele frequencies are considered as present classifications
+            self.vafs = np.array([maf_rows[mut_idx][:self.n] for mut_idx in range(len(self.mut_keys))],
+                                 dtype=np.float32)
+            self.cls_states = np.where(self.vafs > 0, PRESENT, ABSENT).astype(np.int8)
+
             logger.info("Completed reading of allele frequencies at {} mutated positions. ".format(len(self.mut_keys)))
 
     def read_vcf_directory(self, vcf_directory, min_sa_cov, min_sa_maf, false_positive_rate,
@@ -606,7 +825,8 @@ class Patient(object):
         # based on an estimated purity of shared mutations
         self._calculate_hyperparameters()
 
-        self.vafs = np.zeros((len(self.mut_keys), len(self.sample_names)))
+        self.vafs = np.zeros((len(self.mut_keys), len(self.sample_names)), dtype=np.float32)
+        self.cls_states = np.zeros((len(self.mut_keys), len(self.sample_names)), dtype=np.int8)
 
         # ##################################################################################
         # - - - - - - - - CLASSIFY MUTATIONS with BAYESION INFERENCE MODEL - - - - - - - - -
@@ -646,27 +866,28 @@ class Patient(object):
                 # was the null hypothesis rejected (declared as significant)?
                 if (sample_name, mut_key) in sig_muts:
 
-                    maf = float(self.mut_reads[mut_key][sample_name]) / self.coverage[mut_key][sample_name]
-
-                    self.data[mut_id].append(maf)
+                    self.cls_states[mut_id, sa_id] = PRESENT
                     self.positives[sample_name] += 1
 
                 # is there enough coverage supporting a conclusion
                 elif min_absent_cov == 0 or sample_name not in self.coverage[mut_key] \
                         or self.coverage[mut_key][sample_name] >= min_absent_cov:
 
-                    self.data[mut_id].append(0)
+                    self.cls_states[mut_id, sa_id] = ABSENT
                     self.negatives[sample_name] += 1
 
                 # not enough coverage at this position => unknown
                 else:
                     if self.mut_reads[mut_key][sample_name] > 0:        # unknown present
-                        self.data[mut_id].append(POS_UNKNOWN)
+                        self.cls_states[mut_id, sa_id] = POS_UNKNOWN
                         self.unknowns[0][sample_name] += 1
                     else:                                               # unknown absent
-                        self.data[mut_id].append(NEG_UNKNOWN)
+                        self.cls_states[mut_id, sa_id] = NEG_UNKNOWN
                         self.unknowns[1][sample_name] += 1
 
+        self.sample_summary.add_classifications(self.sample_names, self.log_p01, self.estimated_purities,
+                                                self.mut_reads, self.coverage)
+
         for sample_name in self.sample_names:
             logger.info('Sample {} classifications: '.format(sample_name) +
                         '{} positives; {} negatives; {} unknowns;'.format(
@@ -766,121 +987,118 @@ class Patient(object):
         # Possibility to implement filters!!!
         # Look at the average/median frequency of founder mutations
         # Filter mutations out with less than half of the average founder mutation frequency
-        # data_utils.remove_contradicting_mutations(self.data)
+        # data_utils.remove_contradicting_mutations(self.cls_states)
+
+        # products derived from the classified data are lazily computed when they are needed
+        self.invalidate_derived_data()
+
+        if post_table_filepath is not None:
+            # write file with posterior probabilities
+            write_posterior_table(post_table_filepath, self.sample_names, self.estimated_purities,
+                                  self.sample_summary.median_mafs,
+                                  self.mut_positions, self.gene_names, self.log_p01, self.betas)
+
+    def _determine_present_samples(self):
+        """
+        Determine in which samples each mutation is present (positives)
+        """
+
+        self._samples = defaultdict(set)
+        self._mutations = defaultdict(set)
 
-        # determine in which samples each mutation is present (positives)
-        for mut in range(len(self.data)):
-            for sa_idx, maf in enumerate(self.data[mut]):
-                if 0 < maf:
-                    self.samples[sa_idx].add(mut)
-                    self.mutations[mut].add(sa_idx)
+        present = self.cls_states > 0
+        for sa_idx in range(present.shape[1]):
+            if present[:, sa_idx].any():
+                self._samples[sa_idx] = set(np.flatnonzero(present[:, sa_idx]).tolist())
+        for mut in np.flatnonzero(present.any(axis=1)).tolist():
+            self._mutations[mut] = set(np.flatnonzero(present[mut]).tolist())
 
         avg_mutations = 0
         for sa_idx, sa_name in enumerate(self.sample_names):
                 # logger.debug("Mutations present in sample {}: {}, {}".format(
-                #     sa_name, len(self.samples[sa_idx]),
-                #     str(self.samples[sa_idx]) if len(self.samples[sa_idx]) < 200 else ''))
-                avg_mutations += len(self.samples[sa_idx])
+                #     sa_name, len(self._samples[sa_idx]),
+                #     str(self._samples[sa_idx]) if len(self._samples[sa_idx]) < 200 else ''))
+                avg_mutations += len(self._samples[sa_idx])
 
         avg_mutations /= float(len(self.sample_names))
         logger.info('The average number of mutations per sample in patient {} is {:.1f}.'.format(
             self.name, avg_mutations))
 
         for mut_idx in range(len(self.mut_keys)):
-            self.mutations[mut_idx] = frozenset(self.mutations[mut_idx])
+            self._mutations[mut_idx] = frozenset(self._mutations[mut_idx])
             # logger.debug("Mutation {} ({}) is present in: {}".format(self.mut_names[mut_idx],
             #            self.gene_names[mut_idx],
-            #            (','.join(self.sample_names[sa_idx] for sa_idx in self.mutations[mut_idx]))))
-
-        self._determine_sharing_status()
-
-        # keep list of mutations present in some of the used samples
-        self.present_mutations = self._get_present_mutations()
-
-        # calculate homogeneity index (Jaccard similarity coefficient)
-        self._calculate_genetic_similarity()
-
-        if post_table_filepath is not None:
-            # write file with posterior probabilities
-            write_posterior_table(post_table_filepath, self.sample_names, self.estimated_purities, self.sample_mafs,
-                                  self.mut_positions, self.gene_names, self.log_p01, self.betas)
+            #            (','.join(self.sample_names[sa_idx] for sa_idx in self._mutations[mut_idx]))))
 
     def _determine_sharing_status(self):
         """
         Determine which samples share the various mutations
         """
 
+        self._founders = set()
+        self._shared_muts = defaultdict(set)
+
         pres_lp = math.log(0.5)  # log probability of 50%
         for mut_idx, ps in self.log_p01.items():
 
             if all(p1 > pres_lp for _, p1 in ps):
-                self.founders.add(mut_idx)
+                self._founders.add(mut_idx)
             else:
-                self.shared_muts[sum(1 for _, p1 in ps if p1 > pres_lp)].add(mut_idx)
+                self._shared_muts[sum(1 for _, p1 in ps if p1 > pres_lp)].add(mut_idx)
 
         logger.info("{:.1%} ({}/{}) of all distinct mutations are founders.".format(
-            float(len(self.founders))/len(self.mutations), len(self.founders), len(self.mutations)))
+            float(len(self._founders))/len(self.mutations), len(self._founders), len(self.mutations)))
         logger.info('In average {:.1f} ({:.1%}) mutations are unique (private) per sample.'.format(
-            float(len(self.shared_muts[1])) / len(self.sample_names),
-            (float(len(self.shared_muts[1])) / len(self.sample_names)) /
+            float(len(self._shared_muts[1])) / len(self.sample_names),
+            (float(len(self._shared_muts[1])) / len(self.sample_names)) /
             (sum(len(muts) for sa_idx, muts in self.samples.items()) / len(self.sample_names))))
 
         # for shared in range(len(self.sample_names)-1, -1, -1):
-        #     if len(self.shared_muts[shared]) > 0:
+        #     if len(self._shared_muts[shared]) > 0:
         #         logger.debug('Mutations shared in {} samples ({} of {} = {:.3f}): {}'.format(shared,
-        #                      len(self.shared_muts[shared]), len(self.mutations),
-        #                      float(len(self.shared_muts[shared])) / len(self.mutations),
-        #                      self.shared_muts[shared] if len(self.shared_muts[shared]) < 200 else ''))
+        #                      len(self._shared_muts[shared]), len(self.mutations),
+        #                      float(len(self._shared_muts[shared])) / len(self.mutations),
+        #                      self._shared_muts[shared] if len(self._shared_muts[shared]) < 200 else ''))
 
-        # compute the number of shared and additional mutations among the sample pairs
-        # similar to a distance matrix
-        self.common_muts = [[set() for _ in range(self.n)] for _ in range(self.n)]
-        self.add_muts = [[0 for _ in range(self.n)] for _ in range(self.n)]
+    def _compare_sample_pairs(self):
+        """
+        Compute the number of shared and additional mutations among the sample pairs
+        similar to a distance matrix
+        """
 
-        # helper to save calculation time:
-        cmuts = [[0 for _ in range(self.n)] for _ in range(self.n)]
+        self._common_muts = [[set() for _ in range(self.n)] for _ in range(self.n)]
+        self._add_muts = [[0 for _ in range(self.n)] for _ in range(self.n)]
 
         for s1 in range(self.n):
             for s2 in range(self.n):
 
-                self.common_muts[s1][s2] = self.samples[s1].intersection(self.samples[s2])
-                cmuts[s1][s2] = len(self.common_muts[s1][s2])
-                self.add_muts[s1][s2] = self.samples[s1].difference(self.samples[s2])
+                self._common_muts[s1][s2] = self.samples[s1].intersection(self.samples[s2])
+                self._add_muts[s1][s2] = self.samples[s1].difference(self.samples[s2])
 
                 # logger.debug('Sample {} has {} mutations in common with sample {} and {} in addition. '.format(
-                #    self.sample_names[s1], cmuts[s1][s2], self.sample_names[s2], len(self.add_muts[s1][s2])))
-
-            # logger.debug(('Sample {} has most ({}) mutations in common with sample(s) {}'
-            #               ' and least ({}) with sample(s) {}. ').format(self.sample_names[s1],
-            #              max(cms for idx, cms in enumerate(cmuts[s1]) if idx != s1),
-            #              str([self.sample_names[idx] for idx, cms in enumerate(cmuts[s1])
-            #                  if cms == max(cms for idx, cms in enumerate(cmuts[s1]) if idx != s1)]),
-            #              min(cmuts[s1]),
-            #              str([self.sample_names[idx] for idx, cms in enumerate(cmuts[s1]) if cms == min(cmuts[s1])])))
-
-        # displays common mutations among the samples excluding founder mutations
-        # similar to a distance matrix
-        # logger.debug('Parsimony-informative mutations among the samples: ')
-        # for s1 in range(self.n):
-        #     logger.debug(self.sample_names[s1]+': '
-        #                  + ' '.join((str((muts-len(self.founders)) if muts != -1 else -1)) for muts in cmuts[s1]))
+                #    self.sample_names[s1], len(self._common_muts[s1][s2]), self.sample_names[s2],
+                #    len(self._add_muts[s1][s2])))
+
+    def _determine_mutation_patterns(self):
+        """
+        Compute all clones sharing mutations in exactly the same samples
+        """
 
         # mutation patterns are sharing its mutations in exactly the same samples (basis for the weighting scheme)
-        self.mps = defaultdict(set)
+        self._mps = defaultdict(set)
 
-        # Compute all clones sharing mutations in exactly the same samples
         # Clones with mutations in all or only one sample are uninformative for
         # the creation of the most parsimonious tree
         for mut_idx, samples in self.mutations.items():
             # if 1 < len(samples) < len(self.sample_names):
             if 0 < len(samples):
-                self.mps[samples].add(mut_idx)
+                self._mps[samples].add(mut_idx)
 
         # show the 10 clones supported by the most mutations
-        # for key, value in islice(sorted(self.mps.items(), key=lambda x: len(x[1]), reverse=True), 10):
+        # for key, value in islice(sorted(self._mps.items(), key=lambda x: len(x[1]), reverse=True), 10):
         #     logger.debug('Mutation pattern {} shares mutations: {} '.format(str(key), value))
 
-        logger.info('Total number of distinct mutation patterns: {}'.format(len(self.mps)))
+        logger.info('Total number of distinct mutation patterns: {}'.format(len(self._mps)))
 
     def _filter_samples(self, min_sa_cov, min_sa_maf):
 
@@ -888,16 +1106,20 @@ class Patient(object):
         discarded_samples = []
         self.sample_names = []
 
+        # compute median coverage and median MAF of each sample once
+        self.sample_summary = SampleSummary(self.sample_coverages, self.sample_mafs)
+        median_coverages = self.sample_summary.median_coverages
+        median_mafs = self.sample_summary.median_mafs
+
         for sample_name in sorted(self.sample_coverages.keys(),
                                   key=lambda item: (item.split('_')[0], int(item.split('_')[1]))
                                   if len(item.split('_')) > 1 and item.split('_')[1].isdigit() else (item, item)):
 
             # discard a sample if its median coverage is lower than the threshold
-            if np.median(self.sample_coverages[sample_name]) < min_sa_cov:
+            if median_coverages[sample_name] < min_sa_cov:
 
                 logger.warn('Sample {} is discarded! Median phred coverage of {} is below the threshold {}.'.format(
-                    sample_name, np.median(self.sample_coverages[sample_name]),
-                    min_sa_cov))
+                    sample_name, median_coverages[sample_name], min_sa_cov))
 
                 self.sample_coverages.pop(sample_name)
                 if sample_name in self.sample_mafs.keys():
@@ -908,11 +1130,11 @@ class Patient(object):
                 discarded_samples.append(sample_name)
 
             # discard a sample if its median MAF is lower than the threshold
-            elif np.median(self.sample_mafs[sample_name]) < min_sa_maf:
+            elif median_mafs[sample_name] < min_sa_maf:
 
                 logger.warn('Sample {} is discarded!'.format(sample_name) +
                             ' Median mutant allele frequency (MAF) of {:.3f} is below the threshold {}.'.format(
-                            np.median(self.sample_mafs[sample_name]), min_sa_maf))
+                            median_mafs[sample_name], min_sa_maf))
 
                 self.sample_coverages.pop(sample_name)
                 self.sample_mafs.pop(sample_name)
@@ -925,8 +1147,7 @@ class Patient(object):
             else:
                 self.sample_names.append(sample_name)
                 logger.info('Sample {}: median coverage {:.1f}, median VAF {:.3f}.'.format(
-                    sample_name, np.median(self.sample_coverages[sample_name]),
-                    np.median(self.sample_mafs[sample_name])))
+                    sample_name, median_coverages[sample_name], median_mafs[sample_name]))
                 # logger.info('Median distinct phred coverage in sample {}: {}'.format(
                 #     sample_name, np.median(self.sample_dis_phred_coverages[sample_name])))
 
@@ -1020,14 +1241,14 @@ class Patient(object):
                         sample_name, self.estimated_purities[sample_name]))
                     self.estimated_purities[sample_name] = 0.99
 
-            elif 0.05 < np.median(self.sample_mafs[sample_name]) < 0.5:
-                self.estimated_purities[sample_name] = 2 * np.median(self.sample_mafs[sample_name])
+            elif 0.05 < self.sample_summary.median_mafs[sample_name] < 0.5:
+                self.estimated_purities[sample_name] = 2 * self.sample_summary.median_mafs[sample_name]
                 logger.warn('Insufficient shared variants in '
                             'sample {} to reliably estimate purity. Used median VAF for estimation: {:.1%}'.format(
                              sample_name, self.estimated_purities[sample_name]))
             else:
                 logger.warn('Only {} private mutations with median VAF of {:.1%} identified in sample {}. '.format(
-                    len(self.sample_mafs[sample_name]), np.median(self.sample_mafs[sample_name]),
+                    len(self.sample_mafs[sample_name]), self.sample_summary.median_mafs[sample_name],
                     sample_name) + 'Unable to estimate purity!')
 
     def _get_present_mutations(self):
@@ -1053,91 +1274,45 @@ class Patient(object):
         (2) calculate the Jaccard similarity coefficient between all pairs
         """
 
-        self.gen_dis = [[0 for _ in range(self.n)] for _ in range(self.n)]
-        self.sim_coff = [[0 for _ in range(self.n)] for _ in range(self.n)]
-        self.sim_coff_ex = [[0 for _ in range(self.n)] for _ in range(self.n)]      # excluding founders
-
-        founders = sum(1 for mut_idx in self.data.keys() if all(vaf > 0 for vaf in self.data[mut_idx]))
-        likely_founders = set(mut_idx for mut_idx in self.data.keys()
-                              if all(vaf > 0 or vaf < 0 for vaf in self.data[mut_idx]))
-
-        for s1_idx in range(len(self.data[0])):
-            for s2_idx in range(len(self.data[0])):
-
-                disagree = 0
-                present_agree = 0
-                no_known_variants = 0
-                considered_vars = set()
-
-                for mut_idx in range(len(self.data)):
-
-                    if self.data[mut_idx][s1_idx] > 0:          # mutation present
-                        if self.data[mut_idx][s2_idx] == 0:     # disagree
-                            no_known_variants += 1
-                            disagree += 1
-                            considered_vars.add(mut_idx)
-
-                        # mutation present in both
-                        elif self.data[mut_idx][s2_idx] > 0:    # agree
-                            no_known_variants += 1
-                            present_agree += 1
-                            considered_vars.add(mut_idx)
-
-                        elif self.data[mut_idx][s2_idx] == NEG_UNKNOWN:
-                            # no indication of a mutation at this position but low coverage
-                            pass
-
-                    elif self.data[mut_idx][s1_idx] == 0:     # mutation absent
-                        if self.data[mut_idx][s2_idx] > 0:
-                            no_known_variants += 1
-                            disagree += 1
-                            considered_vars.add(mut_idx)
-
-                        elif self.data[mut_idx][s2_idx] == 0:   # agree
-                            # mutation is absent in both samples and is therefore not relevant for these calculations
-                            pass
-
-                        elif self.data[mut_idx][s2_idx] == POS_UNKNOWN:
-                            # indication of a mutation at this position but insufficient mutant reads
-                            # maybe penalize distance with two epsilon
-                            pass
-
-                    # mutation believed to be present but insufficient mutant reads
-                    elif self.data[mut_idx][s1_idx] == POS_UNKNOWN:
-                        if self.data[mut_idx][s2_idx] == 0:
-                            pass
-
-                    # mutation believed to be absent but insufficient coverage
-                    elif self.data[mut_idx][s1_idx] == NEG_UNKNOWN:
-                        if self.data[mut_idx][s2_idx] > 0:
-                            pass
-
-                self.gen_dis[s1_idx][s2_idx] = disagree
-                self.sim_coff[s1_idx][s2_idx] = 1.0 if no_known_variants == 0 \
-                    else (float(present_agree) / no_known_variants)
-
-                # determine the number of likely founders among variants which are
-                # known with certainty in the pair of samples
-                no_founders = len(likely_founders.intersection(considered_vars))
-                self.sim_coff_ex[s1_idx][s2_idx] = 1.0 if no_known_variants - no_founders <= 0 \
-                    else ((float(present_agree) - no_founders) / (no_known_variants - no_founders))
+        # masks of the conventional classification; unknown classifications are not considered
+        present = (self.cls_states > 0).astype(np.int64)
+        absent = (self.cls_states == ABSENT).astype(np.int64)
+        # variants which are present or unknown in all samples are likely founders
+        likely_founders = np.all(self.cls_states != ABSENT, axis=1).astype(np.int64)
+
+        # number of variants present in one sample but absent in the other one
+        disagree = present.T.dot(absent) + absent.T.dot(present)
+        # number of variants present in both samples
+        present_agree = present.T.dot(present)
+        no_known_variants = disagree + present_agree
+        # likely founders can only be known with certainty in a pair of samples if they are present in both
+        no_founders = (present * likely_founders[:, np.newaxis]).T.dot(present)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sim_coff = np.where(no_known_variants == 0, 1.0, present_agree / no_known_variants.astype(float))
+            sim_coff_ex = np.where(no_known_variants - no_founders <= 0, 1.0,
+                                   (present_agree - no_founders) / (no_known_variants - no_founders).astype(float))
+
+        self._gen_dis = disagree.tolist()
+        self._sim_coff = sim_coff.tolist()
+        self._sim_coff_ex = sim_coff_ex.tolist()
 
         # Produce tables with the genetic distance between samples
         # print('Similarity index based on the fraction of shared mutations (including founders):')
         # print('Sample \t '+' \t '.join(self.sample_names[sa_idx].replace('_', ' ') for sa_idx in range(self.n))+'')
         # for s1_idx in range(self.n):
         #     print('{} \t '.format(self.sample_names[s1_idx].replace('_', ' ')) +
-        #           ' \t '.join('{:.2f}'.format(self.sim_coff[s1_idx][s2_idx]) for s2_idx in range(self.n))+'')
+        #           ' \t '.join('{:.2f}'.format(self._sim_coff[s1_idx][s2_idx]) for s2_idx in range(self.n))+'')
         #
         # print('Similarity index based on the fraction of shared mutations (excluding founders):')
         # print('Sample \t '+' \t '.join(self.sample_names[sa_idx].replace('_', ' ') for sa_idx in range(self.n))+'')
         # for s1_idx in range(self.n):
         #     print('{} \t '.format(self.sample_names[s1_idx].replace('_', ' ')) +
-        #           ' \t '.join('{:.2f}'.format(self.sim_coff_ex[s1_idx][s2_idx]) for s2_idx in range(self.n))+'')
+        #           ' \t '.join('{:.2f}'.format(self._sim_coff_ex[s1_idx][s2_idx]) for s2_idx in range(self.n))+'')
         #
         # # Produce table with the genetic distance between samples
         # print('Genetic distance across the samples:')
         # print('Sample \t '+' \t '.join(self.sample_names[sa_idx].replace('_', ' ') for sa_idx in range(self.n)))
         # for s1_idx in range(self.n):
         #     print('{} \t '.format(self.sample_names[s1_idx].replace('_', ' ')) +
-        #           ' \t '.join('{}'.format(self.gen_dis[s1_idx][s2_idx]) for s2_idx in range(self.n))+'')
+        #           ' \t '.join('{}'.format(self._gen_dis[s1_idx][s2_idx]) for s2_idx in range(self.n))+'')
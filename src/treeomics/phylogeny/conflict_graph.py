@@ -0,0 +1,225 @@
+#!/usr/bin/python
+"""Compact graph of the evolutionary conflicts among mutation patterns"""
+import logging
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix, coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+
+class ConflictGraph(object):
+    """
+    Nodes are given by mutation patterns (integer node ids in the order of the given patterns) with their weights
+    (reliability scores) in an array; edges model the evolutionary conflicts among them and are kept as arrays of
+    their endpoints together with the adjacency in compressed sparse row format
+    """
+
+    def __init__(self, nodes, weights, sources, sinks, mutations=None):
+        """
+        Create conflict graph
+        :param nodes: list of mutation patterns; their positions are their node ids
+        :param weights: weight of each node
+        :param sources: node ids of the first endpoint of each edge
+        :param sinks: node ids of the second endpoint of each edge
+        :param mutations: dictionary from mutation patterns to their variants (referenced, not copied)
+        """
+
+        self.nodes = list(nodes)
+        self.node_ids = dict((node, node_id) for node_id, node in enumerate(self.nodes))
+        self.weights = np.asarray(weights, dtype=np.float64)
+        assert len(self.weights) == len(self.nodes), 'Each node needs a weight.'
+        self.mutations = mutations
+
+        self.sources = np.asarray(sources, dtype=np.int64)
+        self.sinks = np.asarray(sinks, dtype=np.int64)
+
+        self.indptr = None
+        self.indices = None
+        self._build_adjacency()
+
+    def _build_adjacency(self):
+        """
+        Build the adjacency in compressed sparse row format (each edge is stored in both directions); for edges in
+        lexicographic order, the neighbors of each node are already sorted and no sorting is required
+        """
+
+        adjacency = coo_matrix((np.ones(2 * len(self.sources), dtype=np.int8),
+                                (np.concatenate((self.sinks, self.sources)), np.concatenate((self.sources, self.sinks)))),
+                               shape=(len(self.nodes), len(self.nodes))).tocsr()
+        self.indptr = adjacency.indptr.astype(np.int64)
+        self.indices = adjacency.indices.astype(np.int64)
+
+    def __contains__(self, node):
+        return node in self.node_ids
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def order(self):
+        """
+        :return: number of nodes
+        """
+
+        return len(self.nodes)
+
+    def size(self):
+        """
+        :return: number of edges
+        """
+
+        return len(self.sources)
+
+    def weight(self, node):
+        """
+        :param node: mutation pattern
+        :return: weight of the given node
+        """
+
+        return self.weights[self.node_ids[node]]
+
+    def neighbor_ids(self, node_id):
+        """
+        :param node_id: node id
+        :return: array of the node ids of the neighbors
+        """
+
+        return self.indices[self.indptr[node_id]:self.indptr[node_id+1]]
+
+    def neighbors(self, node):
+        """
+        :param node: mutation pattern
+        :return: list of the conflicting mutation patterns
+        """
+
+        return [self.nodes[neighbor_id] for neighbor_id in self.neighbor_ids(self.node_ids[node]).tolist()]
+
+    def degrees(self):
+        """
+        :return: array with the number of conflicts of each node
+        """
+
+        return np.diff(self.indptr)
+
+    def relabel_nodes(self, mapping):
+        """
+        Replace mutation patterns in place (e.g. after subclones were detected); node ids and weights are kept
+        but the conflicts of the relabeled nodes need to be updated
+        :param mapping: dictionary from previous to new mutation patterns
+        :return: array of the node ids of the relabeled nodes
+        """
+
+        node_ids = []
+        for old_node, new_node in mapping.items():
+            if old_node in self.node_ids:
+                node_id = self.node_ids.pop(old_node)
+                self.nodes[node_id] = new_node
+                node_ids.append(node_id)
+        for node_id in node_ids:
+            self.node_ids[self.nodes[node_id]] = node_id
+
+        return np.array(node_ids, dtype=np.int64)
+
+    def add_nodes(self, nodes, weights):
+        """
+        Append nodes without conflicts to the graph
+        :param nodes: list of mutation patterns
+        :param weights: weight of each new node
+        :return: array of the node ids of the new nodes
+        """
+
+        node_ids = np.arange(len(self.nodes), len(self.nodes) + len(nodes), dtype=np.int64)
+        for node_id, node in zip(node_ids.tolist(), nodes):
+            self.nodes.append(node)
+            self.node_ids[node] = node_id
+        self.weights = np.concatenate((self.weights, np.asarray(weights, dtype=np.float64)))
+        self._build_adjacency()
+
+        return node_ids
+
+    def update_edges(self, node_ids, sources, sinks):
+        """
+        Replace all conflicts of the given nodes by the given edges; the edges remain in lexicographic order
+        :param node_ids: array of node ids whose conflicts changed
+        :param sources: node ids of the first endpoint of each new edge
+        :param sinks: node ids of the second endpoint of each new edge
+        """
+
+        changed = np.zeros(len(self.nodes), dtype=bool)
+        changed[node_ids] = True
+        kept = ~(changed[self.sources] | changed[self.sinks])
+
+        sources = np.concatenate((self.sources[kept], np.asarray(sources, dtype=np.int64)))
+        sinks = np.concatenate((self.sinks[kept], np.asarray(sinks, dtype=np.int64)))
+        order = np.lexsort((sinks, sources))
+        self.sources, self.sinks = sources[order], sinks[order]
+        self._build_adjacency()
+
+    def components(self):
+        """
+        Split the graph into its connected components; nodes without conflicts are never part of a minimum
+        weight vertex cover and are hence omitted
+        :return: list of the components given by arrays of their node ids and their edge ids (largest first)
+        """
+
+        if self.size() == 0:
+            return []
+
+        adjacency = csr_matrix((np.ones(len(self.indices), dtype=np.int8), self.indices, self.indptr),
+                               shape=(len(self.nodes), len(self.nodes)))
+        _, labels = connected_components(adjacency, directed=False)
+
+        # group conflicting nodes and the edges by the label of their component
+        node_ids = np.flatnonzero(self.degrees() > 0)
+        node_ids = node_ids[np.argsort(labels[node_ids], kind='mergesort')]
+        edge_ids = np.argsort(labels[self.sources], kind='mergesort')
+        node_bounds = np.flatnonzero(np.diff(labels[node_ids])) + 1
+        edge_bounds = np.flatnonzero(np.diff(labels[self.sources[edge_ids]])) + 1
+
+        components = list(zip(np.split(node_ids, node_bounds), np.split(edge_ids, edge_bounds)))
+        components.sort(key=lambda component: -len(component[1]))
+
+        return components
+
+    def subgraph(self, node_ids, edge_ids):
+        """
+        Create the conflict graph induced by the given nodes and edges (e.g. a connected component)
+        :param node_ids: array of node ids in this graph
+        :param edge_ids: array of the edge ids among the given nodes
+        :return: conflict graph with the nodes in the given order
+        """
+
+        local_ids = np.full(len(self.nodes), -1, dtype=np.int64)
+        local_ids[node_ids] = np.arange(len(node_ids))
+
+        return ConflictGraph([self.nodes[node_id] for node_id in node_ids.tolist()], self.weights[node_ids],
+                             local_ids[self.sources[edge_ids]], local_ids[self.sinks[edge_ids]],
+                             mutations=self.mutations)
+
+    def edges(self):
+        """
+        :return: generator of the pairs of conflicting mutation patterns
+        """
+
+        for source, sink in zip(self.sources.tolist(), self.sinks.tolist()):
+            yield self.nodes[source], self.nodes[sink]
+
+    def to_networkx(self):
+        """
+        Create a networkx graph with the same nodes, weights and edges (e.g. for debugging)
+        :return: networkx graph
+        """
+
+        graph = nx.Graph()
+        for node, weight in zip(self.nodes, self.weights.tolist()):
+            if self.mutations is not None:
+                graph.add_node(node, weight=weight, muts=self.mutations[node])
+            else:
+                graph.add_node(node, weight=weight)
+        graph.add_edges_from(self.edges())
+
+        return graph
@@ -0,0 +1,98 @@
+#!/usr/bin/python
+"""Evolutionary conflicts among all mutation patterns of a given number of samples cached on disk"""
+import logging
+import os
+import tempfile
+import numpy as np
+import utils.int_settings as def_sets
+from phylogeny.phylogeny_utils import get_conflict_edges
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+# memory-mapped conflict arrays of the lattices loaded in this process (key: path of the cache file)
+_lattices = dict()
+
+
+def get_lattice_path(cache_dir, n):
+    """
+    :param cache_dir: directory of the cached lattices
+    :param n: number of samples
+    :return: path to the cache file of the lattice of the given number of samples and the current format version
+    """
+
+    return os.path.join(cache_dir, 'conflicts_n{}_v{}.npy'.format(n, def_sets.LATTICE_CACHE_VERSION))
+
+
+def load_lattice_conflicts(lattice_patterns, n, cache_dir):
+    """
+    Get the evolutionary conflicts among all 2^n mutation patterns of n samples; the conflicts only depend on n
+    and are hence generated once, stored in the cache directory and memory-mapped by all following runs
+    :param lattice_patterns: list of all mutation patterns of n samples (see get_mp_columns)
+    :param n: number of samples
+    :param cache_dir: directory of the cached lattices
+    :return: array (2 x #conflicts) of the indices of the first and of the second pattern of each conflict in
+             lexicographic order
+    """
+
+    path = get_lattice_path(cache_dir, n)
+    if path not in _lattices:
+        if not os.path.isfile(path):
+            _write_lattice_conflicts(lattice_patterns, path)
+        _lattices[path] = np.load(path, mmap_mode='r')
+        logger.debug('Loaded {} evolutionary conflicts among the mutation patterns of {} samples from {}.'.format(
+            _lattices[path].shape[1], n, os.path.abspath(path)))
+
+    return _lattices[path]
+
+
+def _write_lattice_conflicts(lattice_patterns, path):
+    """
+    Generate the evolutionary conflicts among all given patterns and store them atomically in the given file
+    :param lattice_patterns: list of all mutation patterns of n samples
+    :param path: path to the cache file
+    """
+
+    sources, sinks = get_conflict_edges(lattice_patterns)
+    conflicts = np.vstack((sources, sinks)).astype(np.uint32)
+
+    cache_dir = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    # concurrent runs may generate the same lattice; the file is only visible once it is complete
+    with tempfile.NamedTemporaryFile(dir=cache_dir, suffix='.npy', delete=False) as tmp_file:
+        np.save(tmp_file, conflicts)
+    os.replace(tmp_file.name, path)
+
+    logger.info('Cached {} evolutionary conflicts among {} mutation patterns in {}.'.format(
+        conflicts.shape[1], len(lattice_patterns), os.path.abspath(path)))
+
+
+def filter_lattice_conflicts(conflicts, lattice_ids, no_lattice_patterns):
+    """
+    Select the evolutionary conflicts among the retained mutation patterns
+    :param conflicts: array (2 x #conflicts) of the lattice indices of the conflicting patterns
+    :param lattice_ids: lattice index of each retained pattern
+    :param no_lattice_patterns: number of patterns in the lattice
+    :return: arrays of the indices (in the retained patterns) of the first and of the second pattern of each conflict
+             in lexicographic order
+    """
+
+    lattice_ids = np.asarray(lattice_ids, dtype=np.int64)
+    node_ids = np.full(no_lattice_patterns, -1, dtype=np.int64)
+    node_ids[lattice_ids] = np.arange(len(lattice_ids))
+
+    sources, sinks = node_ids[conflicts[0]], node_ids[conflicts[1]]
+    retained = (sources >= 0) & (sinks >= 0)
+    sources, sinks = sources[retained], sinks[retained]
+
+    # the lexicographic order of the lattice is kept if the retained patterns are in lattice order
+    if np.any(np.diff(lattice_ids) < 0):
+        sources, sinks = np.minimum(sources, sinks), np.maximum(sources, sinks)
+        order = np.lexsort((sinks, sources))
+        sources, sinks = sources[order], sinks[order]
+
+    return sources, sinks
@@ -1,13 +1,17 @@
 #!/usr/bin/python
 import logging
-import math
 from collections import defaultdict, Counter
+from itertools import count
 from random import sample
+import multiprocessing as mp
+import time
 import numpy as np
-import cplex as cp
 import heapq
+from phylogeny.milp_backends import create_milp
+from phylogeny.laminar_solver import solve_max_laminar_family
+from phylogeny.heuristic_solver import solve_heuristic, get_upper_bound
 
-"""Find maximal subset of compatible mutation patterns weighted by reliability scores via CPLEX ILP solver"""
+"""Find maximal subset of compatible mutation patterns weighted by reliability scores via CPLEX or HiGHS MILP solver"""
 __author__ = 'Johannes REITER'
 __date__ = 'April, 2014'
 
@@ -15,88 +19,84 @@ __date__ = 'April, 2014'
 # get logger for application
 logger = logging.getLogger('treeomics')
 
+# MILPs of the components kept across the replicates of a robustness analysis in each process
+# (key: series of replicates and component index; value: MILP, conflicts in the MILP, previous solution)
+_component_models = dict()
+# ids of the series of replicates
+_model_series = count()
 
-def solve_conflicting_phylogeny(cf_graph, time_limit=None):
+# solution states of the components proving the optimality of their vertex cover
+OPTIMAL_STATES = ('trivial', 'optimal', 'MIP_optimal', 'MIP_optimal_tolerance')
+
+
+def solve_conflicting_phylogeny(cf_graph, time_limit=None, no_processes=1, lazy_constraints=False, warm_start=None,
+                                changed_nodes=None, solver='cplex', solution_states=None):
     """
     Translates given conflict graph into a integer linear program and
     solves the ILP for the minimum number of mutation patterns (set of identical mutation patterns)
-    which need to be ignored
+    which need to be ignored; the minimum vertex cover is solved independently on each connected component
     :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
     :param time_limit: time limit for MILP solver in seconds
+    :param no_processes: number of processes solving the components in parallel
+    :param lazy_constraints: add only the violated evolutionary conflicts iteratively to the MILP
+    :param warm_start: boolean array of the nodes in a previous vertex cover used as start solution
+    :param changed_nodes: boolean array of the nodes whose conflicts changed since the previous vertex cover;
+                          components without changed nodes keep the previous solution
+    :param solver: name of the solver (cplex, highs, laminar or heuristic)
+    :param solution_states: counter to which the solution states of the components are added (see is_optimal)
     :return set of conflicting mutation patterns, set of compatible mutation patterns
     """
 
-    logger.info('Build linear program (cplex) for finding the minimal number of conflicting mutations.')
+    logger.info('Build vertex cover problem ({}) for finding the minimal number of conflicting mutations.'.format(
+        solver))
 
     # the number of columns in the ILP is given by the number of nodes in the conflict graph
     # weighting of the mutation patterns corresponds to the number of mutation which are conflicting
-    objective_function = [data['weight'] for _, data in cf_graph.nodes_iter(data=True)]
+    objective_function = cf_graph.weights.tolist()
 
     logger.debug('Objective function: ' + ', '.join(
         '{}: {:.1e}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
 
-    # look at the fourth highest reliability score value to get an impression of the magnitude of these values
-    ex_rs = heapq.nlargest(4, objective_function)[-1]
-    # scale all values to avoid numerical issues with CPLEX
-    scaling_factor = 1e20 / ex_rs
-    scaled_obj_func = [scaling_factor * x for x in objective_function]
-
-    # column types
-    ctypes = ['B' for _ in range(len(objective_function))]
-
-    # add column names to the ILP
-    cnames = []
-    for col_idx, node in enumerate(cf_graph.nodes_iter(), 0):
-        cnames.append(str(node))
-
-    lp = cp.Cplex()
-
-    # set objective function which is the minimum number of positions with a sequencing error
-    lp.objective.set_sense(lp.objective.sense.minimize)
-    # lp.parameters.mip.tolerances.absmipgap.set(1e-15)
-    # lp.parameters.mip.tolerances.mipgap.set(1e-15)
-    # lp.parameters.simplex.tolerances.optimality.set(1e-09)
-
-    # set time limit for MILP solver
-    if time_limit is not None:
-        lp.parameters.timelimit.set(time_limit)
-
-    lp.variables.add(obj=scaled_obj_func, types=ctypes, names=cnames)
-
-    # add evolutionary constraints
-    constraints = []    # LHS (left hand side) of the rows in the ILP
-    row_names = []      # names of the rows (constraints)
-    for constraint_idx, (source, sink) in enumerate(cf_graph.edges_iter(), 1):
-        constraint = [[str(source), str(sink)], [1, 1]]
-
-        constraints.append(constraint)
-        row_names.append(str(source)+'-'+str(sink))
-
-        # logger.debug('Add constraint {}: {}'.format(constraint_idx, str(source)+'-'+str(sink)))
-
-    row_rhss = [1 for _ in range(len(constraints))]     # 1 is the RHS in all constraints
-    row_senses = ['G' for _ in range(len(constraints))]     # greater equal is used in all constraints
-    lp.linear_constraints.add(lin_expr=constraints, senses=row_senses, rhs=row_rhss, names=row_names)
-
-    logger.debug('Added {} constraints.'.format(len(constraints)))
-
-    # solve the Integer Linear Program (ILP)
-    lp.solve()
-    sol = lp.solution       # obtain solution
-
-    solve_stat = sol.get_status()
-    # column solution values
-    solution_values = sol.get_values()
-    # proportional to incompatible mutations (depending on the weight definition)
-    objective_value = sol.get_objective_value()
+    components = cf_graph.components()
+    logger.info('Conflict graph with {} nodes splits into {} components with conflicts ({} trivial nodes).'.format(
+        cf_graph.order(), len(components), cf_graph.order() - sum(len(node_ids) for node_ids, _ in components)))
+
+    if len(components) > 0:
+        # look at the fourth highest reliability score value to get an impression of the magnitude of these values
+        ex_rs = heapq.nlargest(4, objective_function)[-1]
+        # scale all values to avoid numerical issues with CPLEX
+        scaling_factor = 1e20 / ex_rs
+    else:
+        scaling_factor = 1.0
+
+    pool = _create_pool(no_processes, len(components))
+    try:
+        cover, objective_value, solve_stats = solve_components(
+            cf_graph, components, scaling_factor * cf_graph.weights, time_limit=time_limit, pool=pool,
+            no_processes=no_processes, lazy_constraints=lazy_constraints, warm_start=warm_start,
+            changed_nodes=changed_nodes, solver=solver)
+    finally:
+        if pool is not None:
+            pool.terminate()
 
     logger.info('Minimum vertex cover is of weight (objective value) {:.3e} (original weight: {:3e}).'.format(
         objective_value/scaling_factor, sum(val for val in objective_function)))
 
-    logger.info('Solution status: {}'.format(sol.status[solve_stat]))
+    logger.info('Solution status: {}'.format(', '.join('{} ({}x)'.format(stat, cnt)
+                                                       for stat, cnt in solve_stats.most_common())))
+    if solution_states is not None:
+        solution_states.update(solve_stats)
+
+    if solver == 'heuristic':
+        # bound the weight of the optimal compatible set to make the optimality gap explicit
+        compatible_weight = float(np.dot(cf_graph.weights, ~cover))
+        upper_bound = get_upper_bound(cf_graph, cf_graph.weights)
+        logger.info('Heuristic compatible mutation patterns of weight {:.4e} (lower bound); '.format(compatible_weight)
+                    + 'upper bound {:.4e}; optimality gap at most {:.3%}.'.format(
+                        upper_bound, (upper_bound - compatible_weight) / upper_bound if upper_bound > 0 else 0.0))
 
     logger.debug('Column solution values: ' +
-                 ', '.join('{}: {}'.format(var_idx, status) for var_idx, status in enumerate(solution_values, 1)))
+                 ', '.join('{}: {}'.format(var_idx, int(status)) for var_idx, status in enumerate(cover, 1)))
 
     # translate solution of the ILP back to the phylogeny problem
     # removing the minimum vertex cover (conflicting mutation patterns) gives the maximum compatible set of mps
@@ -104,13 +104,13 @@ def solve_conflicting_phylogeny(cf_graph, time_limit=None):
     incompatible_nodes = set()
     conflicting_mutations_weight = 0
 
-    for col_idx, (node, data) in enumerate(cf_graph.nodes_iter(data=True)):
+    for node, weight, in_cover in zip(cf_graph.nodes, objective_function, cover.tolist()):
 
-        if round(sol.get_values(str(node)), 5) == 0:
+        if not in_cover:
             compatible_nodes.add(node)
         else:
             incompatible_nodes.add(node)
-            conflicting_mutations_weight += data['weight']
+            conflicting_mutations_weight += weight
 
     # assert round(conflicting_mutations_weight, 4) == round(objective_value, 4), \
     #     "As long as weights are given by the number of mutations: {} == {}".format(conflicting_mutations_weight,
@@ -121,216 +121,505 @@ def solve_conflicting_phylogeny(cf_graph, time_limit=None):
     return incompatible_nodes, compatible_nodes
 
 
-def bootstrapping_solving(cf_graph, mp_weights, idx_to_mp, no_samples):
+def is_optimal(solution_states):
+    """
+    :param solution_states: counter of the solution states of the components
+    :return: True if the vertex covers of all components are proven to be optimal
+    """
+
+    return all(state in OPTIMAL_STATES for state in solution_states.keys())
+
+
+def solve_components(cf_graph, components, objective_function, time_limit=None, pool=None, no_processes=1,
+                     lazy_constraints=False, warm_start=None, changed_nodes=None, quiet=False, solver='cplex',
+                     model_series=None):
+    """
+    Solve the minimum weight vertex cover of each given connected component independently and merge the results;
+    nodes without conflicts are never part of the cover
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param components: connected components given by arrays of their node ids and their edge ids
+    :param objective_function: array with the (non-negative) weight of each node in the conflict graph
+    :param time_limit: time limit for MILP solver in seconds split among the components
+    :param pool: pool of worker processes solving the components in parallel
+    :param no_processes: number of processes in the given pool
+    :param lazy_constraints: add only the violated evolutionary conflicts iteratively to the MILPs
+    :param warm_start: boolean array of the nodes in a previous vertex cover used as start solution
+    :param changed_nodes: boolean array of the nodes whose conflicts changed since the previous vertex cover
+    :param quiet: suppress the output of the MILP solver
+    :param solver: name of the solver (cplex, highs, laminar or heuristic)
+    :param model_series: id of a series of replicates with the same components (see new_model_series); the MILP of
+                         each component is built once and only its objective function is updated for each replicate;
+                         the MILPs are only reused without a pool since a pool hands the components to arbitrary
+                         workers and each worker would build its own MILP for every component
+    :return: boolean array of the nodes in the vertex cover, objective value, counter of the solution states
+    """
+
+    cover = np.zeros(cf_graph.order(), dtype=bool)
+    objective_value = 0.0
+    solve_stats = Counter()
+
+    if model_series is not None and pool is None:
+        model_keys = [(model_series, comp_idx) for comp_idx in range(len(components))]
+    else:
+        model_keys = [None for _ in range(len(components))]
+
+    if changed_nodes is not None:
+        # components without any changed node keep their previous solution
+        changed_components = []
+        changed_keys = []
+        for (node_ids, edge_ids), model_key in zip(components, model_keys):
+            if np.any(changed_nodes[node_ids]):
+                changed_components.append((node_ids, edge_ids))
+                changed_keys.append(model_key)
+            else:
+                cover[node_ids] = warm_start[node_ids]
+                objective_value += float(np.dot(objective_function[node_ids], warm_start[node_ids]))
+                solve_stats['unchanged'] += 1
+        components = changed_components
+        model_keys = changed_keys
+
+    no_workers = 1 if pool is None else max(min(no_processes, len(components)), 1)
+    tasks = _generate_component_tasks(cf_graph, components, objective_function, time_limit, no_workers,
+                                      lazy_constraints, warm_start, quiet, solver, model_keys)
+    if pool is None:
+        results = (_solve_component(task) for task in tasks)
+    else:
+        results = pool.imap(_solve_component, tasks)
+
+    for (node_ids, _), (comp_cover, comp_value, solve_stat) in zip(components, results):
+        cover[node_ids] = comp_cover
+        objective_value += comp_value
+        solve_stats[solve_stat] += 1
+
+    return cover, objective_value, solve_stats
+
+
+def _create_pool(no_processes, no_components):
+    """
+    :param no_processes: number of processes solving the components in parallel
+    :param no_components: number of components
+    :return: pool of worker processes or None if the components are solved in this process
+    """
+
+    if no_processes is None or no_processes <= 1 or no_components <= 1:
+        return None
+
+    return mp.Pool(processes=min(no_processes, no_components))
+
+
+def new_model_series():
+    """
+    :return: id of a new series of replicates whose component MILPs are reused across the replicates
+    """
+
+    return next(_model_series)
+
+
+def release_models(model_series):
+    """
+    Free the MILPs of the given series of replicates kept in this process
+    :param model_series: id of the series of replicates
+    """
+
+    for model_key in [model_key for model_key in _component_models.keys() if model_key[0] == model_series]:
+        del _component_models[model_key]
+
+
+def _generate_component_tasks(cf_graph, components, objective_function, time_limit, no_processes, lazy_constraints,
+                              warm_start, quiet, solver, model_keys):
+    """
+    Generate the vertex cover problems of the components; the time limit is split upfront proportionally to the
+    number of conflicts in the components (a pool consumes the tasks before any component is solved) and all
+    components share the deadline given by the time limit
+    :return: generator of the component, its weights, its time limit, the deadline, the number of threads, the lazy
+             constraints, its start solution, the quiet flag, the MILP solver and the key of its reused MILP
+    """
+
+    if time_limit is not None:
+        deadline = time.time() + time_limit
+        total_conflicts = sum(len(edge_ids) for _, edge_ids in components)
+        comp_time_limits = [min(time_limit, time_limit * no_processes * len(edge_ids) / total_conflicts)
+                            for _, edge_ids in components]
+    else:
+        deadline = None
+        comp_time_limits = [None for _ in range(len(components))]
+
+    for (node_ids, edge_ids), comp_time_limit, model_key in zip(components, comp_time_limits, model_keys):
+
+        yield (cf_graph.subgraph(node_ids, edge_ids), objective_function[node_ids], comp_time_limit, deadline,
+               1 if no_processes > 1 else None, lazy_constraints,
+               warm_start[node_ids] if warm_start is not None else None, quiet, solver, model_key)
+
+
+def _solve_component(task):
+    """
+    Solve the minimum weight vertex cover of a connected component via the given MILP solver; the laminar solver finds
+    the complementary maximum weight compatible set by dynamic programming (no time limit) and the heuristic solver
+    finds a heavy compatible set by greedy construction and local search; if a model key is given, the MILP of the
+    component is kept in this process and reused by the following replicates (only the objective changes) starting
+    from the previous solution
+    :param task: component, its weights, its time limit, the deadline (absolute time) of all components, the number
+                 of threads, the lazy constraints, its start solution, the quiet flag, the MILP solver and the key of
+                 the reused MILP (None: no reuse)
+    :return: boolean array of the nodes in the vertex cover, objective value, solution status
+    """
+
+    (component, objective_function, time_limit, deadline, threads, lazy_constraints, start, quiet, solver,
+     model_key) = task
+
+    # a single conflict is resolved by the lighter mutation pattern
+    if component.size() == 1:
+        cover = np.zeros(2, dtype=bool)
+        cover[np.argmin(objective_function)] = True
+        return cover, float(np.min(objective_function)), 'trivial'
+
+    if solver == 'laminar':
+        # evolutionarily compatible patterns form a laminar family
+        cover = ~solve_max_laminar_family(component.nodes, objective_function)
+        return cover, float(np.dot(objective_function, cover)), 'optimal'
+
+    if start is not None:
+        # a previous solution (made feasible) warm starts the solver
+        start = repair_cover(component, objective_function, start)
+
+    if deadline is not None:
+        # the component can not use more than the time left until the deadline of all components
+        time_limit = max(min(time_limit, deadline - time.time()), 0.0)
+
+    if solver == 'heuristic':
+        cover = solve_heuristic(component, objective_function, time_limit=time_limit, start=start)
+        return cover, float(np.dot(objective_function, cover)), 'heuristic'
+
+    if time_limit is not None and time_limit <= 0:
+        logger.warn('Time limit reached before the component with {} conflicts was solved; '.format(component.size())
+                    + 'conflicts are resolved greedily.')
+        cover = start if start is not None else repair_cover(
+            component, objective_function, np.zeros(component.order(), dtype=bool))
+        return cover, float(np.dot(objective_function, cover)), 'repaired'
+
+    if model_key is not None and model_key in _component_models:
+        # the previous solution of the reused MILP remains feasible
+        lp, added, previous_cover = _component_models[model_key]
+        lp.set_objective(objective_function)
+        lp.set_time_limit(time_limit)
+        if start is None:
+            start = previous_cover
+
+    else:
+        # variables and constraints of reused MILPs are only given by their index
+        lp = create_milp(solver, objective_function,
+                         names=[str(node) for node in component.nodes] if model_key is None else None,
+                         time_limit=time_limit, threads=threads, quiet=quiet)
+
+        # add evolutionary constraints
+        if lazy_constraints:
+            added = get_seed_conflicts(component, objective_function)
+        else:
+            added = np.ones(component.size(), dtype=bool)
+        _add_conflict_constraints(lp, component, np.flatnonzero(added), names=model_key is None)
+
+    if start is not None:
+        lp.set_start(start)
+
+    cover, objective_value, status = _solve_milp(lp, component, objective_function, time_limit, lazy_constraints,
+                                                 added, start, names=model_key is None)
+    if model_key is not None:
+        _component_models[model_key] = (lp, added, cover)
+
+    return cover, objective_value, status
+
+
+def _solve_milp(lp, component, objective_function, time_limit, lazy_constraints, added, start, names=True):
+    """
+    Solve the MILP of the minimum weight vertex cover of a component; with lazy constraints the MILP starts from the
+    conflict of each pattern with its heaviest neighbor and the violated conflicts are separated and added after
+    each solve until the solution is evolutionarily compatible
+    :param lp: MILP (see milp_backends)
+    :param component: Conflict graph of the component
+    :param objective_function: array with the weight of each node
+    :param time_limit: time limit for MILP solver in seconds
+    :param lazy_constraints: add only the violated evolutionary conflicts iteratively to the MILP
+    :param added: boolean array of the conflicts in the MILP (updated)
+    :param start: boolean array of the nodes in a vertex cover given as start solution to the MILP or None
+    :param names: name the added constraints
+    :return: boolean array of the nodes in the vertex cover, objective value, solution status
+    """
+
+    start_time = time.time()
+    while True:
+        # solve the Integer Linear Program (ILP)
+        cover, objective_value, status = lp.solve()
+
+        if cover is None:
+            # no solution was found within the time limit; resolve the conflicts greedily instead
+            logger.warn('MILP solver found no solution ({}); conflicts are resolved greedily.'.format(status))
+            cover = start if start is not None else np.zeros(component.order(), dtype=bool)
+            cover = repair_cover(component, objective_function, cover)
+            return cover, float(np.dot(objective_function, cover)), 'repaired'
+
+        if not lazy_constraints:
+            return cover, objective_value, status
+
+        # separate the evolutionary conflicts violated by the current solution
+        violated = separate_conflicts(component, objective_function, cover, added)
+        if len(violated) == 0:
+            return cover, objective_value, status
+
+        # the lighter pattern of each violated conflict gives a feasible solution to warm start the next solve
+        start = repair_cover(component, objective_function, cover)
+        if time_limit is not None:
+            remaining_time = time_limit - (time.time() - start_time)
+            if remaining_time <= 0:
+                logger.warn('Time limit reached before all violated evolutionary conflicts were separated.')
+                return start, float(np.dot(objective_function, start)), 'repaired'
+            lp.set_time_limit(remaining_time)
+
+        added[violated] = True
+        _add_conflict_constraints(lp, component, violated, names=names)
+        lp.set_start(start)
+        logger.debug('Added {} violated evolutionary conflicts ({} of {} in the MILP).'.format(
+            len(violated), np.count_nonzero(added), component.size()))
+
+
+def separate_conflicts(cf_graph, objective_function, cover, added):
+    """
+    Find the evolutionary conflicts among the compatible patterns of the given solution which are not yet in the MILP;
+    only the conflict of each compatible pattern with its heaviest violating neighbor is selected to keep the MILP
+    small
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param objective_function: array with the weight of each node
+    :param cover: boolean array of the nodes in the vertex cover of the current solution
+    :param added: boolean array of the conflicts in the MILP
+    :return: array of the edge ids of the selected violated conflicts
+    """
+
+    violated = np.flatnonzero(~added & ~cover[cf_graph.sources] & ~cover[cf_graph.sinks])
+    if len(violated) == 0:
+        return violated
+
+    # consider each violated conflict from both of its patterns
+    nodes = np.concatenate((cf_graph.sources[violated], cf_graph.sinks[violated]))
+    neighbors = np.concatenate((cf_graph.sinks[violated], cf_graph.sources[violated]))
+    edge_ids = np.concatenate((violated, violated))
+    order = np.lexsort((-objective_function[neighbors], nodes))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = nodes[order][1:] != nodes[order][:-1]
+
+    return np.unique(edge_ids[order][first])
+
+
+def get_seed_conflicts(cf_graph, objective_function):
+    """
+    Select the initial evolutionary constraints for the lazy separation: the conflict of each pattern with its
+    heaviest neighbor (every node has at least one conflict in a component)
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param objective_function: array with the weight of each node
+    :return: boolean array of the selected conflicts
+    """
+
+    heaviest_neighbors = np.maximum.reduceat(objective_function[cf_graph.indices], cf_graph.indptr[:-1])
+
+    return ((objective_function[cf_graph.sinks] == heaviest_neighbors[cf_graph.sources]) |
+            (objective_function[cf_graph.sources] == heaviest_neighbors[cf_graph.sinks]))
+
+
+def repair_cover(cf_graph, objective_function, cover):
+    """
+    Extend the given set of nodes to a vertex cover by adding the lighter pattern of each uncovered conflict
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param objective_function: array with the weight of each node
+    :param cover: boolean array of the nodes in the given set
+    :return: boolean array of the nodes in the vertex cover
+    """
+
+    cover = cover.copy()
+    uncovered = np.flatnonzero(~cover[cf_graph.sources] & ~cover[cf_graph.sinks])
+    for source, sink in zip(cf_graph.sources[uncovered].tolist(), cf_graph.sinks[uncovered].tolist()):
+        if not cover[source] and not cover[sink]:
+            cover[source if objective_function[source] <= objective_function[sink] else sink] = True
+
+    return cover
+
+
+def _add_conflict_constraints(lp, cf_graph, edge_ids, names=True):
+    """
+    Add the given evolutionary conflicts as constraints to the MILP
+    :param lp: MILP (see milp_backends)
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param edge_ids: array of the edge ids of the added conflicts
+    :param names: name the constraints by their conflicting mutation patterns
+    """
+
+    constraints, row_names = get_conflict_constraints(cf_graph, edge_ids=edge_ids, names=names)
+    lp.add_constraints(constraints, row_names)
+
+
+def get_conflict_constraints(cf_graph, edge_ids=None, names=True):
+    """
+    Each evolutionary conflict requires that at least one of its mutation patterns is in the vertex cover
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param edge_ids: array of the edge ids of the considered conflicts (None: all conflicts)
+    :param names: name the rows by their conflicting mutation patterns
+    :return: LHS (left hand side) of the rows in the ILP, names of the rows (constraints) or None
+    """
+
+    sources, sinks = cf_graph.sources, cf_graph.sinks
+    if edge_ids is not None:
+        sources, sinks = sources[edge_ids], sinks[edge_ids]
+
+    constraints = [[[source, sink], [1, 1]] for source, sink in zip(sources.tolist(), sinks.tolist())]
+    if not names:
+        return constraints, None
+
+    row_names = [str(cf_graph.nodes[source])+'-'+str(cf_graph.nodes[sink])
+                 for source, sink in zip(sources.tolist(), sinks.tolist())]
+
+    return constraints, row_names
+
+
+def bootstrapping_solving(cf_graph, mp_weights, idx_to_mp, no_samples, no_processes=1, solver='cplex'):
     """
     Generate and solve MILP of the down-sampled data-set and track the identified
     mutation pattern occurrences
     :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
-    :param mp_weights: 2-dimensional array with log probability that this variant has this mutation pattern
-    :param idx_to_mp: dictionary from mutation patterns to the column ids used in the mp_weights array
+    :param mp_weights: weight matrix (MPWeights) with log probability that this variant has this mutation pattern
+    :param idx_to_mp: list of the column ids used in the mp_weights matrix mapping to the mutation patterns
     :param no_samples: Number of samples with replacement for the bootstrapping
+    :param no_processes: number of processes solving the components in parallel
+    :param solver: name of the solver (cplex, highs, laminar or heuristic)
     :return: observed occurrences of mutation patterns
     """
 
     # record the chosen patterns in the down-sampled data set
     node_frequencies = Counter()
 
-    logger.debug('Build linear programs (cplex) for the robustness analysis through bootstrapping.')
-
-    # add column names to the ILP
-    ilp_col_names = []
-    ilp_col_mps = []
-    ilp_cols = dict()
-    for col_idx, node in enumerate(cf_graph.nodes_iter(), 0):
-        ilp_col_names.append(str(node))
-        ilp_cols[node] = col_idx
-        ilp_col_mps.append(node)
-
-    # column types
-    var_types = ['B' for _ in range(len(ilp_col_names))]
-
-    # add evolutionary constraints
-    constraints = []    # LHS (left hand side) of the rows in the ILP
-    row_names = []      # names of the rows (constraints)
-    for constraint_idx, (source, sink) in enumerate(cf_graph.edges_iter(), 1):
-        constraint = [[str(source), str(sink)], [1, 1]]
-        constraints.append(constraint)
-        row_names.append(str(source)+'-'+str(sink))
-
-        # logger.debug('Add constraint {}: {}'.format(constraint_idx, str(source)+'-'+str(sink)))
-
-    row_rhss = [1 for _ in range(len(constraints))]     # 1 is the RHS in all constraints
-    row_senses = ['G' for _ in range(len(constraints))]     # greater equal is used in all constraints
-    logger.debug('Generated {} constraints.'.format(len(constraints)))
-    logger.info('Do bootstrapping with {} samples.'.format(no_samples))
-
-    m = len(mp_weights)   # number of variants
-    for rep in range(no_samples):
+    logger.debug('Build linear programs ({}) for the robustness analysis through bootstrapping.'.format(solver))
 
-        # obtain sample of used variants
-        used_muts = np.random.choice(m, m, replace=True)
-        # the number of columns in the ILP is given by the number of nodes in the conflict graph
-        # weighting of the mutation patterns corresponds to the number of mutation which are conflicting
-        objective_function = np.zeros(cf_graph.order())
+    # the vertex cover is solved independently on each connected component of the conflict graph
+    components = cf_graph.components()
+    logger.debug('Generated {} constraints in {} components.'.format(cf_graph.size(), len(components)))
+    logger.info('Do bootstrapping with {} samples.'.format(no_samples))
 
-        # update objective function (mutation pattern scores)
-        # decrease objective function values according to the removed patterns
-        for used_mut in used_muts:
-            for col_idx, log_ml in mp_weights[used_mut].items():
-                # add the (negative log probability) part of the reliability score of this mutation in this pattern
-                # note we are in log space
-                objective_function[ilp_cols[idx_to_mp[col_idx]]] -= math.log(-math.expm1(log_ml))
+    # map the columns of the weight matrix to the columns in the ILP
+    mp_ilp_cols = np.array([cf_graph.node_ids[node] if node in cf_graph else -1 for node in idx_to_mp], dtype=int)
+    in_ilp = mp_ilp_cols >= 0
 
-        # logger.debug('Update objective function: ' + ', '.join(
-        #     '{}: {:.3f}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
+    # the MILP of each component is built once and reused by all replicates (only without a pool of workers)
+    model_series = new_model_series()
+    pool = _create_pool(no_processes, len(components))
+    try:
+        m = len(mp_weights)   # number of variants
+        for rep in range(no_samples):
 
-        # generate new MILP
-        lp = cp.Cplex()
-        # lp.set_error_stream(None)
-        # lp.set_warning_stream(None)
-        lp.set_results_stream(None)
-        lp.set_log_stream(None)
-        lp.variables.add(obj=objective_function, types=var_types, names=ilp_col_names)
-        lp.objective.set_sense(lp.objective.sense.minimize)
-        lp.linear_constraints.add(lin_expr=constraints, senses=row_senses, rhs=row_rhss, names=row_names)
+            # obtain sample of used variants
+            used_muts = np.random.choice(m, m, replace=True)
+            # the number of columns in the ILP is given by the number of nodes in the conflict graph
+            # weighting of the mutation patterns corresponds to the number of mutation which are conflicting
+            objective_function = np.zeros(cf_graph.order())
 
-        # solve the Integer Linear Program (ILP)
-        lp.solve()
-        sol = lp.solution       # obtain solution
-        # solve_stat = sol.get_status()
-        # logger.debug('Solution status: {}'.format(sol.status[solve_stat]))
+            # update objective function (mutation pattern scores)
+            # add the (negative log probability) part of the reliability score of each used mutation in each pattern
+            # note we are in log space
+            col_scores = mp_weights.column_scores(counts=np.bincount(used_muts, minlength=m))
+            np.add.at(objective_function, mp_ilp_cols[in_ilp], col_scores[:len(idx_to_mp)][in_ilp])
 
-        # proportional to incompatible mutations (depending on the weight definition)
-        # objective_value = sol.get_objective_value()
-        # logger.debug('Minimum vertex cover is of weight (objective value) {:.4f} (original weight: {:4f}).'
-        #               .format(objective_value, sum(val for val in objective_function)))
+            # logger.debug('Update objective function: ' + ', '.join(
+            #     '{}: {:.3f}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
 
-        # column solution values
-        # solution_values = sol.get_values()
-        # logger.debug('Column solution values: ' + ', '.join(
-        #     '{}: {}'.format(var_idx, status) for var_idx, status in enumerate(solution_values, 1)))
+            # solve the Integer Linear Programs (ILP) of the components
+            cover, _, _ = solve_components(cf_graph, components, objective_function, pool=pool,
+                                           no_processes=no_processes, quiet=True, solver=solver,
+                                           model_series=model_series)
 
-        solution_values = sol.get_values()
-        for ilp_col_idx, val in enumerate(solution_values):
-            if round(val, 5) == 0:
-                node_frequencies[ilp_col_mps[ilp_col_idx]] += 1
+            for node_id in np.flatnonzero(~cover).tolist():
+                node_frequencies[cf_graph.nodes[node_id]] += 1
 
-        if no_samples >= 100 and rep > 0 and rep % (no_samples/100) == 0:
-            logger.debug('{:.0%} of bootstrapping completed.'.format(1.0*rep/no_samples))
+            if no_samples >= 100 and rep > 0 and rep % (no_samples/100) == 0:
+                logger.debug('{:.0%} of bootstrapping completed.'.format(1.0*rep/no_samples))
+    finally:
+        if pool is not None:
+            pool.terminate()
+        release_models(model_series)
 
     logger.debug('Finished bootstrapping.')
 
     return node_frequencies
 
 
-def solve_downsampled_nodes(cf_graph, mp_weights, col_ids_mp, no_replications):
+def solve_downsampled_nodes(cf_graph, mp_weights, idx_to_mp, no_replications, no_processes=1, solver='cplex'):
     """
     Generate and solve MILP of the down-sampled data-set and track the identified
     mutation pattern occurrences
     :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
-    :param mp_weights: 2-dimensional array with log probability that this variant has this mutation pattern
-    :param col_ids_mp: dictionary from mutation patterns to the column ids used in the mp_weights array
+    :param mp_weights: weight matrix (MPWeights) with log probability that this variant has this mutation pattern
+    :param idx_to_mp: list of the column ids used in the mp_weights matrix mapping to the mutation patterns
     :param no_replications: Number of replications per used fraction of variants
+    :param no_processes: number of processes solving the components in parallel
+    :param solver: name of the solver (cplex, highs, laminar or heuristic)
     :return: observed occurrences of mutation patterns per variant fraction
     """
 
     # record the chosen patterns in the down-sampled data set
     node_frequencies = defaultdict(Counter)
 
-    logger.debug('Build linear programs (cplex) for the robustness analysis through down-sampling.')
+    logger.debug('Build linear programs ({}) for the robustness analysis through down-sampling.'.format(solver))
 
     # the number of columns in the ILP is given by the number of nodes in the conflict graph
     # weighting of the mutation patterns corresponds to the number of mutation which are conflicting
-    objective_function = []
-
-    # add column names to the ILP
-    var_names = []
-    for col_idx, mp in sorted(col_ids_mp.items(), key=lambda k: k[0]):
-        var_names.append(str(mp))
-        objective_function.append(cf_graph.node[mp]['weight'])
+    objective_function = cf_graph.weights
 
     logger.debug('Objective function: ' + ', '.join(
         '{}: {:.3f}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
 
-    # column types
-    var_types = ['B' for _ in range(len(objective_function))]
+    # the vertex cover is solved independently on each connected component of the conflict graph
+    components = cf_graph.components()
+    logger.debug('Generated {} constraints in {} components.'.format(cf_graph.size(), len(components)))
 
-    # add evolutionary constraints
-    constraints = []    # LHS (left hand side) of the rows in the ILP
-    row_names = []      # names of the rows (constraints)
-    for constraint_idx, (source, sink) in enumerate(cf_graph.edges_iter(), 1):
-        constraint = [[str(source), str(sink)], [1, 1]]
-        constraints.append(constraint)
-        row_names.append(str(source)+'-'+str(sink))
+    # map the columns of the weight matrix to the columns in the ILP
+    mp_ilp_cols = np.array([cf_graph.node_ids[node] if node in cf_graph else -1 for node in idx_to_mp], dtype=int)
+    in_ilp = mp_ilp_cols >= 0
 
-        # logger.debug('Add constraint {}: {}'.format(constraint_idx, str(source)+'-'+str(sink)))
+    # the MILP of each component is built once and reused by all replicates (only without a pool of workers)
+    model_series = new_model_series()
+    pool = _create_pool(no_processes, len(components))
+    try:
+        mut_ids = [i for i in range(len(mp_weights))]
+        for removed_fraction in range(90, 0, -10):
+            for rep in range(no_replications):
 
-    row_rhss = [1 for _ in range(len(constraints))]     # 1 is the RHS in all constraints
-    row_senses = ['G' for _ in range(len(constraints))]     # greater equal is used in all constraints
-    logger.debug('Generated {} constraints.'.format(len(constraints)))
+                # obtain sample of used shared mutations
+                removed_muts = sample(mut_ids, int(round(0.01*removed_fraction*len(mut_ids))))
 
-    mut_ids = [i for i in range(len(mp_weights))]
-    for removed_fraction in range(90, 0, -10):
-        for rep in range(no_replications):
-
-            # obtain sample of used shared mutations
-            removed_muts = sample(mut_ids, int(round(0.01*removed_fraction*len(mut_ids))))
+                # update objective function (mutation pattern scores)
+                # detract the part of the reliability score of the removed mutations in each pattern
+                # note we are in log space
+                removed_scores = mp_weights.column_scores(counts=np.bincount(removed_muts, minlength=len(mut_ids)))
+                sampled_obj_func = objective_function.copy()
+                np.subtract.at(sampled_obj_func, mp_ilp_cols[in_ilp], removed_scores[:len(idx_to_mp)][in_ilp])
 
-            # update objective function (mutation pattern scores)
-            # decrease objective function values according to the removed patterns
-            for col_idx, mp in sorted(col_ids_mp.items(), key=lambda k: k[0]):
-                for removed_mut in removed_muts:
-                    # detract the part of the reliability score of this mutation in this pattern
-                    # note we are in log space
-                    objective_function[col_idx] += math.log(-math.expm1(mp_weights[removed_mut][col_idx]))
+                # logger.debug('Update objective function: ' + ', '.join(
+                #     '{}: {:.3f}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
 
-            # logger.debug('Update objective function: ' + ', '.join(
-            #     '{}: {:.3f}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
+                # solve the Integer Linear Programs (ILP) of the components
+                cover, _, _ = solve_components(cf_graph, components, sampled_obj_func, pool=pool,
+                                               no_processes=no_processes, quiet=True, solver=solver,
+                                               model_series=model_series)
 
-            # generate new MILP
-            lp = cp.Cplex()
-            # lp.set_error_stream(None)
-            # lp.set_warning_stream(None)
-            lp.set_results_stream(None)
-            lp.set_log_stream(None)
-            lp.variables.add(obj=objective_function, types=var_types, names=var_names)
-            lp.objective.set_sense(lp.objective.sense.minimize)
-            lp.linear_constraints.add(lin_expr=constraints, senses=row_senses, rhs=row_rhss, names=row_names)
-
-            # solve the Integer Linear Program (ILP)
-            lp.solve()
-            sol = lp.solution       # obtain solution
-            # solve_stat = sol.get_status()
-            # logger.debug('Solution status: {}'.format(sol.status[solve_stat]))
-
-            # proportional to incompatible mutations (depending on the weight definition)
-            # objective_value = sol.get_objective_value()
-            # logger.debug('Minimum vertex cover is of weight (objective value) {:.4f} (original weight: {:4f}).'
-            #               .format(objective_value, sum(val for val in objective_function)))
-
-            # column solution values
-            # solution_values = sol.get_values()
-            # logger.debug('Column solution values: ' + ', '.join(
-            #     '{}: {}'.format(var_idx, status) for var_idx, status in enumerate(solution_values, 1)))
-
-            solution_values = sol.get_values()
-            for col_idx, val in enumerate(solution_values):
-                if round(val, 5) == 0:
-                    node_frequencies[100-removed_fraction][col_ids_mp[col_idx]] += 1
-
-            # increase objective function values according to the removed values to its original value
-            for col_idx, mp in sorted(col_ids_mp.items(), key=lambda k: k[0]):
-                for removed_mut in removed_muts:
-                    # detract the part of the reliability score of this mutation in this pattern
-                    # note we are in log space
-                    objective_function[col_idx] -= math.log(-math.expm1(mp_weights[removed_mut][col_idx]))
+                for node_id in np.flatnonzero(~cover).tolist():
+                    node_frequencies[100-removed_fraction][cf_graph.nodes[node_id]] += 1
 
-        logger.debug('Finished sampling and solving {:.0%} used fraction of variants.'.format(0.01*removed_fraction))
+            logger.debug('Finished sampling and solving {:.0%} used fraction of variants.'.format(
+                0.01*removed_fraction))
+    finally:
+        if pool is not None:
+            pool.terminate()
+        release_models(model_series)
 
     return node_frequencies
 
 
-def solve_downsampled_binary_nodes(cf_graph, mut_pattern_scores, shared_mutations, no_replications, no_samples):
+def solve_downsampled_binary_nodes(cf_graph, mut_pattern_scores, shared_mutations, no_replications, no_samples,
+                                   no_processes=1, solver='cplex'):
     """
     Generate and solve MILP of the down-sampled data-set and track the identified
     mutation pattern occurrences when each variant has exactly one mutation pattern
@@ -339,104 +628,71 @@ def solve_downsampled_binary_nodes(cf_graph, mut_pattern_scores, shared_mutation
     :param shared_mutations: List of the shared (parsimony-informative) mutations (mut_idx)
     :param no_replications: Number of replications per used fraction of variants
     :param no_samples: number of samples
+    :param no_processes: number of processes solving the components in parallel
+    :param solver: name of the solver (cplex, highs, laminar or heuristic)
     :return: observed occurrences of mutation patterns per variant fraction
     """
 
     # record the chosen patterns in the down-sampled data set
     node_frequencies = defaultdict(Counter)
 
-    logger.debug('Build linear programs (cplex) for the robustness analysis through down-sampling.')
+    logger.debug('Build linear programs ({}) for the robustness analysis through down-sampling.'.format(solver))
 
     # the number of columns in the ILP is given by the number of nodes in the conflict graph
     # weighting of the mutation patterns corresponds to the number of mutation which are conflicting
-    objective_function = []
+    objective_function = cf_graph.weights.copy()
 
     # build index from mutations to patterns
     mutations = dict()
-
-    # add column names to the ILP
-    var_names = []
-    node_indices = dict()   # map nodes (mutation patterns) to column id in the ILP
-    for col_idx, (node, data) in enumerate(cf_graph.nodes_iter(data=True), 0):
-
-        var_names.append(str(node))
-        objective_function.append(data['weight'])
+    for col_idx, node in enumerate(cf_graph.nodes):
         # nodes are given by a frozenset of samples (mutation patterns)
-        node_indices[node] = col_idx
-        for mut_idx in data['muts']:
-            mutations[mut_idx] = node
+        for mut_idx in cf_graph.mutations[node]:
+            mutations[mut_idx] = col_idx
 
     logger.debug('Objective function: ' + ', '.join(
         '{}: {:.3f}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
 
-    # column types
-    var_types = ['B' for _ in range(len(objective_function))]
+    # the vertex cover is solved independently on each connected component of the conflict graph
+    components = cf_graph.components()
+    logger.debug('Generated {} constraints in {} components.'.format(cf_graph.size(), len(components)))
 
-    # add evolutionary constraints
-    constraints = []    # LHS (left hand side) of the rows in the ILP
-    row_names = []      # names of the rows (constraints)
-    for constraint_idx, (source, sink) in enumerate(cf_graph.edges_iter(), 1):
-        constraint = [[str(source), str(sink)], [1, 1]]
-        constraints.append(constraint)
-        row_names.append(str(source)+'-'+str(sink))
+    # the MILP of each component is built once and reused by all replicates (only without a pool of workers)
+    model_series = new_model_series()
+    pool = _create_pool(no_processes, len(components))
+    try:
+        for removed_fraction in range(95, 0, -5):
+            for rep in range(no_replications):
 
-        # logger.debug('Add constraint {}: {}'.format(constraint_idx, str(source)+'-'+str(sink)))
+                # obtain sample of used shared mutations
+                removed_muts = sample(shared_mutations, int(round(0.01*removed_fraction*len(shared_mutations))))
 
-    row_rhss = [1 for _ in range(len(constraints))]     # 1 is the RHS in all constraints
-    row_senses = ['G' for _ in range(len(constraints))]     # greater equal is used in all constraints
-    logger.debug('Generated {} constraints.'.format(len(constraints)))
+                # update objective function (mutation pattern scores)
+                # decrease objective function values according to the removed patterns
+                for removed_mut in removed_muts:
+                    objective_function[mutations[removed_mut]] -= mut_pattern_scores[removed_mut]
 
-    for removed_fraction in range(95, 0, -5):
-        for rep in range(no_replications):
+                # logger.debug('Update objective function: ' + ', '.join(
+                #     '{}: {:.3f}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
 
-            # obtain sample of used shared mutations
-            removed_muts = sample(shared_mutations, int(round(0.01*removed_fraction*len(shared_mutations))))
+                # solve the Integer Linear Programs (ILP) of the components
+                cover, _, _ = solve_components(cf_graph, components, objective_function, pool=pool,
+                                               no_processes=no_processes, quiet=True, solver=solver,
+                                               model_series=model_series)
 
-            # update objective function (mutation pattern scores)
-            # decrease objective function values according to the removed patterns
-            updated_nodes = set()
-            for removed_mut in removed_muts:
-                updated_nodes.add(mutations[removed_mut])
-                objective_function[node_indices[mutations[removed_mut]]] -= mut_pattern_scores[removed_mut]
+                for node_id in np.flatnonzero(~cover).tolist():
+                    node = cf_graph.nodes[node_id]
+                    if 1 < len(node) < no_samples:
+                        node_frequencies[100-removed_fraction][node] += 1
 
-            # logger.debug('Update objective function: ' + ', '.join(
-            #     '{}: {:.3f}'.format(var_idx, weight) for var_idx, weight in enumerate(objective_function, 1)))
-
-            # generate new MILP
-            lp = cp.Cplex()
-            # lp.set_error_stream(None)
-            # lp.set_warning_stream(None)
-            lp.set_results_stream(None)
-            lp.set_log_stream(None)
-            lp.variables.add(obj=objective_function,
-                             types=var_types, names=var_names)
-            lp.objective.set_sense(lp.objective.sense.minimize)
-            lp.linear_constraints.add(lin_expr=constraints, senses=row_senses, rhs=row_rhss, names=row_names)
-
-            # solve the Integer Linear Program (ILP)
-            lp.solve()
-            sol = lp.solution       # obtain solution
-            # solve_stat = sol.get_status()
-            # logger.debug('Solution status: {}'.format(sol.status[solve_stat]))
-
-            # proportional to incompatible mutations (depending on the weight definition)
-            # objective_value = sol.get_objective_value()
-            # logger.debug('Minimum vertex cover is of weight (objective value) {:.4f} (original weight: {:4f}).'
-            #               .format(objective_value, sum(val for val in objective_function)))
-
-            # column solution values
-            # solution_values = sol.get_values()
-            # logger.debug('Column solution values: ' + ', '.join(
-            #     '{}: {}'.format(var_idx, status) for var_idx, status in enumerate(solution_values, 1)))
-
-            for node in cf_graph.nodes_iter():
-                if round(sol.get_values(str(node)), 5) == 0 and 1 < len(node) < no_samples:
-                    node_frequencies[100-removed_fraction][node] += 1
-
-            # increase objective function values again to the initial values
-            for removed_mut in removed_muts:
-                objective_function[node_indices[mutations[removed_mut]]] += mut_pattern_scores[removed_mut]
-
-        logger.debug('Finished sampling and solving {:.0%} used fraction of variants.'.format(0.01*removed_fraction))
+                # increase objective function values again to the initial values
+                for removed_mut in removed_muts:
+                    objective_function[mutations[removed_mut]] += mut_pattern_scores[removed_mut]
+
+            logger.debug('Finished sampling and solving {:.0%} used fraction of variants.'.format(
+                0.01*removed_fraction))
+    finally:
+        if pool is not None:
+            pool.terminate()
+        release_models(model_series)
 
     return node_frequencies
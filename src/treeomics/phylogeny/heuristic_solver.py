@@ -0,0 +1,201 @@
+#!/usr/bin/python
+"""Anytime heuristic for the maximum weight set of compatible mutation patterns with upper bounds on its weight"""
+import logging
+import time
+from collections import Counter
+import numpy as np
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+# minimal relative improvement of a local search move
+MIN_IMPROVEMENT = 1e-12
+
+
+def solve_heuristic(cf_graph, objective_function, time_limit=None, start=None):
+    """
+    Find a heavy independent set (compatible mutation patterns) in the conflict graph by greedy construction followed
+    by local search; the complementary vertex cover is returned
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param objective_function: array with the weight of each node
+    :param time_limit: time limit for the local search in seconds (None: until no move improves the solution)
+    :param start: boolean array of the nodes in a vertex cover used as start solution
+    :return: boolean array of the nodes in the vertex cover
+    """
+
+    start_time = time.time()
+    selected = greedy_independent_set(cf_graph, objective_function)
+    if start is not None and np.dot(objective_function, ~start) > np.dot(objective_function, selected):
+        # the given solution is better than the greedy solution
+        selected = ~start
+
+    if time_limit is not None:
+        time_limit = max(time_limit - (time.time() - start_time), 0.0)
+    selected = improve_independent_set(cf_graph, objective_function, selected, time_limit=time_limit)
+
+    return ~selected
+
+
+def greedy_independent_set(cf_graph, objective_function):
+    """
+    Select the nodes in decreasing order of their weight divided by their number of conflicts plus one whenever
+    none of their neighbors has been selected before (GWMIN)
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param objective_function: array with the weight of each node
+    :return: boolean array of the selected nodes (independent set)
+    """
+
+    indptr = cf_graph.indptr.tolist()
+    indices = cf_graph.indices.tolist()
+
+    selected = np.zeros(cf_graph.order(), dtype=bool)
+    blocked = np.zeros(cf_graph.order(), dtype=bool)
+    ratios = objective_function / (cf_graph.degrees() + 1.0)
+    for node_id in np.argsort(-ratios, kind='mergesort').tolist():
+        if not blocked[node_id] and objective_function[node_id] > 0:
+            selected[node_id] = True
+            blocked[indices[indptr[node_id]:indptr[node_id+1]]] = True
+
+    return selected
+
+
+def improve_independent_set(cf_graph, objective_function, selected, time_limit=None):
+    """
+    Local search on an independent set with two moves until no move improves the solution or the time limit is hit:
+    (k,1)-swap: insert a node and remove its selected neighbors if it is heavier than them;
+    (1,k)-exchange: remove a selected node and insert a (greedily chosen) independent set of its neighbors
+    which are in conflict with no other selected node if they are heavier than the removed node
+    (e.g. (1,2)-exchange for two non-conflicting neighbors)
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param objective_function: array with the weight of each node
+    :param selected: boolean array of the nodes in the initial independent set
+    :param time_limit: time limit in seconds (None: no limit)
+    :return: boolean array of the selected nodes (independent set)
+    """
+
+    start_time = time.time()
+    indptr = cf_graph.indptr.tolist()
+    indices = cf_graph.indices.tolist()
+    weights = objective_function.tolist()
+    selected = selected.tolist()
+    neighbors = [indices[indptr[node_id]:indptr[node_id+1]] for node_id in range(cf_graph.order())]
+
+    # number and weight of the selected neighbors of each node
+    tightness = [0 for _ in range(cf_graph.order())]
+    blocking_weight = [0.0 for _ in range(cf_graph.order())]
+
+    def insert(node_id):
+        selected[node_id] = True
+        for neighbor in neighbors[node_id]:
+            tightness[neighbor] += 1
+            blocking_weight[neighbor] += weights[node_id]
+
+    def remove(node_id):
+        selected[node_id] = False
+        for neighbor in neighbors[node_id]:
+            tightness[neighbor] -= 1
+            # avoid the accumulation of rounding errors
+            blocking_weight[neighbor] = blocking_weight[neighbor] - weights[node_id] if tightness[neighbor] else 0.0
+
+    for node_id in range(cf_graph.order()):
+        if selected[node_id]:
+            selected[node_id] = False
+            insert(node_id)
+
+    order = np.argsort(-objective_function, kind='mergesort').tolist()
+    no_passes = no_moves = 0
+    improved = True
+    while improved:
+        improved = False
+        no_passes += 1
+        for node_id in order:
+            if time_limit is not None and time.time() - start_time > time_limit:
+                logger.debug('Time limit reached during local search after {} moves.'.format(no_moves))
+                return np.array(selected, dtype=bool)
+
+            if not selected[node_id]:
+                # (k,1)-swap
+                if weights[node_id] > 0 and weights[node_id] > blocking_weight[node_id] * (1.0 + MIN_IMPROVEMENT):
+                    for neighbor in neighbors[node_id]:
+                        if selected[neighbor]:
+                            remove(neighbor)
+                    insert(node_id)
+                    improved = True
+                    no_moves += 1
+
+            else:
+                # (1,k)-exchange among the neighbors which are only in conflict with this node
+                candidates = [neighbor for neighbor in neighbors[node_id]
+                              if tightness[neighbor] == 1 and weights[neighbor] > 0]
+                if len(candidates) < 2:
+                    continue        # a single candidate is covered by the (k,1)-swap
+                candidates.sort(key=lambda neighbor: -weights[neighbor])
+                exchange = []
+                blocked = set()
+                for neighbor in candidates:
+                    if neighbor not in blocked:
+                        exchange.append(neighbor)
+                        blocked.update(neighbors[neighbor])
+                if sum(weights[neighbor] for neighbor in exchange) > weights[node_id] * (1.0 + MIN_IMPROVEMENT):
+                    remove(node_id)
+                    for neighbor in exchange:
+                        insert(neighbor)
+                    improved = True
+                    no_moves += 1
+
+    logger.debug('Local search converged after {} moves in {} passes.'.format(no_moves, no_passes))
+
+    return np.array(selected, dtype=bool)
+
+
+def get_upper_bound(cf_graph, objective_function):
+    """
+    Upper bound on the weight of any independent set (compatible mutation patterns) given by a greedy clique cover;
+    the cover is a feasible solution of the dual of the LP relaxation of the maximum weight independent set with
+    a constraint for each clique of pairwise conflicting patterns
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param objective_function: array with the weight of each node
+    :return: upper bound
+    """
+
+    return get_clique_cover_bound(cf_graph, np.maximum(objective_function, 0.0))
+
+
+def get_clique_cover_bound(cf_graph, objective_function):
+    """
+    Cover the nodes greedily by cliques (pairwise conflicting patterns) in decreasing order of their weight;
+    any independent set contains at most one node of each clique and hence the sum of the heaviest node of each
+    clique is an upper bound
+    :param cf_graph: Conflict graph: nodes correspond to mutation patterns and edges to their conflicts
+    :param objective_function: array with the non-negative weight of each node
+    :return: upper bound on the maximum weight independent set
+    """
+
+    indptr = cf_graph.indptr.tolist()
+    indices = cf_graph.indices.tolist()
+    weights = objective_function.tolist()
+
+    cliques = [-1 for _ in range(cf_graph.order())]
+    clique_sizes = []
+    bound = 0.0
+    for node_id in np.argsort(-objective_function, kind='mergesort').tolist():
+        # a node can join a clique if all its members are neighbors of the node
+        neighbor_cliques = Counter(cliques[neighbor] for neighbor in indices[indptr[node_id]:indptr[node_id+1]]
+                                   if cliques[neighbor] >= 0)
+        clique = -1
+        for neighbor_clique, no_neighbors in neighbor_cliques.items():
+            if no_neighbors == clique_sizes[neighbor_clique] and (
+                    clique < 0 or clique_sizes[neighbor_clique] > clique_sizes[clique]):
+                clique = neighbor_clique
+
+        if clique < 0:
+            # the first node of each clique is its heaviest node
+            clique = len(clique_sizes)
+            clique_sizes.append(0)
+            bound += weights[node_id]
+        cliques[node_id] = clique
+        clique_sizes[clique] += 1
+
+    return bound
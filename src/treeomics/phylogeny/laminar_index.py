@@ -0,0 +1,148 @@
+#!/usr/bin/python
+"""Subset and superset queries on a laminar family of mutation patterns (e.g. evolutionarily compatible patterns)"""
+import logging
+from collections import defaultdict
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+
+class LaminarIndex(object):
+    """
+    Any two patterns of a laminar family are either disjoint or one contains the other; hence the patterns form a
+    forest (Hasse diagram) where the parent of each pattern is its smallest proper superset; queries descend from the
+    roots on integer bitmasks and only visit the children of the patterns that overlap with the queried pattern
+    """
+
+    def __init__(self, patterns):
+        """
+        Build index
+        :param patterns: iterable of evolutionarily compatible mutation patterns (frozensets of sample indices)
+        """
+
+        # the empty pattern is a subset of all patterns and is kept apart from the forest
+        self.contains_empty = False
+        self.masks = dict()
+        self.parents = dict()
+        self.children = defaultdict(list)       # roots are the children of None
+
+        # supersets are inserted before their subsets
+        for pattern in sorted(patterns, key=lambda p: -len(p)):
+            if len(pattern) == 0:
+                self.contains_empty = True
+                continue
+
+            mask = get_bitmask(pattern)
+            parent = self._find_smallest_superset(mask)
+            self.masks[pattern] = mask
+            self.parents[pattern] = parent
+            self.children[parent].append(pattern)
+
+    def __contains__(self, pattern):
+        return pattern in self.masks or (len(pattern) == 0 and self.contains_empty)
+
+    def __len__(self):
+        return len(self.masks) + (1 if self.contains_empty else 0)
+
+    def _find_smallest_superset(self, mask):
+        """
+        :param mask: bitmask of a non-empty pattern
+        :return: smallest pattern in the index containing the given pattern or None
+        """
+
+        node = None
+        while True:
+            # children of a pattern are disjoint and hence at most one can contain the given pattern
+            for child in self.children[node]:
+                if mask & ~self.masks[child] == 0:
+                    node = child
+                    break
+            else:
+                return node
+
+    def parent(self, pattern):
+        """
+        :param pattern: mutation pattern in the index
+        :return: smallest proper superset of the given pattern in the index or None
+        """
+
+        return self.parents[pattern]
+
+    def supersets(self, pattern):
+        """
+        :param pattern: any mutation pattern
+        :return: list of the patterns in the index containing the given pattern (including itself), largest first
+        """
+
+        if len(pattern) == 0:
+            return ([frozenset()] if self.contains_empty else []) + list(self.masks.keys())
+
+        mask = get_bitmask(pattern)
+        chain = []
+        node = None
+        while True:
+            for child in self.children[node]:
+                if mask & ~self.masks[child] == 0:
+                    chain.append(child)
+                    node = child
+                    break
+            else:
+                return chain
+
+    def subsets(self, pattern):
+        """
+        :param pattern: any mutation pattern
+        :return: list of the patterns in the index contained in the given pattern (including itself)
+        """
+
+        mask = get_bitmask(pattern)
+        found = [frozenset()] if self.contains_empty else []
+        stack = list(self.children[None])
+        while len(stack):
+            node = stack.pop()
+            node_mask = self.masks[node]
+            if node_mask & ~mask == 0:
+                # all patterns in the subtree of a contained pattern are contained
+                found.extend(self.descendants(node))
+            elif node_mask & mask:
+                stack.extend(self.children[node])
+
+        return found
+
+    def descendants(self, pattern):
+        """
+        :param pattern: mutation pattern in the index
+        :return: list of the given pattern and all its subsets in the index (parents before their children)
+        """
+
+        found = [pattern]
+        idx = 0
+        while idx < len(found):
+            found.extend(self.children[found[idx]])
+            idx += 1
+
+        return found
+
+    def top_down(self):
+        """
+        :return: generator of the non-empty patterns where each pattern follows its superset (level order)
+        """
+
+        for root in self.children[None]:
+            for pattern in self.descendants(root):
+                yield pattern
+
+
+def get_bitmask(pattern):
+    """
+    :param pattern: mutation pattern (set of sample indices)
+    :return: integer where bit s is set if the pattern is present in sample s
+    """
+
+    mask = 0
+    for sa_idx in pattern:
+        mask |= 1 << sa_idx
+
+    return mask
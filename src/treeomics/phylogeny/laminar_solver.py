@@ -0,0 +1,93 @@
+#!/usr/bin/python
+"""Find the maximum weight set of evolutionarily compatible mutation patterns by dynamic programming (without MILP)"""
+import logging
+from collections import defaultdict
+import numpy as np
+import utils.int_settings as def_sets
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+
+def solve_max_laminar_family(patterns, weights):
+    """
+    Mutation patterns are evolutionarily compatible iff they form a laminar family (any two patterns are either
+    disjoint or one contains the other). Let F(S) be the maximum weight of a laminar family of patterns contained in
+    the set of samples S and let i be the lowest sample in S: either no selected pattern contains i (F(S - {i})) or
+    the largest selected pattern T containing i splits S into the independent parts T and S - T (F(T) + F(S - T)).
+    Every pattern T contains all selected patterns within T and hence F(T) includes the positive weight of T.
+    Only the sets of samples reachable by this recursion from the union of all patterns are evaluated; at most 3^k
+    pairs of sets and patterns are compared for k samples
+    :param patterns: list of distinct non-empty mutation patterns (frozensets of sample indices)
+    :param weights: array with the weight of each pattern
+    :return: boolean array of the patterns in the maximum weight compatible set
+    """
+
+    samples = sorted(set(sa_idx for pattern in patterns for sa_idx in pattern))
+    if len(samples) > def_sets.LAMINAR_MAX_SAMPLES:
+        raise RuntimeError('Exact combinatorial solver is limited to mutation patterns over at most {} samples '
+                           '({} given)! Use a MILP solver instead.'.format(def_sets.LAMINAR_MAX_SAMPLES, len(samples)))
+
+    # map samples to the bits of the set masks
+    bits = dict((sa_idx, 1 << bit) for bit, sa_idx in enumerate(samples))
+    masks = [sum(bits[sa_idx] for sa_idx in pattern) for pattern in patterns]
+
+    # patterns without positive weight are never selected
+    pattern_weights = dict()
+    by_lowest = defaultdict(list)
+    for mask, weight in zip(masks, np.asarray(weights, dtype=np.float64).tolist()):
+        if weight > 0:
+            pattern_weights[mask] = weight
+            by_lowest[mask & -mask].append(mask)
+
+    # maximum weight F(S) and the largest selected pattern containing the lowest sample of S (0: none)
+    best = {0: 0.0}
+    choices = dict()
+
+    def family_weight(sample_set):
+        """
+        :param sample_set: bitmask of the set of samples S
+        :return: F(S)
+        """
+
+        if sample_set in best:
+            return best[sample_set]
+
+        lowest = sample_set & -sample_set
+        value = family_weight(sample_set ^ lowest)
+        choice = 0
+        for mask in by_lowest[lowest]:
+            if mask != sample_set and mask & ~sample_set == 0:
+                candidate = family_weight(mask) + family_weight(sample_set & ~mask)
+                if candidate > value:
+                    value = candidate
+                    choice = mask
+
+        best[sample_set] = value + pattern_weights.get(sample_set, 0.0)
+        choices[sample_set] = choice
+
+        return best[sample_set]
+
+    universe = sum(bits.values())
+    family_weight(universe)
+    logger.debug('Evaluated {} sets of samples to find the maximum weight laminar family among {} patterns.'.format(
+        len(best), len(patterns)))
+
+    # trace back the selected patterns
+    selected_masks = set()
+    sample_sets = [universe]
+    while len(sample_sets):
+        sample_set = sample_sets.pop()
+        if sample_set == 0:
+            continue
+        if sample_set in pattern_weights:
+            selected_masks.add(sample_set)
+        choice = choices[sample_set]
+        if choice == 0:
+            sample_sets.append(sample_set ^ (sample_set & -sample_set))
+        else:
+            sample_sets.extend((choice, sample_set & ~choice))
+
+    return np.array([mask in selected_masks for mask in masks], dtype=bool)
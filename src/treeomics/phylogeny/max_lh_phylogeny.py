@@ -3,16 +3,20 @@
 import logging
 import itertools
 import math
+import time
 from scipy.stats import binom
-from collections import defaultdict
+from collections import defaultdict, Counter
 from itertools import combinations
-import heapq
 import numpy as np
-import networkx as nx
 import sys
 from copy import deepcopy
 import phylogeny.cplex_solver as cps
-from phylogeny.phylogeny_utils import Phylogeny
+import phylogeny.mp_likelihoods as mpl
+from phylogeny.mp_weights import MPWeights
+from phylogeny.conflict_graph import ConflictGraph
+from phylogeny.laminar_index import LaminarIndex
+from phylogeny.conflict_lattice import load_lattice_conflicts, filter_lattice_conflicts
+from phylogeny.phylogeny_utils import Phylogeny, get_conflict_edges
 from utils.statistics import get_log_p0
 import utils.int_settings as def_sets
 
@@ -37,10 +41,32 @@ class MaxLHPhylogeny(Phylogeny):
         self.idx_to_mp = None
         # dictionary from mutation patterns to the above column ids
         self.mp_col_ids = None
-        # list of dictionaries [mut_idx, mp_col_idx]
+        # weight matrix [mut_idx, mp_col_idx] (see MPWeights)
         self.mp_weights = None
+        # reliability scores summed over all processed variants before their normalization
+        self.raw_node_scores = None
+        # explored solution space and subclone detection setting of the inferred tree
+        self.max_no_mps = None
+        self.mp_mass = None
+        self.column_generation = False
+        self.subclone_detection = False
+        # evolutionary conflicts are added to the MILP only once they are violated
+        self.lazy_constraints = False
+        # directory of the cached evolutionary conflicts among all mutation patterns
+        self.lattice_cache = None
+        self.no_processes = 1
+        # name of the solver (cplex, highs, laminar or heuristic)
+        self.solver = 'cplex'
+        # patterns with negligible reliability scores are excluded from the conflict graph and the MILP
+        self.min_pattern_score = None
+        self.min_rel_pattern_score = None
+        self.pruned_nodes = set()
+        # maximal error in the objective value of the MILP caused by the excluded patterns
+        self.pruning_error = 0.0
         # map from identified putative subclones to their original sample
         self.sc_sample_ids = None
+        # superset queries on the compatible mutation patterns during the detection of subclones
+        self.compatible_index = None
 
         # most likely but also compatible mutation pattern for each variant
         self.max_lh_nodes = None
@@ -76,9 +102,10 @@ class MaxLHPhylogeny(Phylogeny):
         pres_lp = math.log(0.5)
         lh = 1.0
         for sa_idx, sample_name in enumerate(patient.sample_names):
+            median_coverage = patient.sample_summary.median_coverages[sample_name]
             # calculate posterior according to prior, estimated purity and data
             for k in range(5000):
-                _, p1 = get_log_p0(np.median(patient.sample_coverages[sample_name]), k, self.patient.bi_error_rate,
+                _, p1 = get_log_p0(median_coverage, k, self.patient.bi_error_rate,
                                    self.patient.bi_c0, cutoff_f=self.patient.get_cutoff_frequency(sample_name),
                                    pseudo_alpha=def_sets.PSEUDO_ALPHA, pseudo_beta=patient.betas[sample_name])
                 if p1 > pres_lp:
@@ -87,16 +114,16 @@ class MaxLHPhylogeny(Phylogeny):
 
             logger.debug('{}: Minimum number of mutant reads such that presence probability is greater than 50%: {}.'
                          .format(sample_name, k_mins[-1]))
-            called_ps.append(1.0 - binom.cdf(k_mins[-1]-1, int(np.median(patient.sample_coverages[sample_name])),
+            called_ps.append(1.0 - binom.cdf(k_mins[-1]-1, int(median_coverage),
                                              self.patient.bi_error_rate))
             logger.debug('Probability to observe an incorrectly called variant: {:.3%}'.format(called_ps[-1]))
 
             if sample_name in patient.estimated_purities:
-                missed_ps.append(binom.cdf(k_mins[-1]-1, int(np.median(patient.sample_coverages[sample_name])),
+                missed_ps.append(binom.cdf(k_mins[-1]-1, int(median_coverage),
                                            self.patient.estimated_purities[sample_name] / 2.0))
             else:
-                missed_ps.append(binom.cdf(k_mins[-1]-1, int(np.median(patient.sample_coverages[sample_name])),
-                                           np.median(self.patient.sample_mafs[sample_name])))
+                missed_ps.append(binom.cdf(k_mins[-1]-1, int(median_coverage),
+                                           patient.sample_summary.median_mafs[sample_name]))
             logger.debug('Probability to miss a clonal variant: {:.1e}'.format(missed_ps[-1]))
 
             # probability that all calls are correct
@@ -126,7 +153,9 @@ class MaxLHPhylogeny(Phylogeny):
         logger.debug('Reliability score of a pattern with 99.99% certainty in each call: {:.3e}'.format(
             -math.log(1.0 - lh_9999)))
 
-    def infer_max_lh_tree(self, subclone_detection=False, no_bootstrap_samples=0, max_no_mps=None, time_limit=None):
+    def infer_max_lh_tree(self, subclone_detection=False, no_bootstrap_samples=0, max_no_mps=None, time_limit=None,
+                          min_pattern_score=None, min_rel_pattern_score=None, no_processes=1, mp_mass=None,
+                          column_generation=False, lazy_constraints=False, lattice_cache=None, solver='cplex'):
         """
         Infer maximum likelihood tree via calculation reliability scores for each
         possible mutation pattern from the likelihood that no variant has this pattern
@@ -137,6 +166,18 @@ class MaxLHPhylogeny(Phylogeny):
             is explored per variant
         :param no_bootstrap_samples: number of samples with replacement for the bootstrapping
         :param time_limit: time limit for MILP solver in seconds
+        :param min_pattern_score: mutation patterns with a lower reliability score are excluded from the MILP
+        :param min_rel_pattern_score: mutation patterns with a lower reliability score relative to the highest score
+            are excluded from the MILP
+        :param no_processes: number of processes computing the mutation pattern weights and solving the MILP
+            components in parallel
+        :param mp_mass: only the most likely mutation patterns of each variant covering this fraction of its
+            probability mass are explored
+        :param column_generation: the mutation patterns are generated iteratively until no further pattern can
+            improve the solution of the MILP instead of exploring the full solution space
+        :param lazy_constraints: the evolutionary conflicts are added iteratively to the MILP once they are violated
+        :param lattice_cache: directory of the cached evolutionary conflicts among all mutation patterns
+        :param solver: name of the solver (cplex, highs, laminar or heuristic)
         :return inferred evolutionary tree
         """
 
@@ -148,24 +189,118 @@ class MaxLHPhylogeny(Phylogeny):
         # necessary to map from identified putative subclones to their original sample
         self.sc_sample_ids = dict()
 
-        if max_no_mps is not None and max_no_mps < math.pow(2, self.patient.n):
+        if (max_no_mps is not None and max_no_mps < math.pow(2, self.patient.n)) or \
+                (mp_mass is not None and mp_mass < 1.0):
             logger.warn('Some variants might be evolutionarily incompatible since the '
                         'solution space is only partially explored!')
             self.conflicting_mutations = set()
 
         # compute various mutation patterns (nodes) and their reliability scores
-        self.node_scores, self.idx_to_mp, self.mp_col_ids, self.mp_weights = infer_ml_graph_nodes(
-            self.patient.log_p01, self.patient.sample_names, self.patient.mut_keys, gene_names=self.patient.gene_names,
-            max_no_mps=max_no_mps)
+        if column_generation:
+            # the restricted problems and the final problem share the time limit
+            deadline = time.time() + time_limit if time_limit is not None else None
+            self.node_scores, self.idx_to_mp, self.mp_col_ids, self.mp_weights, self.raw_node_scores = \
+                generate_ml_graph_nodes(self.patient.log_p01, self.patient.sample_names, self.patient.mut_keys,
+                                        gene_names=self.patient.gene_names, deadline=deadline, solver=solver)
+            if deadline is not None:
+                time_limit = max(deadline - time.time(), 0.0)
+        else:
+            self.node_scores, self.idx_to_mp, self.mp_col_ids, self.mp_weights, self.raw_node_scores = \
+                infer_ml_graph_nodes(self.patient.log_p01, self.patient.sample_names, self.patient.mut_keys,
+                                     gene_names=self.patient.gene_names, max_no_mps=max_no_mps,
+                                     no_processes=no_processes, mp_mass=mp_mass)
+        self.max_no_mps = max_no_mps
+        self.mp_mass = mp_mass
+        self.column_generation = column_generation
+        self.lazy_constraints = lazy_constraints
+        self.lattice_cache = lattice_cache
+        self.no_processes = no_processes
+        self.solver = solver
+        self.subclone_detection = subclone_detection
+        self.min_pattern_score = min_pattern_score
+        self.min_rel_pattern_score = min_rel_pattern_score
+
+        return self._infer_compatible_tree(subclone_detection, no_bootstrap_samples, max_no_mps, time_limit)
+
+    def add_variants(self, no_bootstrap_samples=0, time_limit=None):
+        """
+        Incorporate variants which have been appended to the patient (e.g. from a second calling pass)
+        after the maximum likelihood tree was inferred; the reliability scores are sums over the variants and
+        hence only the contributions of the new variants are computed before the MILP is solved again
+        :param no_bootstrap_samples: number of samples with replacement for the bootstrapping
+        :param time_limit: time limit for MILP solver in seconds
+        :return inferred evolutionary tree
+        """
 
-        while True:
-            # create conflict graph which forms the input to the ILP
-            self.cf_graph = create_conflict_graph(self.node_scores)
+        if self.raw_node_scores is None:
+            raise RuntimeError('Maximum likelihood tree needs to be inferred before variants can be added!')
+
+        if len(self.sc_sample_ids) > 0:
+            raise RuntimeError('Variants can not be added after subclones have been detected! ')
+
+        new_mut_ids = range(len(self.mp_weights), len(self.patient.log_p01))
+        if len(new_mut_ids) == 0:
+            logger.warn('No new variants were added to patient {}.'.format(self.patient.name))
+            return self.mlh_tree
+
+        logger.info('Add {} variants to the previously processed {} variants.'.format(
+            len(new_mut_ids), len(self.mp_weights)))
+
+        # compute the weights of the new variants and add their contributions to the reliability scores
+        if self.column_generation:
+            # new variants may require further patterns; generate them from scratch
+            deadline = time.time() + time_limit if time_limit is not None else None
+            self.node_scores, self.idx_to_mp, self.mp_col_ids, self.mp_weights, self.raw_node_scores = \
+                generate_ml_graph_nodes(self.patient.log_p01, self.patient.sample_names, self.patient.mut_keys,
+                                        gene_names=self.patient.gene_names, deadline=deadline, solver=self.solver)
+            if deadline is not None:
+                time_limit = max(deadline - time.time(), 0.0)
+        else:
+            update_ml_graph_nodes(self.patient.log_p01, new_mut_ids, self.raw_node_scores, self.mp_weights,
+                                  self.idx_to_mp, self.mp_col_ids, self.patient.sample_names, self.patient.mut_keys,
+                                  gene_names=self.patient.gene_names, max_no_mps=self.max_no_mps,
+                                  no_processes=self.no_processes, mp_mass=self.mp_mass)
+            self.node_scores = normalize_reliability_scores(self.raw_node_scores, len(self.mp_weights))
+
+        # previously inferred variants per sample are inferred again from scratch
+        self.patient.variants = defaultdict(list)
+        if self.conflicting_mutations is not None:
+            self.conflicting_mutations = set()
+
+        return self._infer_compatible_tree(self.subclone_detection, no_bootstrap_samples, self.max_no_mps,
+                                           time_limit)
 
+    def _infer_compatible_tree(self, subclone_detection, no_bootstrap_samples, max_no_mps, time_limit):
+        """
+        Find the reliable and evolutionary compatible mutation patterns for the computed reliability scores and
+        assign each variant to its most likely compatible mutation pattern
+        :param subclone_detection: is subclone detection enabled?
+        :param no_bootstrap_samples: number of samples with replacement for the bootstrapping
+        :param max_no_mps: only the given maximal number of most likely (by joint likelihood) mutation patterns
+            is explored per variant
+        :param time_limit: time limit for MILP solver in seconds
+        :return inferred evolutionary tree
+        """
+
+        # exclude patterns whose reliability scores can not significantly change the optimal solution
+        self.pruned_nodes, self.pruning_error = prune_graph_nodes(
+            self.node_scores, self.patient.n, min_score=self.min_pattern_score,
+            min_rel_score=self.min_rel_pattern_score)
+
+        # create conflict graph which forms the input to the ILP
+        self.cf_graph = create_conflict_graph({node: score for node, score in self.node_scores.items()
+                                               if node not in self.pruned_nodes},
+                                              n=self.patient.n, lattice_cache=self.lattice_cache)
+        # previous solution and the nodes whose conflicts changed since then (subclone detection)
+        previous_cover = changed_nodes = None
+
+        while True:
             # translate the conflict graph into a minimum vertex cover problem
             # and solve this using integer linear programming
             self.conflicting_nodes, self.compatible_nodes = cps.solve_conflicting_phylogeny(
-                self.cf_graph, time_limit=time_limit)
+                self.cf_graph, time_limit=time_limit, no_processes=self.no_processes,
+                lazy_constraints=self.lazy_constraints, warm_start=previous_cover, changed_nodes=changed_nodes,
+                solver=self.solver)
 
             # ##### assign each variant to the highest ranked evolutionarily compatible mutation pattern ########
 
@@ -182,67 +317,60 @@ class MaxLHPhylogeny(Phylogeny):
             self.false_negative_unknowns = defaultdict(set)
 
             # find the highest ranked evolutionarily compatible mutation pattern for each variant
-            for mut_idx in range(len(self.mp_weights)):
-
-                # sort by descending log likelihood
-                for sol_idx, (mp_col_idx, _) in enumerate(
-                        sorted(self.mp_weights[mut_idx].items(), key=lambda k: -k[1]), 1):
-
-                    if self.idx_to_mp[mp_col_idx] in self.compatible_nodes:
-                        # found most likely pattern for this variant
-                        self.max_lh_nodes[self.idx_to_mp[mp_col_idx]].add(mut_idx)
-                        self.max_lh_mutations[mut_idx] = self.idx_to_mp[mp_col_idx]
-                        self.max_lh_weights[mut_idx] = self.mp_weights[mut_idx][mp_col_idx]
-                        # logger.debug('Chose {}th highest ranked pattern.'.format(sol_idx)
-                        #     + 'Max LH pattern of variant in {} is {} with log likelihood {:.1e}.'.format(
-                        #       self.patient.gene_names[mut_idx] if self.patient.gene_names is not None
-                        #       else self.patient.mut_keys[mut_idx], self.idx_to_mp[mp_col_idx],
-                        #       self.mp_weights[mut_idx][mp_col_idx]))
-
-                        # determine false positives and false negatives compared to original classification
-                        # TODO: in Treeomics 2 artifact calculation should be changed to BI from the p-value based model
-                        # TDO: to Bayesian inference model
-                        fps = set(self.patient.mutations[mut_idx].difference(self.idx_to_mp[mp_col_idx]))
-
-                        # check if some of these false-positives are present in the newly created subclones
-                        for sc_idx, sa_idx in self.sc_sample_ids.items():
-                            if sc_idx in self.idx_to_mp[mp_col_idx] and sa_idx in fps:
-                                fps.remove(sa_idx)
-                        if len(fps) > 0:
-                            self.false_positives[mut_idx] = fps
-
-                        # distinguish between real false negatives and variants classified as unknown
-                        for sc_idx in self.idx_to_mp[mp_col_idx].difference(self.patient.mutations[mut_idx]):
-
-                            # map from identified putative subclones to their original sample
-                            if sc_idx in self.sc_sample_ids.keys():
-                                while sc_idx in self.sc_sample_ids.keys():
-                                    sc_idx = self.sc_sample_ids[sc_idx]
-                                if sc_idx in self.patient.mutations[mut_idx]:
-                                    # mutation was already classified as present in original sample
-                                    # => no false-negative
-                                    continue
-                                # mutation was not classified as present in original sample
-                                # => must be a false-negative
-                                if self.patient.data[mut_idx][sc_idx] < 0.0:      # unknown classified mutation
-                                    self.false_negative_unknowns[mut_idx].add(sc_idx)
-                                else:
-                                    self.false_negatives[mut_idx].add(sc_idx)
+            compatible_cols = np.array([mp in self.compatible_nodes for mp in self.idx_to_mp], dtype=bool)
+            ml_cols, ml_weights = self.mp_weights.max_weight_columns(compatible_cols)
+            for mut_idx, (mp_col_idx, weight) in enumerate(zip(ml_cols.tolist(), ml_weights.tolist())):
+
+                if mp_col_idx >= 0:
+                    # found most likely pattern for this variant
+                    self.max_lh_nodes[self.idx_to_mp[mp_col_idx]].add(mut_idx)
+                    self.max_lh_mutations[mut_idx] = self.idx_to_mp[mp_col_idx]
+                    self.max_lh_weights[mut_idx] = weight
+                    # logger.debug('Max LH pattern of variant in {} is {} with log likelihood {:.1e}.'.format(
+                    #       self.patient.gene_names[mut_idx] if self.patient.gene_names is not None
+                    #       else self.patient.mut_keys[mut_idx], self.idx_to_mp[mp_col_idx], weight))
+
+                    # determine false positives and false negatives compared to original classification
+                    # TODO: in Treeomics 2 artifact calculation should be changed to BI from the p-value based model
+                    # TDO: to Bayesian inference model
+                    fps = set(self.patient.mutations[mut_idx].difference(self.idx_to_mp[mp_col_idx]))
+
+                    # check if some of these false-positives are present in the newly created subclones
+                    for sc_idx, sa_idx in self.sc_sample_ids.items():
+                        if sc_idx in self.idx_to_mp[mp_col_idx] and sa_idx in fps:
+                            fps.remove(sa_idx)
+                    if len(fps) > 0:
+                        self.false_positives[mut_idx] = fps
+
+                    # distinguish between real false negatives and variants classified as unknown
+                    for sc_idx in self.idx_to_mp[mp_col_idx].difference(self.patient.mutations[mut_idx]):
+
+                        # map from identified putative subclones to their original sample
+                        if sc_idx in self.sc_sample_ids.keys():
+                            while sc_idx in self.sc_sample_ids.keys():
+                                sc_idx = self.sc_sample_ids[sc_idx]
+                            if sc_idx in self.patient.mutations[mut_idx]:
+                                # mutation was already classified as present in original sample
+                                # => no false-negative
+                                continue
+                            # mutation was not classified as present in original sample
+                            # => must be a false-negative
+                            if self.patient.cls_states[mut_idx, sc_idx] < 0:      # unknown classified mutation
+                                self.false_negative_unknowns[mut_idx].add(sc_idx)
                             else:
-                                if self.patient.data[mut_idx][sc_idx] < 0.0:      # unknown classified mutation
-                                    self.false_negative_unknowns[mut_idx].add(sc_idx)
-                                else:
-                                    self.false_negatives[mut_idx].add(sc_idx)
-
-                        # search can be stopped since most likely pattern has been found for this variant
-                        break
+                                self.false_negatives[mut_idx].add(sc_idx)
+                        else:
+                            if self.patient.cls_states[mut_idx, sc_idx] < 0:      # unknown classified mutation
+                                self.false_negative_unknowns[mut_idx].add(sc_idx)
+                            else:
+                                self.false_negatives[mut_idx].add(sc_idx)
 
                 # no evolutionarily compatible mutation pattern was among the <max_no_mps> most likely pattern
-                # of this variant; variant will be incompatible to the inferred tree!
+                # (or among the patterns covering <mp_mass>) of this variant; variant will be incompatible!
                 else:
 
                     # check if indeed the solution space is only partially explored
-                    assert max_no_mps is not None and max_no_mps < math.pow(2, self.patient.n), \
+                    assert self.conflicting_mutations is not None, \
                         'Compatible mutation pattern must exist when the full solution space is explored!'
 
                     self.conflicting_mutations.add(mut_idx)
@@ -258,13 +386,24 @@ class MaxLHPhylogeny(Phylogeny):
                     self.patient.gene_names is not None else '.'))
 
             # find parsimony-informative evolutionarily incompatible mps with high likelihood
-            if subclone_detection and max_no_mps is None:
+            if subclone_detection and max_no_mps is None and self.mp_mass is None and not self.column_generation:
 
-                self.sc_sample_ids, found_subclones = self.find_subclones()
-                if not found_subclones:
+                previous_cover = np.array([node in self.conflicting_nodes for node in self.cf_graph.nodes], dtype=bool)
+                # index the compatible patterns once per solution
+                self.compatible_index = LaminarIndex(self.compatible_nodes)
+                self.sc_sample_ids, updated_nodes = self.find_subclones()
+                if len(updated_nodes) == 0:
                     # not enough evidence for additional new subclones
                     break
 
+                # only the conflicts of the relabeled patterns change; the components of the conflict graph without
+                # any changes keep their solution and the others are warm started from the previous solution
+                changed_nodes = update_conflict_graph(
+                    self.cf_graph, updated_nodes,
+                    {node: score for node, score in self.node_scores.items() if node not in self.pruned_nodes})
+                previous_cover = np.concatenate(
+                    (previous_cover, np.zeros(self.cf_graph.order() - len(previous_cover), dtype=bool)))
+
             else:           # detection of subclones is disabled
                 break
 
@@ -273,7 +412,7 @@ class MaxLHPhylogeny(Phylogeny):
                         len(self.patient.sc_names)-len(self.patient.sample_names),
                         ', '.join(self.patient.sc_names[sc_idx] for sc_idx in range(len(self.patient.sample_names),
                                                                                     len(self.patient.sc_names)))))
-        if max_no_mps is not None:
+        if self.conflicting_mutations is not None:
             logger.info('{}/{} are compatible on the inferred evolutionary tree. '.format(
                 len(self.max_lh_mutations), len(self.max_lh_mutations)+len(self.conflicting_mutations)) +
                 '{} ({:.3%}) of the mutations are conflicting.'.format(
@@ -343,7 +482,8 @@ class MaxLHPhylogeny(Phylogeny):
             self.infer_max_lh_tree(subclone_detection=False, time_limit=time_limit)
 
         node_frequencies = cps.bootstrapping_solving(
-            self.cf_graph, self.mp_weights, self.idx_to_mp, no_samples)
+            self.cf_graph, self.mp_weights, self.idx_to_mp, no_samples, no_processes=self.no_processes,
+            solver=self.solver)
 
         self.bootstrapping_values = dict()
 
@@ -376,7 +516,8 @@ class MaxLHPhylogeny(Phylogeny):
             self.infer_max_lh_tree(subclone_detection=False, time_limit=time_limit)
 
         node_frequencies = cps.solve_downsampled_nodes(
-            self.cf_graph, self.mp_weights, self.idx_to_mp, no_replications)
+            self.cf_graph, self.mp_weights, self.idx_to_mp, no_replications, no_processes=self.no_processes,
+            solver=self.solver)
 
         comp_node_frequencies = defaultdict(dict)
 
@@ -414,15 +555,19 @@ class MaxLHPhylogeny(Phylogeny):
         return comp_node_frequencies
 
     def find_subclones(self):
+        """
+        Create new subclones for the highest ranked evolutionarily incompatible mutation pattern if there is enough
+        evidence
+        :return map from subclones to their original samples, map from previous to relabeled mutation patterns
+        """
 
         updated_nodes, self.sc_sample_ids = self.find_subclonal_mps()
 
         if len(updated_nodes) == 0:
             logger.info('There are no more incompatible mutation patterns with a reliability score '
                         'of at least {:.1e}.'.format(self.min_score))
-            return self.sc_sample_ids, False
 
-        return self.sc_sample_ids, True
+        return self.sc_sample_ids, updated_nodes
 
     def find_subclonal_mps(self):
         """
@@ -465,9 +610,9 @@ class MaxLHPhylogeny(Phylogeny):
             hcmp = max(set(self.cf_graph.neighbors(mp)).difference(self.conflicting_nodes),
                        key=lambda k: self.node_scores[k])
             logger.info('Highest ranked evolutionary incompatible mutation pattern of MP {} (w: {:.2e}): {} (w: {:.2e})'
-                        .format(', '.join(self.patient.sc_names[sc] for sc in mp), self.cf_graph.node[mp]['weight'],
+                        .format(', '.join(self.patient.sc_names[sc] for sc in mp), self.cf_graph.weight(mp),
                                 ', '.join(self.patient.sc_names[sc] for sc in hcmp),
-                                self.cf_graph.node[hcmp]['weight']))
+                                self.cf_graph.weight(hcmp)))
 
             # infer samples with putative mixed subclones
             msc_samples = list(mp.intersection(hcmp))
@@ -525,7 +670,7 @@ class MaxLHPhylogeny(Phylogeny):
                         ', '.join(self.patient.sc_names[sc] for sc in new_mp.difference(mp))))
 
             # step (d) continued: check compatibility with other conflicting clones
-            for related_mp in sorted(self.conflicting_nodes, key=lambda k: -self.cf_graph.node[k]['weight']):
+            for related_mp in sorted(self.conflicting_nodes, key=lambda k: -self.cf_graph.weight(k)):
                 if related_mp == mp:
                     continue
 
@@ -557,9 +702,9 @@ class MaxLHPhylogeny(Phylogeny):
                 #             + 'would not make it compatible to {} (w: {:.1e})'.format(hcmp, self.node_scores[hcmp]))
 
             # step (e): add new subclone to all compatible supersets of mp
-            for anc in self.compatible_nodes:
+            for anc in self.compatible_index.supersets(mp):
 
-                if anc.issuperset(mp) and anc != mp:
+                if anc != mp:
                     anc_sas = [sa for sa in anc]
                     anc_sas.append(sc_sa_idx)
                     new_anc = frozenset(anc_sas)
@@ -607,7 +752,8 @@ class MaxLHPhylogeny(Phylogeny):
         return updated_nodes
 
 
-def infer_ml_graph_nodes(log_p01, sample_names, mut_keys, gene_names=None, max_no_mps=None):
+def infer_ml_graph_nodes(log_p01, sample_names, mut_keys, gene_names=None, max_no_mps=None, no_processes=1,
+                         mp_mass=None):
     """
     Infer maximum likelihood using bayesian inference for each possible mutation pattern
     :param log_p01: posterior: log probability that VAF = 0, log probability that VAF > 0
@@ -616,37 +762,169 @@ def infer_ml_graph_nodes(log_p01, sample_names, mut_keys, gene_names=None, max_n
     :param gene_names: list with the names of the genes in which the variant occurred
     :param max_no_mps: maximal number of MPs per variant that are considered in the MILP; by default the full solution
                        space is considered and hence 2^(#samples) of MPs are generated
-    :return dictionary of nodes and corresponding variants, pattern reliability scores, weights of patterns of variants
+    :param no_processes: number of processes computing chunks of variants in parallel
+    :param mp_mass: only the most likely MPs of each variant covering this fraction of its probability mass are
+                    considered in the MILP (if also max_no_mps is given, whichever limit is reached first applies)
+    :return dictionary of nodes and corresponding variants, pattern reliability scores, weights of patterns of variants,
+            and the not yet normalized reliability scores (needed to add further variants later)
     """
 
     assert max_no_mps is None or max_no_mps > 0, 'At least one mutation pattern per variant has to be considered'
+    assert mp_mass is None or 0 < mp_mass <= 1, 'Covered probability mass needs to be in (0, 1].'
 
     n = len(sample_names)  # number of samples
     m = len(log_p01)       # number of variants
 
-    # presence probability of a variant for calculating reliability score
-    # is upper bounded because the same variant could have been independently acquired twice
-    max_pre_llh = math.log(def_sets.MAX_PRE_PROB)
-    not_max_pre_llh = 1.0 - max_pre_llh
+    if max_no_mps is None and mp_mass is None:
+        # generate all possible mutation patterns for <n> given samples and index them
+        idx_to_mp, mp_col_ids = get_mp_columns(n)
+    else:
+        # only the most likely mutation patterns of the variants get indexed when they are generated
+        idx_to_mp = list()
+        mp_col_ids = dict()
+
+    # mutation patterns score summed over all variants (not yet normalized by the number of variants)
+    raw_scores = dict()
+    # weight per inferred mutation pattern per variant given the p0's and p1's in each sample for a variant
+    dense = max_no_mps is None and mp_mass is None
+    mp_weights = MPWeights(dense=dense, no_cols=len(idx_to_mp), col_patterns=list(idx_to_mp) if dense else None)
 
-    # absence probability of a variant for calculating reliability score
-    # should be upper bounded because the variant could have been lost by LOH
-    # for most sequencing depth this lower bound is irrelevant
-    max_abs_llh = math.log(def_sets.MAX_ABS_PROB)
-    not_max_abs_llh = 1.0 - max_abs_llh
+    update_ml_graph_nodes(log_p01, range(m), raw_scores, mp_weights, idx_to_mp, mp_col_ids, sample_names, mut_keys,
+                          gene_names=gene_names, max_no_mps=max_no_mps, no_processes=no_processes, mp_mass=mp_mass)
 
-    node_scores = dict()    # mutation patterns score summed over all variants
+    node_scores = normalize_reliability_scores(raw_scores, m)
+
+    return node_scores, idx_to_mp, mp_col_ids, mp_weights, raw_scores
+
+
+def generate_ml_graph_nodes(log_p01, sample_names, mut_keys, gene_names=None, deadline=None, solver='cplex'):
+    """
+    Generate the relevant mutation patterns by column generation instead of enumerating all 2^n patterns:
+    the MILP is solved for a restricted set of patterns for which the reliability scores are exactly calculated
+    (over all variants); the patterns of a compatible set are disjoint events for each variant and hence any patterns
+    outside the restricted set can improve the optimal weight of the compatible patterns by at most
+    1/m * sum_v R_v / (1 - R_v) where R_v is the probability mass of variant v which is not covered by the
+    restricted set; further most likely patterns of the variants with the largest uncovered mass are priced in
+    until this bound proves the optimality of the restricted solution (within the given tolerance); the bound is
+    only a certificate if the restricted problem was solved to optimality
+    :param log_p01: posterior: log probability that VAF = 0, log probability that VAF > 0
+    :param sample_names:
+    :param mut_keys: list with information about the variant
+    :param gene_names: list with the names of the genes in which the variant occurred
+    :param deadline: absolute time (see time.time) until which the restricted problems need to be solved; each solve
+                     gets the remaining time and the generation stops once the deadline is reached
+    :param solver: name of the solver (cplex, highs, laminar or heuristic)
+    :return dictionary of nodes and corresponding variants, pattern reliability scores, weights of patterns of variants,
+            and the not yet normalized reliability scores
+    """
+
+    n = len(sample_names)  # number of samples
+    m = len(log_p01)       # number of variants
+
+    # variants with identical clipped posterior profiles have identical pattern likelihoods
+    lp01 = mpl.get_log_posteriors(log_p01, range(m), n)
+    first_ids, groups, multiplicities = mpl.get_distinct_profiles(lp01, decimals=def_sets.PROFILE_DECIMALS)
+    lp01 = lp01[first_ids]
+    group_keys = [mut_keys[mut_idx] for mut_idx in first_ids]
+    group_genes = [gene_names[mut_idx] for mut_idx in first_ids] if gene_names is not None else None
+    clipped_lp0, clipped_lp1 = mpl.clip_log_posteriors(lp01)
+    # total probability mass of all 2^n patterns of each variant
+    log_masses = np.sum(np.logaddexp(clipped_lp0, clipped_lp1), axis=1)
+
+    # restricted set of patterns: patterns with less than two samples and the trunk are never conflicting
+    idx_to_mp = [frozenset()] + [frozenset([sa_idx]) for sa_idx in range(n)]
+    if n > 1:
+        idx_to_mp.append(frozenset(range(n)))
+    mp_col_ids = dict((node, mp_idx) for mp_idx, node in enumerate(idx_to_mp))
+    new_nodes = list(idx_to_mp)
+
+    log_mls = np.zeros((len(first_ids), 0))
+    # number of generated most likely patterns per variant
+    no_mps = np.full(len(first_ids), def_sets.CG_INITIAL_NO_MPS, dtype=np.int64)
+    pricing_rows = range(len(first_ids))
+    for iteration in itertools.count(1):
+
+        # price in the next most likely patterns of the selected variants
+        for row in pricing_rows:
+            while True:
+                no_new_nodes = len(new_nodes)
+                for node in mpl.get_most_likely_patterns(clipped_lp0[row], clipped_lp1[row], k=no_mps[row]):
+                    if node not in mp_col_ids:
+                        mp_col_ids[node] = len(idx_to_mp)
+                        idx_to_mp.append(node)
+                        new_nodes.append(node)
+
+                # the patterns of other variants might already cover the generated ones
+                if iteration == 1 or len(new_nodes) > no_new_nodes or no_mps[row] >= 2 ** n:
+                    break
+                no_mps[row] *= 2
+
+        if len(new_nodes) == 0:
+            logger.info('All mutation patterns of the variants have been generated.')
+            break
+
+        # calculate the likelihoods of the new patterns for all variants
+        pattern_mat = mpl.get_pattern_matrix(new_nodes, n)
+        new_log_mls = mpl.calculate_log_likelihoods(clipped_lp0, clipped_lp1, pattern_mat)
+        mpl.approximate_underflows(new_log_mls, lp01, pattern_mat, range(len(first_ids)), new_nodes, sample_names,
+                                   group_keys, gene_names=group_genes)
+        log_mls = np.hstack((log_mls, new_log_mls))
+        new_nodes = list()
+
+        raw_scores = dict(zip(idx_to_mp, mpl.get_neg_log_absence_probs(
+            log_mls, multiplicities=multiplicities).tolist()))
+        node_scores = normalize_reliability_scores(raw_scores, m)
+
+        if deadline is not None and time.time() >= deadline:
+            logger.warn('Time limit reached during column generation; optimality of the generated mutation '
+                        'patterns is not proven.')
+            break
+
+        # solve the restricted problem
+        solution_states = Counter()
+        _, compatible_nodes = cps.solve_conflicting_phylogeny(
+            create_conflict_graph(node_scores), time_limit=deadline - time.time() if deadline is not None else None,
+            solver=solver, solution_states=solution_states)
+        opt_weight = sum(node_scores[node] for node in compatible_nodes)
+
+        # bound the improvement by patterns outside of the restricted set
+        uncovered = np.maximum(-np.exp(log_masses) * np.expm1(np.logaddexp.reduce(log_mls, axis=1) - log_masses), 0.0)
+        row_bounds = multiplicities * uncovered / (1.0 - uncovered) / m
+        gap = np.sum(row_bounds)
+
+        logger.info('Column generation iteration {}: {} patterns, compatible weight {:.4e}, '.format(
+            iteration, len(idx_to_mp), opt_weight) + 'maximal improvement {:.2e}.'.format(gap))
+        if gap <= def_sets.CG_GAP_TOLERANCE * opt_weight:
+            if not cps.is_optimal(solution_states):
+                # the bound only holds for the optimal solution of the restricted problem
+                logger.warn('Restricted problem was not solved to optimality ({}); optimality of the generated '.format(
+                    ', '.join(sorted(solution_states.keys()))) + 'mutation patterns is not proven.')
+            break
+
+        # double the number of generated patterns of the variants with an above-average share of the bound
+        pricing_rows = np.nonzero(row_bounds >= gap / len(row_bounds))[0]
+        no_mps[pricing_rows] *= 2
+
+    logger.info('Column generation explored {} of {} mutation patterns.'.format(len(idx_to_mp), 2 ** n))
+
+    mp_weights = MPWeights(dense=True, no_cols=len(idx_to_mp), col_patterns=list(idx_to_mp))
+    mp_weights.add_rows(log_mls, row_map=groups)
+
+    return node_scores, idx_to_mp, mp_col_ids, mp_weights, raw_scores
+
+
+def get_mp_columns(n):
+    """
+    Generate all possible mutation patterns for <n> given samples and index them
+    :param n: number of samples
+    :return: list of column ids mapping to the mutation patterns, dictionary from mutation patterns to the column ids
+    """
 
-    # weight per inferred mutation pattern per variant given the p0's and p1's in each sample for a variant
-    mp_weights = list()
     # mutation pattern to the corresponding column id in the weight matrix
     mp_col_ids = dict()
     # column id to corresponding mutation pattern
     idx_to_mp = list()
 
-    trunk_mp = frozenset([sa_idx for sa_idx in range(n)])
-
-    # generate all possible mutation patterns for <n> given samples and index them
     mp_idx = 0
     for no_pres_vars in range(0, n+1):     # number of present variants in the generated MPs (mutation patterns)
         # generate all mps with length no_pres_vars
@@ -657,97 +935,152 @@ def infer_ml_graph_nodes(log_p01, sample_names, mut_keys, gene_names=None, max_n
 
             mp_idx += 1
 
-    # run through all mutations and generate either the <max_no_mps> of mutation patterns for each variant or
-    # generate each possible mutation pattern for each variant
-    for mut_idx in range(m):
-
-        mp_weights.append(dict())
+    return idx_to_mp, mp_col_ids
 
-        if max_no_mps is not None:  # not the full solution space is explored
-            # generate heap to keep track of the most likely <max_no_mps> of mutation patterns
-            heap = list()   # element at heap[0] is always the minimal element hence lowest log likelihood
 
-        for mp_idx, node in enumerate(idx_to_mp):
-
-            log_ml = 0.0                # log maximum likelihood of the inferred pattern
-            for sa_idx in node:                         # variant is present
-                log_ml += min(log_p01[mut_idx][sa_idx][1], max_pre_llh)
-            for sa_idx in trunk_mp.difference(node):    # variant is absent
-                log_ml += min(log_p01[mut_idx][sa_idx][0], max_abs_llh)
+def update_ml_graph_nodes(log_p01, mut_ids, raw_scores, mp_weights, idx_to_mp, mp_col_ids, sample_names, mut_keys,
+                          gene_names=None, max_no_mps=None, no_processes=1, mp_mass=None):
+    """
+    Calculate the weights of the mutation patterns of the given variants and add their contributions
+    to the reliability scores; since reliability scores are sums over the variants, further variants can
+    be added later without recomputing the contributions of the previously processed variants
+    :param log_p01: posterior: log probability that VAF = 0, log probability that VAF > 0
+    :param mut_ids: indices of the variants to process (need to continue the already processed variants in mp_weights)
+    :param raw_scores: dictionary of mutation patterns to their reliability scores summed over the processed variants
+    :param mp_weights: weight matrix [mut_idx, mp_col_idx] to which the weights of the given variants are appended
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param mp_col_ids: dictionary from mutation patterns to the above column ids;
+                       if the solution space is limited, newly generated patterns are appended to both
+    :param sample_names:
+    :param mut_keys: list with information about the variant
+    :param gene_names: list with the names of the genes in which the variant occurred
+    :param max_no_mps: maximal number of MPs per variant that are considered in the MILP
+    :param no_processes: number of processes computing chunks of variants in parallel; the chunks' contributions
+                         are reduced in a fixed order such that the result does not depend on this number
+    :param mp_mass: only the most likely MPs of each variant covering this fraction of its probability mass are
+                    considered in the MILP
+    """
 
-            if log_ml == 0.0:   # numerical artifact, use approximation: ignore second order term
-                for sa_idx in node:                         # variant is present
-                    log_ml += math.exp(max(log_p01[mut_idx][sa_idx][0], not_max_pre_llh))     # sum probability
-                for sa_idx in trunk_mp.difference(node):    # variant is absent
-                    log_ml += math.exp(max(log_p01[mut_idx][sa_idx][1], not_max_abs_llh))
+    n = len(sample_names)
+    mut_ids = list(mut_ids)
+    assert mut_ids == list(range(len(mp_weights), len(mp_weights) + len(mut_ids))), \
+        'Variants need to be processed in the order of their indices.'
+
+    # variants with identical clipped posterior profiles have identical pattern likelihoods
+    # compute them only once per group and weight their contributions by the size of the group
+    lp01 = mpl.get_log_posteriors(log_p01, mut_ids, n)
+    first_ids, groups, multiplicities = mpl.get_distinct_profiles(lp01, decimals=def_sets.PROFILE_DECIMALS)
+    if len(mut_ids) > 0:
+        logger.info('Pattern likelihoods of {} variants are given by {} distinct posterior profiles '.format(
+            len(mut_ids), len(first_ids)) + '(compression ratio {:.2f}).'.format(float(len(mut_ids)) / len(first_ids)))
+    lp01 = lp01[first_ids]
+    group_keys = [mut_keys[mut_ids[row]] for row in first_ids]
+    group_genes = [gene_names[mut_ids[row]] for row in first_ids] if gene_names is not None else None
+
+    if max_no_mps is not None or mp_mass is not None:      # not the full solution space is explored
+        # generate the most likely <max_no_mps> of mutation patterns (or the most likely patterns covering
+        # <mp_mass> of the probability mass) for each variant directly
+        rows = list()
+        for multiplicity, (nodes, log_mls) in zip(multiplicities.tolist(), mpl.iter_most_likely_patterns(
+                lp01, max_no_mps, sample_names, group_keys, gene_names=group_genes, no_processes=no_processes,
+                mass=mp_mass)):
+
+            for node in nodes:
+                if node not in mp_col_ids:
+                    mp_col_ids[node] = len(idx_to_mp)
+                    idx_to_mp.append(node)
+
+            # assign calculated log probability that these variants have this mutation pattern
+            rows.append(([mp_col_ids[node] for node in nodes], log_mls))
 
-                log_ml = np.log1p(-log_ml)      # calculates log(1+argument)
-                if gene_names is not None:
-                    logger.debug('Approximated log probability of variant {} having pattern {} by {:.2e}.'.format(
-                        gene_names[mut_idx], node, log_ml))
-                else:
-                    logger.debug('Approximated log probability of variant {} having pattern {} by {:.2e}.'.format(
-                        mut_keys[mut_idx], node, log_ml))
-                if log_ml == 0.0:
-                    if len(node) == 0 or len(node) == 1 or len(node) == n:
-                        logger.debug('Underflow warning. Set probability to minimal float value!')
-                    else:
-                        logger.warn('Underflow error. Set probability to minimal float value!')
-                    log_ml = -200
-
-                assert log_ml < 0.0, ('Underflow error while calculating the probability that the ' +
-                                      'variant {} does not have pattern {}.'.format(
-                                       mut_keys[mut_idx], ', '.join(sample_names[sa_idx] for sa_idx in node)))
-
-            if max_no_mps is not None:  # not the full solution space is explored
-                # use heapq to keep track of the most likely <max_no_mps> of mutation patterns
-                if len(heap) < max_no_mps:
-                    heapq.heappush(heap, (log_ml, mp_idx))
-                elif log_ml > heap[0][0]:      # likelihood of currently considered MP is higher than smallest in heap
-                    # log likelihood of mp that is more likely for the currently considered variant
-                    heapq.heapreplace(heap, (log_ml, mp_idx))
-            else:                       # full solution space is explored, weight of every pattern is relevant
-                # assign calculated log probability that this variant has this mutation pattern
-                mp_weights[mut_idx][mp_idx] = log_ml
-
-        if max_no_mps is not None:          # most likely MPs for this variant if the solution space is limited
-            # assign calculated log probability that this variant has this mutation pattern
-            for log_ml, mp_idx in heap:
-                mp_weights[mut_idx][mp_idx] = log_ml
-
-        # run through all relevant MPs for this variant and sum their log likelihoods
-        # to calculate the reliability scores
-        for mp_idx, log_ml in mp_weights[mut_idx].items():
-            node = idx_to_mp[mp_idx]
             # calculate the probability of a mp that no variant has this mutation pattern
             # product of (1 - the probability that a variant has this mp)
-            if node in node_scores.keys():
-                node_scores[node] -= math.log(-math.expm1(log_ml))
-            else:
-                node_scores[node] = -math.log(-math.expm1(log_ml))
-
-    for mp_idx, node in enumerate(idx_to_mp):
-        if node in node_scores and node_scores[node] == 0.0:
-            if len(node) == 0 or len(node) == 1 or len(node) == len(sample_names):
-                # logger.debug('Underflow warning for pattern {}. Set probability to minimal float value!'
-                #       .format(', '.join(sample_names[sa_idx] for sa_idx in node)))
-                pass
+            for node, score in zip(nodes, mpl.get_neg_log_absence_probs(
+                    log_mls[np.newaxis, :], multiplicities=[multiplicity]).tolist()):
+                if node in raw_scores.keys():
+                    raw_scores[node] += score
+                else:
+                    raw_scores[node] = score
+
+        mp_weights.add_sparse_rows(rows, row_map=groups)
+        if mp_mass is not None and len(rows) > 0:
+            logger.info('On average {:.1f} mutation patterns per distinct variant cover {:.3%} of the '.format(
+                float(sum(len(col_ids) for col_ids, _ in rows)) / len(rows), mp_mass) + 'probability mass.')
+
+        return
+
+    # confidently classified variants: only their most likely pattern and the patterns differing from it in a single
+    # sample are credited in closed form; the neglected contributions to all other patterns are within the tolerance
+    closed_form = np.zeros(len(first_ids), dtype=bool)
+    if def_sets.CLOSED_FORM_TOLERANCE is not None and len(first_ids) > 0:
+        clipped_lp0, clipped_lp1 = mpl.clip_log_posteriors(lp01)
+        ml_presence, ml_log_mls, flip_costs, bounds = mpl.get_closed_form_patterns(clipped_lp0, clipped_lp1)
+        closed_form = (bounds <= def_sets.CLOSED_FORM_TOLERANCE) & (ml_log_mls < 0.0)
+
+    cf_rows = list()
+    for row in np.nonzero(closed_form)[0]:
+        ml_node = frozenset(int(sa_idx) for sa_idx in np.nonzero(ml_presence[row])[0])
+        nodes = [ml_node] + [ml_node.symmetric_difference([sa_idx]) for sa_idx in range(n)]
+        log_mls = np.concatenate(([ml_log_mls[row]], ml_log_mls[row] - flip_costs[row]))
+        cf_rows.append(([mp_col_ids[node] for node in nodes], log_mls))
+
+        for node, score in zip(nodes, mpl.get_neg_log_absence_probs(
+                log_mls[np.newaxis, :], multiplicities=[multiplicities[row]]).tolist()):
+            raw_scores[node] = raw_scores[node] + score if node in raw_scores else score
+
+    if len(cf_rows) > 0:
+        logger.info('Weights of {} of {} distinct variants are given in closed form '.format(
+            len(cf_rows), len(first_ids)) + '(neglected reliability score contributions at most {:.2e}).'.format(
+            multiplicities[closed_form].dot(bounds[closed_form])))
+
+    # stored rows of the closed-form variants follow the rows of all other variants
+    positions = np.empty(len(first_ids), dtype=np.int64)
+    positions[~closed_form] = np.arange(np.count_nonzero(~closed_form))
+    positions[closed_form] = np.count_nonzero(~closed_form) + np.arange(len(cf_rows))
+    groups = positions[groups]
+    group_keys = [group_keys[row] for row in np.nonzero(~closed_form)[0]]
+    group_genes = [group_genes[row] for row in np.nonzero(~closed_form)[0]] if group_genes is not None else None
+
+    # compute the log likelihoods of all patterns for chunks of variants by matrix multiplications
+    blocks = list()
+    for _, log_mls, scores in mpl.iter_log_likelihoods(lp01[~closed_form], idx_to_mp, sample_names, group_keys,
+                                                       gene_names=group_genes,
+                                                       multiplicities=multiplicities[~closed_form],
+                                                       no_processes=no_processes):
+
+        # full solution space is explored, weight of every pattern is relevant
+        blocks.append(log_mls)
+
+        # probability of a mp that no variant has this mutation pattern summed over the whole column
+        for mp_idx, score in enumerate(scores.tolist()):
+            node = idx_to_mp[mp_idx]
+            if node in raw_scores.keys():
+                raw_scores[node] += score
             else:
-                # logger.warn('Underflow error for pattern {}. Set probability to minimal float value!'.format(
-                #     ', '.join(sample_names[sa_idx] for sa_idx in node)))
-                # raise RuntimeError(
-                #     'Underflow error for pattern {}. Set probability to minimal float value!'.format(
-                #         ', '.join(sample_names[sa_idx] for sa_idx in node)))
-                pass
+                raw_scores[node] = score
 
-            node_scores[node] = sys.float_info.min
+    # assign calculated log probability that these variants have these mutation patterns
+    mp_weights.add_rows(np.vstack(blocks) if len(blocks) > 0 else np.zeros((0, len(idx_to_mp))), row_map=groups,
+                        closed_form=(cf_rows, clipped_lp0[closed_form], clipped_lp1[closed_form])
+                        if len(cf_rows) > 0 else None)
+
+
+def normalize_reliability_scores(raw_scores, m):
+    """
+    Normalize the summed reliability scores by the number of processed variants
+    :param raw_scores: dictionary of mutation patterns to their reliability scores summed over all variants
+    :param m: number of processed variants
+    :return: dictionary of mutation patterns to their normalized reliability scores
+    """
 
-        # logger.debug('Variant {} has pattern {} with probability {:.1e}.'.format(
-        #     gene_names[mut_idx], ', '.join(sample_names[sa_idx] for sa_idx in node), math.exp(log_ml)))
+    node_scores = dict()
+    for node, score in raw_scores.items():
+        # underflow: set probability to minimal float value
+        if score == 0.0:
+            score = sys.float_info.min
 
-    # normalize reliability score by the number of processed variants (m)
-    for node in node_scores.keys():
-        node_scores[node] /= m
+        # normalize reliability score by the number of processed variants (m)
+        node_scores[node] = score / m
         if node_scores[node] == 0.0:
             node_scores[node] = sys.float_info.min
 
@@ -755,52 +1088,102 @@ def infer_ml_graph_nodes(log_p01, sample_names, mut_keys, gene_names=None, max_n
     for node, score in itertools.islice(sorted(node_scores.items(), key=lambda k: -k[1]), 0, 25):
         logger.info('Pattern {} has a normalized reliability score of {:.2e}.'.format(node, score))
 
-    return node_scores, idx_to_mp, mp_col_ids, mp_weights
+    return node_scores
 
 
-def create_conflict_graph(reliability_scores):
+def prune_graph_nodes(node_scores, n, min_score=None, min_rel_score=None):
+    """
+    Find mutation patterns with negligible reliability scores which can be excluded from the conflict graph;
+    excluded patterns are treated as conflicting and hence the objective value of the minimum weight vertex cover
+    increases by at most the sum of their reliability scores
+    Patterns which can not be conflicting (absent, unique, and trunk patterns) are never excluded
+    :param node_scores: dictionary of mutation patterns to their reliability scores
+    :param n: number of samples
+    :param min_score: absolute bound on the reliability score
+    :param min_rel_score: bound on the reliability score relative to the highest score
+    :return: set of excluded patterns, maximal error in the objective value
+    """
+
+    if (min_score is None and min_rel_score is None) or len(node_scores) == 0:
+        return set(), 0.0
+
+    bound = 0.0
+    if min_score is not None:
+        bound = min_score
+    if min_rel_score is not None:
+        bound = max(bound, min_rel_score * max(node_scores.values()))
+
+    pruned_nodes = set(node for node, score in node_scores.items() if score < bound and 1 < len(node) < n)
+    pruning_error = sum(node_scores[node] for node in pruned_nodes)
+
+    logger.info('Excluded {}/{} mutation patterns with a reliability score below {:.2e}. '.format(
+        len(pruned_nodes), len(node_scores), bound) +
+        'Maximal resulting error in the objective value: {:.2e}.'.format(pruning_error))
+
+    return pruned_nodes, pruning_error
+
+
+def create_conflict_graph(reliability_scores, n=None, lattice_cache=None):
     """
     Create a graph where the nodes are given by the mutation patterns and
     the edges model the evolutionary conflicts among them
     :param reliability_scores: each node in the graph is weighted corresponding to the confidence
     in the sequencing data of the mutation modeled by the reliability scores
+    :param n: number of samples
+    :param lattice_cache: directory of the cached evolutionary conflicts among all mutation patterns of n samples
     :return conflict graph
     """
 
-    # create empty conflict graph
-    cf_graph = nx.Graph()
-    incompatible_mp = defaultdict(set)
+    patterns = list(reliability_scores.keys())
+    if (lattice_cache is not None and n is not None and n <= def_sets.LATTICE_CACHE_MAX_SAMPLES and
+            len(patterns) >= def_sets.LATTICE_CACHE_MIN_FRACTION * 2 ** n and
+            all(sa_idx < n for pattern in patterns for sa_idx in pattern)):
+        # conflicts among the patterns are selected from the cached conflicts among all patterns of n samples
+        lattice_patterns, lattice_col_ids = get_mp_columns(n)
+        sources, sinks = filter_lattice_conflicts(load_lattice_conflicts(lattice_patterns, n, lattice_cache),
+                                                  [lattice_col_ids[pattern] for pattern in patterns],
+                                                  len(lattice_patterns))
+    else:
+        # conflicts are found on integer bitmasks of the patterns
+        sources, sinks = get_conflict_edges(patterns)
+    cf_graph = ConflictGraph(patterns, [reliability_scores[node] for node in patterns], sources, sinks)
 
-    for node, score in reliability_scores.items():
-        cf_graph.add_node(node, weight=score)
+    logger.info('Created conflict graph with {} nodes of weight {:.2f} and {} evolutionary conflicts.'.format(
+        cf_graph.order(), np.sum(cf_graph.weights), cf_graph.size()))
 
-    # since each mutation occurs at most once running through this is
-    # in O(m^2 * n) = O(|mutations|*|mutations|*|samples|) as
-    # the number of clones is bounded by the number of distinct mutations
-    for (node1, node2) in itertools.combinations(reliability_scores.keys(), 2):
+    return cf_graph
 
-        # variant need to appear at least in two samples and at most in n-1 samples
-        # otherwise a conflict is not possible
-        if len(node1) < 2 or len(node2) < 2:
-            continue
 
-        if len(node1.intersection(node2)) > 0:     # at least one sample where both characters are present (11)
+def update_conflict_graph(cf_graph, updated_nodes, reliability_scores):
+    """
+    Update the conflict graph in place after mutation patterns have been relabeled; only the evolutionary conflicts
+    of the relabeled and the new patterns are recomputed
+    :param cf_graph: conflict graph
+    :param updated_nodes: dictionary from previous to relabeled mutation patterns
+    :param reliability_scores: reliability scores of all mutation patterns in the updated graph
+    :return boolean array of the nodes whose conflicts were recomputed or which were in conflict with a relabeled node
+    """
 
-            # check if some characters are present in one clone but not in the other and visa versa
-            if len(node1.difference(node2)) > 0 and len(node2.difference(node1)) > 0:   # check for 01 and 10
-                # => conflict exists among characters of mp 1 and mp 2
-                # evolutionary incompatible mutation patterns
+    relabeled_ids = cf_graph.relabel_nodes(updated_nodes)
+    # previous neighbors of the relabeled patterns may have lost their conflicts and hence their component
+    # can be split or changed even if none of its nodes is relabeled or new
+    previous_neighbor_ids = [cf_graph.neighbor_ids(node_id) for node_id in relabeled_ids.tolist()]
+    new_nodes = [node for node in reliability_scores.keys() if node not in cf_graph]
+    new_ids = cf_graph.add_nodes(new_nodes, [reliability_scores[node] for node in new_nodes])
 
-                incompatible_mp[node1].add(node2)
-                incompatible_mp[node2].add(node1)
+    changed_ids = np.concatenate((relabeled_ids, new_ids))
+    sources, sinks = get_conflict_edges(cf_graph.nodes, pattern_ids=changed_ids)
+    cf_graph.update_edges(changed_ids, sources, sinks)
 
-                # add edge between conflicting clones
-                cf_graph.add_edge(node1, node2)
+    logger.info('Updated conflict graph with {} relabeled and {} new nodes to {} evolutionary conflicts.'.format(
+        len(relabeled_ids), len(new_ids), cf_graph.size()))
 
-    logger.info('Created conflict graph with {} nodes of weight {:.2f} and {} evolutionary conflicts.'.format(
-        cf_graph.order(), sum(data['weight'] for _, data in cf_graph.nodes_iter(data=True)), cf_graph.size()))
+    changed = np.zeros(cf_graph.order(), dtype=bool)
+    changed[changed_ids] = True
+    for neighbor_ids in previous_neighbor_ids:
+        changed[neighbor_ids] = True
 
-    return cf_graph
+    return changed
 
 
 def _subsets(mp):
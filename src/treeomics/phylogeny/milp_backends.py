@@ -0,0 +1,271 @@
+#!/usr/bin/python
+"""Common interface to the MILP solvers (CPLEX or HiGHS) for binary minimization problems with covering rows"""
+import logging
+import numpy as np
+from scipy.sparse import csr_matrix
+try:
+    import cplex as cp
+except ImportError:     # HiGHS via scipy does not require a CPLEX license
+    cp = None
+try:
+    from scipy.optimize import milp, LinearConstraint, Bounds
+except ImportError:     # scipy < 1.9
+    milp = None
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+# names of the supported MILP solvers
+SOLVERS = ('cplex', 'highs')
+
+# has the missing support for start solutions in HiGHS already been reported?
+_ignored_starts_reported = False
+
+
+def create_milp(solver, objective_function, names=None, time_limit=None, threads=None, quiet=False):
+    """
+    Create a MILP of binary variables minimizing the given objective function
+    :param solver: name of the MILP solver (see SOLVERS)
+    :param objective_function: array with the (non-negative) coefficient of each variable
+    :param names: name of each variable (None: variables are only given by their index)
+    :param time_limit: time limit for MILP solver in seconds
+    :param threads: number of threads of the MILP solver (None: solver default)
+    :param quiet: suppress the output of the MILP solver
+    :return: MILP with the interface of CplexMILP
+    """
+
+    if solver == 'cplex':
+        return CplexMILP(objective_function, names, time_limit=time_limit, threads=threads, quiet=quiet)
+    elif solver == 'highs':
+        return HighsMILP(objective_function, names, time_limit=time_limit, threads=threads, quiet=quiet)
+    else:
+        raise AttributeError('Unknown MILP solver {}! Available solvers: {}'.format(solver, ', '.join(SOLVERS)))
+
+
+class CplexMILP(object):
+    """
+    MILP solved by IBM ILOG CPLEX
+    """
+
+    def __init__(self, objective_function, names=None, time_limit=None, threads=None, quiet=False):
+        """
+        :param objective_function: array with the coefficient of each binary variable (minimized)
+        :param names: name of each variable (None: variables are only given by their index)
+        :param time_limit: time limit for MILP solver in seconds
+        :param threads: number of threads of the MILP solver (None: solver default)
+        :param quiet: suppress the output of the MILP solver
+        """
+
+        if cp is None:
+            raise RuntimeError('The python API of CPLEX is not installed! Use the open-source MILP solver '
+                               'HiGHS (--solver highs) or the exact solver for few samples (--solver laminar) instead.')
+
+        self.lp = cp.Cplex()
+        self.no_variables = len(objective_function)
+        if quiet:
+            # lp.set_error_stream(None)
+            # lp.set_warning_stream(None)
+            self.lp.set_results_stream(None)
+            self.lp.set_log_stream(None)
+
+        # set objective function which is the minimum number of positions with a sequencing error
+        self.lp.objective.set_sense(self.lp.objective.sense.minimize)
+        # lp.parameters.mip.tolerances.absmipgap.set(1e-15)
+        # lp.parameters.mip.tolerances.mipgap.set(1e-15)
+        # lp.parameters.simplex.tolerances.optimality.set(1e-09)
+
+        # set time limit for MILP solver
+        self.set_time_limit(time_limit)
+        if threads is not None:
+            self.lp.parameters.threads.set(threads)
+
+        # column types and names
+        ctypes = ['B' for _ in range(self.no_variables)]
+        if names is not None:
+            self.lp.variables.add(obj=np.asarray(objective_function, dtype=np.float64).tolist(), types=ctypes,
+                                  names=list(names))
+        else:
+            self.lp.variables.add(obj=np.asarray(objective_function, dtype=np.float64).tolist(), types=ctypes)
+
+    def set_objective(self, objective_function):
+        """
+        Replace the coefficients of all variables in the objective function (e.g. for another replicate)
+        :param objective_function: array with the coefficient of each binary variable (minimized)
+        """
+
+        self.lp.objective.set_linear(list(enumerate(np.asarray(objective_function, dtype=np.float64).tolist())))
+
+    def set_time_limit(self, time_limit):
+        """
+        :param time_limit: time limit for the next solve in seconds (None: no limit)
+        """
+
+        if time_limit is not None:
+            self.lp.parameters.timelimit.set(time_limit)
+        else:
+            self.lp.parameters.timelimit.reset()
+
+    def add_constraints(self, constraints, row_names=None):
+        """
+        Add covering rows: the sum of the given variables needs to be at least one
+        :param constraints: LHS (left hand side) of the rows given by the variable indices and their coefficients
+        :param row_names: names of the rows (None: rows are only given by their index)
+        """
+
+        row_rhss = [1 for _ in range(len(constraints))]     # 1 is the RHS in all constraints
+        row_senses = ['G' for _ in range(len(constraints))]     # greater equal is used in all constraints
+        if row_names is not None:
+            self.lp.linear_constraints.add(lin_expr=constraints, senses=row_senses, rhs=row_rhss, names=row_names)
+        else:
+            self.lp.linear_constraints.add(lin_expr=constraints, senses=row_senses, rhs=row_rhss)
+
+    def set_start(self, solution):
+        """
+        Warm start the next solve (replaces any previous start solution)
+        :param solution: boolean array of the variables set to one in a feasible solution
+        """
+
+        if self.lp.MIP_starts.get_num() > 0:
+            self.lp.MIP_starts.delete()
+        self.lp.MIP_starts.add(cp.SparsePair(ind=list(range(self.no_variables)),
+                                             val=np.asarray(solution, dtype=float).tolist()),
+                               self.lp.MIP_starts.effort_level.auto)
+
+    def solve(self):
+        """
+        Solve the Integer Linear Program (ILP)
+        :return: boolean array of the variables set to one (None if no feasible solution was found), objective value,
+                 solution status
+        """
+
+        self.lp.solve()
+        sol = self.lp.solution       # obtain solution
+
+        if not sol.is_primal_feasible():
+            return None, None, sol.status[sol.get_status()]
+
+        # column solution values
+        solution = np.array([round(val, 5) != 0 for val in sol.get_values()], dtype=bool)
+
+        return solution, sol.get_objective_value(), sol.status[sol.get_status()]
+
+
+class HighsMILP(object):
+    """
+    MILP solved by the open-source solver HiGHS (via scipy.optimize.milp); the problem is passed anew to HiGHS for
+    each solve and start solutions are not supported by the scipy interface
+    """
+
+    def __init__(self, objective_function, names=None, time_limit=None, threads=None, quiet=False):
+        """
+        :param objective_function: array with the coefficient of each binary variable (minimized)
+        :param names: name of each variable (not used by HiGHS)
+        :param time_limit: time limit for MILP solver in seconds
+        :param threads: number of threads of the MILP solver (not supported by scipy)
+        :param quiet: suppress the output of the MILP solver
+        """
+
+        if milp is None:
+            raise RuntimeError('The MILP solver HiGHS requires scipy 1.9 or newer!')
+
+        self.objective_function = np.asarray(objective_function, dtype=np.float64)
+        self.time_limit = time_limit
+        self.quiet = quiet
+        self.rows = []
+        self.cols = []
+        self.no_rows = 0
+        # constraint matrix of the previous solve
+        self.lhs = None
+
+    def set_objective(self, objective_function):
+        """
+        Replace the coefficients of all variables in the objective function (e.g. for another replicate)
+        :param objective_function: array with the coefficient of each binary variable (minimized)
+        """
+
+        self.objective_function = np.asarray(objective_function, dtype=np.float64)
+
+    def set_time_limit(self, time_limit):
+        """
+        :param time_limit: time limit for the next solve in seconds (None: no limit)
+        """
+
+        self.time_limit = time_limit
+
+    def add_constraints(self, constraints, row_names=None):
+        """
+        Add covering rows: the sum of the given variables needs to be at least one
+        :param constraints: LHS (left hand side) of the rows given by the variable indices and their coefficients
+        :param row_names: names of the rows (not used by HiGHS)
+        """
+
+        for col_ids, coefficients in constraints:
+            assert all(coefficient == 1 for coefficient in coefficients), 'Only covering rows are supported.'
+            self.rows.extend(self.no_rows for _ in col_ids)
+            self.cols.extend(col_ids)
+            self.no_rows += 1
+
+    def set_start(self, solution):
+        """
+        Start solutions are not supported by the scipy interface to HiGHS and are ignored
+        :param solution: boolean array of the variables set to one in a feasible solution
+        """
+
+        global _ignored_starts_reported
+        if not _ignored_starts_reported:
+            logger.debug('Start solutions are ignored by HiGHS; warm starts apply to CPLEX only.')
+            _ignored_starts_reported = True
+
+    def solve(self):
+        """
+        Solve the Integer Linear Program (ILP)
+        :return: boolean array of the variables set to one (None if no feasible solution was found), objective value,
+                 solution status
+        """
+
+        n = len(self.objective_function)
+        constraints = []
+        if self.no_rows > 0:
+            if self.lhs is None or self.lhs.shape[0] != self.no_rows:
+                self.lhs = csr_matrix((np.ones(len(self.cols)), (self.rows, self.cols)), shape=(self.no_rows, n))
+            constraints.append(LinearConstraint(self.lhs, lb=1, ub=np.inf))
+
+        # HiGHS treats coefficients of 1e20 and above as infinite; hence the objective is normalized
+        scaling_factor = np.max(np.abs(self.objective_function)) if n > 0 else 0.0
+        if scaling_factor == 0:
+            scaling_factor = 1.0
+
+        options = dict(disp=not self.quiet)
+        if self.time_limit is not None:
+            options['time_limit'] = self.time_limit
+
+        res = milp(self.objective_function / scaling_factor, constraints=constraints, integrality=np.ones(n),
+                   bounds=Bounds(0, 1), options=options)
+
+        if res.x is None:
+            return None, None, _get_highs_status(res.status, False)
+
+        solution = np.round(res.x) != 0
+
+        return solution, float(np.dot(self.objective_function, solution)), _get_highs_status(res.status, True)
+
+
+def _get_highs_status(status, feasible):
+    """
+    :param status: status code of scipy.optimize.milp
+    :param feasible: was a feasible solution found?
+    :return: name of the solution status
+    """
+
+    if status == 0:
+        return 'optimal'
+    elif status == 1:
+        return 'time_limit_feasible' if feasible else 'time_limit_infeasible'
+    elif status == 2:
+        return 'infeasible'
+    elif status == 3:
+        return 'unbounded'
+    else:
+        return 'error'
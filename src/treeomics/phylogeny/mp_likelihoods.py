@@ -0,0 +1,469 @@
+#!/usr/bin/python
+"""Vectorized computation of the log likelihoods of the mutation patterns of the variants"""
+import logging
+import math
+import heapq
+import multiprocessing as mp
+import numpy as np
+import utils.int_settings as def_sets
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+# data shared by all chunks computed in a (worker) process
+_worker_data = None
+
+
+def get_pattern_matrix(idx_to_mp, n):
+    """
+    Binary matrix encoding the mutation patterns in the order of their column ids
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param n: number of samples
+    :return: matrix (#mps x n) where an entry is 1 if the variant is present in the sample in this pattern
+    """
+
+    pattern_mat = np.zeros((len(idx_to_mp), n), dtype=np.float64)
+    for mp_idx, node in enumerate(idx_to_mp):
+        pattern_mat[mp_idx, list(node)] = 1.0
+
+    return pattern_mat
+
+
+def get_pattern_masks(idx_to_mp, n):
+    """
+    Integer bitmasks of the mutation patterns in the order of their column ids
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param n: number of samples
+    :return: array of the bitmasks (None if the samples do not fit into 63 bits)
+    """
+
+    if n > 63:
+        return None
+
+    return np.array([sum(1 << sa_idx for sa_idx in node) for node in idx_to_mp], dtype=np.int64)
+
+
+def get_pattern_block(idx_to_mp, pattern_masks, start, end, n):
+    """
+    Binary matrix encoding the mutation patterns of a block of column ids
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param pattern_masks: array of the bitmasks of the patterns (None: derived from the patterns)
+    :param start: first column id of the block
+    :param end: column id after the block
+    :param n: number of samples
+    :return: matrix (#mps in block x n) where an entry is 1 if the variant is present in the sample in this pattern
+    """
+
+    if pattern_masks is None:
+        return get_pattern_matrix(idx_to_mp[start:end], n)
+
+    return ((pattern_masks[start:end, np.newaxis] >> np.arange(n, dtype=np.int64)) & 1).astype(np.float64)
+
+
+def get_log_posteriors(log_p01, mut_ids, n):
+    """
+    Collect the posterior log probabilities of the given variants
+    :param log_p01: posterior: log probability that VAF = 0, log probability that VAF > 0
+    :param mut_ids: indices of the variants
+    :param n: number of samples
+    :return: log probabilities of absence and presence (#variants x n x 2)
+    """
+
+    return np.array([[log_p01[mut_idx][sa_idx] for sa_idx in range(n)] for mut_idx in mut_ids],
+                    dtype=np.float64).reshape(len(mut_ids), n, 2)
+
+
+def clip_log_posteriors(lp01):
+    """
+    Clip the posterior log probabilities by the maximal presence and absence probabilities
+    :param lp01: log probabilities of absence and presence (#variants x n x 2)
+    :return: clipped log probabilities of absence and of presence (#variants x n)
+    """
+
+    # presence probability of a variant for calculating reliability score
+    # is upper bounded because the same variant could have been independently acquired twice
+    clipped_lp1 = np.minimum(lp01[:, :, 1], math.log(def_sets.MAX_PRE_PROB))
+    # absence probability of a variant for calculating reliability score
+    # should be upper bounded because the variant could have been lost by LOH
+    clipped_lp0 = np.minimum(lp01[:, :, 0], math.log(def_sets.MAX_ABS_PROB))
+
+    return clipped_lp0, clipped_lp1
+
+
+def get_chunk_size(no_mps):
+    """
+    Number of variants whose pattern log likelihoods are computed at once
+    :param no_mps: number of mutation patterns
+    :return: number of variants per chunk
+    """
+
+    return max(1, def_sets.LH_CHUNK_ENTRIES // max(1, no_mps))
+
+
+def calculate_log_likelihoods(clipped_lp0, clipped_lp1, pattern_mat):
+    """
+    The log likelihood of a pattern is the sum of the clipped log probabilities of presence over the samples
+    in the pattern and of absence over the remaining samples. Hence, the full matrix is given by two matrix products.
+    :param clipped_lp0: clipped log probabilities of absence (#variants x n)
+    :param clipped_lp1: clipped log probabilities of presence (#variants x n)
+    :param pattern_mat: binary matrix encoding the mutation patterns (#mps x n)
+    :return: log likelihood matrix (#variants x #mps)
+    """
+
+    return clipped_lp1.dot(pattern_mat.T) + clipped_lp0.dot(1.0 - pattern_mat.T)
+
+
+def calculate_blocked_log_likelihoods(clipped_lp0, clipped_lp1, idx_to_mp, pattern_masks):
+    """
+    Compute the log likelihood matrix by the matrix products of calculate_log_likelihoods on blocks of columns
+    such that the binary pattern matrix of each block has at most LH_CHUNK_ENTRIES entries
+    :param clipped_lp0: clipped log probabilities of absence (#variants x n)
+    :param clipped_lp1: clipped log probabilities of presence (#variants x n)
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param pattern_masks: array of the bitmasks of the patterns (None: derived from the patterns)
+    :return: log likelihood matrix (#variants x #mps)
+    """
+
+    n = clipped_lp0.shape[1]
+    block_size = max(1, def_sets.LH_CHUNK_ENTRIES // max(1, n))
+    log_mls = np.empty((clipped_lp0.shape[0], len(idx_to_mp)))
+    for start in range(0, len(idx_to_mp), block_size):
+        end = min(start + block_size, len(idx_to_mp))
+        log_mls[:, start:end] = calculate_log_likelihoods(
+            clipped_lp0, clipped_lp1, get_pattern_block(idx_to_mp, pattern_masks, start, end, n))
+
+    return log_mls
+
+
+def approximate_underflows(log_mls, lp01, pattern_mat, mut_ids, idx_to_mp, sample_names, mut_keys, gene_names=None):
+    """
+    Log likelihoods of exactly zero are numerical artifacts; replace them in place by an approximation
+    ignoring second order terms
+    :param log_mls: log likelihood matrix (#variants x #mps) of the variants in mut_ids
+    :param lp01: unclipped posterior log probabilities (#variants x n x 2) of the variants in mut_ids
+    :param pattern_mat: binary matrix encoding the mutation patterns (#mps x n); derived from the patterns if None
+    :param mut_ids: indices of the variants
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param sample_names:
+    :param mut_keys: list with information about the variant
+    :param gene_names: list with the names of the genes in which the variant occurred
+    """
+
+    n = len(sample_names)
+    not_max_pre_llh = 1.0 - math.log(def_sets.MAX_PRE_PROB)
+    not_max_abs_llh = 1.0 - math.log(def_sets.MAX_ABS_PROB)
+
+    for row, mp_idx in zip(*np.nonzero(log_mls == 0.0)):
+
+        node = idx_to_mp[mp_idx]
+        presence = pattern_mat[mp_idx] if pattern_mat is not None else get_pattern_matrix([node], n)[0]
+        # sum probability
+        log_ml = (np.exp(np.maximum(lp01[row, :, 0], not_max_pre_llh)).dot(presence)
+                  + np.exp(np.maximum(lp01[row, :, 1], not_max_abs_llh)).dot(1.0 - presence))
+        log_ml = np.log1p(-log_ml)      # calculates log(1+argument)
+
+        mut_idx = mut_ids[row]
+        logger.debug('Approximated log probability of variant {} having pattern {} by {:.2e}.'.format(
+            gene_names[mut_idx] if gene_names is not None else mut_keys[mut_idx], node, log_ml))
+        if log_ml == 0.0:
+            if len(node) == 0 or len(node) == 1 or len(node) == n:
+                logger.debug('Underflow warning. Set probability to minimal float value!')
+            else:
+                logger.warn('Underflow error. Set probability to minimal float value!')
+            log_ml = -200
+
+        assert log_ml < 0.0, ('Underflow error while calculating the probability that the ' +
+                              'variant {} does not have pattern {}.'.format(
+                               mut_keys[mut_idx], ', '.join(sample_names[sa_idx] for sa_idx in node)))
+
+        log_mls[row, mp_idx] = log_ml
+
+
+def _init_worker(idx_to_mp, pattern_mat, sample_names, pattern_masks=None):
+    """
+    Provide the data shared by all chunks to a worker process
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param pattern_mat: binary matrix encoding the mutation patterns (None if computed in blocks of columns)
+    :param sample_names:
+    :param pattern_masks: array of the bitmasks of the patterns for the blocks of columns
+    """
+
+    global _worker_data
+    _worker_data = (idx_to_mp, pattern_mat, sample_names, pattern_masks)
+
+
+def _compute_chunk(task):
+    """
+    Compute the log likelihoods of all mutation patterns for a chunk of variants and
+    the chunk's contributions to the reliability scores
+    :param task: log probabilities of the variants (#variants x n x 2), their keys, their gene names,
+                 their multiplicities
+    :return: log likelihood matrix (#variants x #mps), summed contributions per pattern
+    """
+
+    idx_to_mp, pattern_mat, sample_names, pattern_masks = _worker_data
+    lp01, chunk_keys, chunk_genes, multiplicities = task
+
+    clipped_lp0, clipped_lp1 = clip_log_posteriors(lp01)
+    if pattern_mat is not None:
+        log_mls = calculate_log_likelihoods(clipped_lp0, clipped_lp1, pattern_mat)
+    else:       # pattern matrix is computed in blocks of columns
+        log_mls = calculate_blocked_log_likelihoods(clipped_lp0, clipped_lp1, idx_to_mp, pattern_masks)
+
+    # numerical artifacts are corrected only where they occur (for the whole chunk at once)
+    approximate_underflows(log_mls, lp01, pattern_mat, range(len(chunk_keys)), idx_to_mp, sample_names, chunk_keys,
+                           gene_names=chunk_genes)
+
+    return log_mls, get_neg_log_absence_probs(log_mls, multiplicities=multiplicities)
+
+
+def _compute_most_likely_chunk(task):
+    """
+    Compute the k most likely mutation patterns and their log likelihoods for a chunk of variants
+    :param task: log probabilities of the variants (#variants x n x 2), their keys, their gene names,
+                 their multiplicities (not used), k, covered probability mass
+    :return: list of the most likely patterns and array of their log likelihoods for each variant
+    """
+
+    _, _, sample_names, _ = _worker_data
+    lp01, chunk_keys, chunk_genes, _, k, mass = task
+    n = len(sample_names)
+
+    clipped_lp0, clipped_lp1 = clip_log_posteriors(lp01)
+    results = list()
+    for row in range(len(chunk_keys)):
+        nodes = get_most_likely_patterns(clipped_lp0[row], clipped_lp1[row], k=k, mass=mass)
+
+        # likelihoods are calculated as in the full solution space such that the weights are identical
+        pattern_mat = get_pattern_matrix(nodes, n)
+        log_mls = calculate_log_likelihoods(clipped_lp0[row:row+1], clipped_lp1[row:row+1], pattern_mat)
+        approximate_underflows(log_mls, lp01[row:row+1], pattern_mat, [row], nodes, sample_names, chunk_keys,
+                               gene_names=chunk_genes)
+        results.append((nodes, log_mls[0]))
+
+    return results
+
+
+def _map_chunks(func, tasks, idx_to_mp, pattern_mat, sample_names, no_processes, pattern_masks=None):
+    """
+    Apply the given function to all chunks either in this process or in a pool of worker processes;
+    results are returned in the order of the chunks such that their reduction is deterministic
+    :param func: function applied to each chunk
+    :param tasks: generator of the chunk data
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param pattern_mat: binary matrix encoding the mutation patterns
+    :param sample_names:
+    :param no_processes: number of worker processes
+    :param pattern_masks: array of the bitmasks of the patterns for the blocks of columns
+    :return: generator of the results of the chunks
+    """
+
+    if no_processes is None or no_processes <= 1:
+        _init_worker(idx_to_mp, pattern_mat, sample_names, pattern_masks)
+        for task in tasks:
+            yield func(task)
+
+    else:
+        pool = mp.Pool(processes=no_processes, initializer=_init_worker,
+                       initargs=(idx_to_mp, pattern_mat, sample_names, pattern_masks))
+        try:
+            for result in pool.imap(func, tasks):
+                yield result
+        finally:
+            pool.terminate()
+
+
+def _generate_tasks(lp01, chunk_size, mut_keys, gene_names, multiplicities, *args):
+    """
+    Split the given variants into chunks
+    :return: generator of chunk data: log probabilities, keys, gene names and multiplicities of the variants,
+             further arguments
+    """
+
+    for start in range(0, lp01.shape[0], chunk_size):
+        end = start + chunk_size
+        yield ((lp01[start:end], mut_keys[start:end], gene_names[start:end] if gene_names is not None else None,
+                multiplicities[start:end] if multiplicities is not None else None) + args)
+
+
+def iter_log_likelihoods(lp01, idx_to_mp, sample_names, mut_keys, gene_names=None, multiplicities=None,
+                         no_processes=1):
+    """
+    Compute the log likelihoods of all given mutation patterns for all given variants in chunks of variants
+    :param lp01: posterior log probabilities that VAF = 0 and that VAF > 0 of the variants (#variants x n x 2)
+    :param idx_to_mp: list of column ids mapping to the corresponding mutation pattern
+    :param sample_names:
+    :param mut_keys: list with information about the variants
+    :param gene_names: list with the names of the genes in which the variants occurred
+    :param multiplicities: number of times each variant is counted in the reliability scores (once by default)
+    :param no_processes: number of processes computing the chunks in parallel
+    :return: generator of chunks: first row of the chunk, log likelihood matrix (#variants in chunk x #mps),
+             summed contributions of the chunk's variants to the reliability scores of the patterns
+    """
+
+    n = len(sample_names)
+    if len(idx_to_mp) * n <= def_sets.LH_CHUNK_ENTRIES:
+        pattern_mat = get_pattern_matrix(idx_to_mp, n)
+        pattern_masks = None
+    else:
+        # binary pattern matrix exceeds the memory bound; the matrix products are computed on blocks of columns
+        logger.info('Compute the likelihoods of the {} mutation patterns in blocks of patterns.'.format(
+            len(idx_to_mp)))
+        pattern_mat = None
+        pattern_masks = get_pattern_masks(idx_to_mp, n)
+
+    chunk_size = get_chunk_size(len(idx_to_mp))
+    tasks = _generate_tasks(lp01, chunk_size, mut_keys, gene_names, multiplicities)
+    for chunk_idx, (log_mls, scores) in enumerate(
+            _map_chunks(_compute_chunk, tasks, idx_to_mp, pattern_mat, sample_names, no_processes,
+                        pattern_masks=pattern_masks)):
+
+        yield chunk_idx * chunk_size, log_mls, scores
+
+
+def get_most_likely_patterns(clipped_lp0, clipped_lp1, k=None, mass=None):
+    """
+    Enumerate the k most likely mutation patterns of a variant in decreasing order of their likelihood without
+    generating all 2^n patterns: the log likelihood of a pattern is a sum of independent choices per sample and
+    hence each pattern is given by the most likely pattern where the choices in a subset of samples are flipped;
+    the flipped subsets are explored best-first by their costs (loss in log likelihood) in O(n log n + k log k)
+    Alternatively (or additionally) the enumeration stops as soon as the generated patterns cover the given
+    fraction of the total probability mass of all 2^n patterns: prod_s (p0_s + p1_s)
+    :param clipped_lp0: clipped log probabilities of absence of the variant in each sample
+    :param clipped_lp1: clipped log probabilities of presence of the variant in each sample
+    :param k: maximal number of mutation patterns
+    :param mass: fraction of the total probability mass that needs to be covered by the patterns
+    :return: list of the most likely mutation patterns
+    """
+
+    n = len(clipped_lp0)
+    ml_presence = clipped_lp1 > clipped_lp0
+    ml_node = frozenset(int(sa_idx) for sa_idx in np.nonzero(ml_presence)[0])
+    nodes = [ml_node]
+    if n == 0:
+        return nodes
+
+    # cost of flipping the most likely choice in each sample, in increasing order
+    flip_costs = np.abs(clipped_lp1 - clipped_lp0)
+    order = np.argsort(flip_costs, kind='mergesort')
+    flip_costs = flip_costs[order].tolist()
+
+    # log of the fraction of the total probability mass covered by the most likely pattern
+    log_ml_fraction = -sum(math.log1p(math.exp(-flip_cost)) for flip_cost in flip_costs)
+    covered = math.exp(log_ml_fraction)
+
+    # each subset of flipped samples (given by their positions in the above order) is generated exactly once from
+    # its parent subset either by adding the next position or by replacing its last position with the next position
+    # ties are broken by the order in which the subsets were generated
+    heap = [(flip_costs[0], 0, (0,))]
+    no_generated = 1
+    while len(heap) > 0 and (k is None or len(nodes) < k) and (mass is None or covered < mass):
+        cost, _, flips = heapq.heappop(heap)
+        nodes.append(ml_node.symmetric_difference(int(order[pos]) for pos in flips))
+        covered += math.exp(log_ml_fraction - cost)
+
+        last = flips[-1]
+        if last + 1 < n:
+            heapq.heappush(heap, (cost + flip_costs[last+1], no_generated, flips + (last+1,)))
+            heapq.heappush(heap, (cost - flip_costs[last] + flip_costs[last+1], no_generated+1,
+                                  flips[:-1] + (last+1,)))
+            no_generated += 2
+
+    return nodes
+
+
+def iter_most_likely_patterns(lp01, k, sample_names, mut_keys, gene_names=None, no_processes=1, mass=None):
+    """
+    Compute the k most likely mutation patterns and their log likelihoods for all given variants
+    :param lp01: posterior log probabilities that VAF = 0 and that VAF > 0 of the variants (#variants x n x 2)
+    :param k: maximal number of most likely mutation patterns per variant (None for no limit)
+    :param sample_names:
+    :param mut_keys: list with information about the variants
+    :param gene_names: list with the names of the genes in which the variants occurred
+    :param no_processes: number of processes computing the chunks in parallel
+    :param mass: only the most likely patterns covering this fraction of the probability mass are generated
+    :return: generator of list of the k most likely patterns and array of their log likelihoods for each variant
+    """
+
+    n = len(sample_names)
+
+    # with a probability mass target the number of patterns per variant is not known in advance
+    chunk_size = get_chunk_size((k if k is not None else def_sets.MASS_EXPECTED_NO_MPS) * max(n, 1))
+    tasks = _generate_tasks(lp01, chunk_size, mut_keys, gene_names, None, k, mass)
+    for results in _map_chunks(_compute_most_likely_chunk, tasks, None, None, sample_names, no_processes):
+        for nodes, log_mls in results:
+            yield nodes, log_mls
+
+
+def get_closed_form_patterns(clipped_lp0, clipped_lp1):
+    """
+    The most likely pattern of a variant and the n patterns differing from it in a single sample s have closed-form
+    log likelihoods: log P_ml and log P_ml - c_s where c_s is the cost of flipping the choice in sample s.
+    The total probability R of all remaining patterns is P_ml * (prod_s (1 + x_s) - 1 - sum_s x_s) with
+    x_s = e^(-c_s) and, since - log(1 - p) <= p / (1 - p), their summed contributions to the reliability scores
+    are bounded by R / (1 - R)
+    :param clipped_lp0: clipped log probabilities of absence (#variants x n)
+    :param clipped_lp1: clipped log probabilities of presence (#variants x n)
+    :return: presence in the most likely patterns (#variants x n), their log likelihoods (#variants),
+             flipping costs (#variants x n), bounds on the contributions of the remaining patterns (#variants)
+    """
+
+    ml_presence = clipped_lp1 > clipped_lp0
+    ml_log_mls = np.sum(np.maximum(clipped_lp0, clipped_lp1), axis=1)
+    flip_costs = np.abs(clipped_lp1 - clipped_lp0)
+
+    flip_ratios = np.exp(-flip_costs)
+    remainders = np.exp(ml_log_mls) * np.maximum(
+        0.0, np.expm1(np.sum(np.log1p(flip_ratios), axis=1)) - np.sum(flip_ratios, axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bounds = np.where(remainders < 1.0, remainders / (1.0 - remainders), np.inf)
+
+    return ml_presence, ml_log_mls, flip_costs, bounds
+
+
+def get_neg_log_absence_probs(log_mls, multiplicities=None):
+    """
+    Contribution of the variants to the reliability scores of the patterns: - log (1 - exp(log_ml))
+    :param log_mls: log likelihood matrix (#variants x #mps)
+    :param multiplicities: number of times each variant is counted (once by default)
+    :return: summed contributions per pattern (column)
+    """
+
+    if multiplicities is None:
+        return -np.sum(np.log(-np.expm1(log_mls)), axis=0)
+    else:
+        return -np.asarray(multiplicities, dtype=np.float64).dot(np.log(-np.expm1(log_mls)))
+
+
+def get_distinct_profiles(lp01, decimals=None):
+    """
+    Group variants with identical clipped posterior profiles since they have identical pattern likelihoods
+    :param lp01: posterior log probabilities that VAF = 0 and that VAF > 0 of the variants (#variants x n x 2)
+    :param decimals: if not None, profiles are considered identical if their clipped log probabilities agree
+                     when rounded to the given number of decimals; the likelihoods of the first variant in each
+                     group are then used for the whole group
+    :return: index of the first variant of each group (in the order of their occurrence),
+             group of each variant, number of variants in each group
+    """
+
+    m = lp01.shape[0]
+    if m == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    clipped_lp0, clipped_lp1 = clip_log_posteriors(lp01)
+    profiles = np.hstack((clipped_lp0, clipped_lp1))
+    if decimals is not None:
+        profiles = np.round(profiles, decimals)
+
+    _, first_ids, groups, counts = np.unique(profiles, axis=0, return_index=True, return_inverse=True,
+                                             return_counts=True)
+    groups = groups.reshape(m)
+
+    # order groups by their first occurrence
+    order = np.argsort(first_ids, kind='mergesort')
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+
+    return first_ids[order], ranks[groups], counts[order]
@@ -0,0 +1,315 @@
+#!/usr/bin/python
+"""Compact storage of the log likelihoods of the mutation patterns of each variant"""
+import logging
+import numpy as np
+import phylogeny.mp_likelihoods as mpl
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+
+class MPWeights(object):
+    """
+    Matrix (#variants x #mutation patterns) of the log probabilities that a variant has a mutation pattern
+    If the full solution space is explored, every entry is relevant and the matrix is stored densely;
+    otherwise only the most likely patterns of each variant are stored in compressed sparse row format
+    where the entries of a row are kept in the order in which they were added
+    In the full solution space, rows of confidently classified variants can be given in closed form: only their most
+    likely pattern (first entry) and the patterns differing from it in a single sample are stored sparsely together
+    with the clipped posterior profile from which any further entry is evaluated on demand
+    Variants with identical weights share a stored row (given by a map from variants to stored rows)
+    Rows can be appended such that further variants can be added later
+    """
+
+    def __init__(self, dense=True, no_cols=0, col_patterns=None):
+        """
+        Create an empty weight matrix
+        :param dense: store all entries of each row (full solution space) or only the given ones
+        :param no_cols: number of columns (mutation patterns) if known
+        :param col_patterns: mutation pattern of each column; required to evaluate closed-form rows
+        """
+
+        self.dense = dense
+        self.no_cols = no_cols
+        self.col_patterns = col_patterns
+
+        # appended but not yet consolidated rows and the maps of their variants to these rows
+        self._blocks = list()
+        self._no_rows = 0
+        self._no_stored_rows = 0
+
+        # map from variants to stored rows
+        self._row_map = np.zeros(0, dtype=np.int64)
+        # is a stored row kept in the dense storage, and its position in the dense or the sparse storage
+        self._stored_dense = np.zeros(0, dtype=bool)
+        self._stored_pos = np.zeros(0, dtype=np.int64)
+
+        # dense storage
+        self._values = np.zeros((0, no_cols), dtype=np.float64)
+
+        # compressed sparse row storage
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._data = np.zeros(0, dtype=np.float64)
+
+        # clipped posterior log probabilities of absence and presence of the closed-form rows (sparse storage)
+        self._cf_lp0 = None
+        self._cf_lp1 = None
+
+    def __len__(self):
+        """
+        :return: number of variants
+        """
+
+        return self._no_rows
+
+    @property
+    def no_stored_rows(self):
+        """
+        :return: number of distinct stored rows
+        """
+
+        return self._no_stored_rows
+
+    def _append_row_map(self, no_rows, row_map):
+        """
+        Record the map of the appended variants to the appended rows
+        :param no_rows: number of appended rows
+        :param row_map: row of each appended variant (None if each variant has its own row)
+        :return: map to the stored rows
+        """
+
+        if row_map is None:
+            row_map = np.arange(no_rows, dtype=np.int64)
+        else:
+            row_map = np.asarray(row_map, dtype=np.int64)
+            assert len(row_map) == 0 or (row_map.min() >= 0 and row_map.max() < no_rows), 'Invalid row map.'
+
+        row_map = row_map + self._no_stored_rows
+        self._no_rows += len(row_map)
+        self._no_stored_rows += no_rows
+
+        return row_map
+
+    @staticmethod
+    def _as_sparse_rows(rows):
+        """
+        :param rows: list of column ids of the mutation patterns and of the corresponding log likelihoods
+        :return: list of arrays of column ids and arrays of log likelihoods
+        """
+
+        return [(np.asarray(col_ids, dtype=np.int64), np.asarray(log_mls, dtype=np.float64))
+                for col_ids, log_mls in rows]
+
+    def add_rows(self, log_mls, row_map=None, closed_form=None):
+        """
+        Append the weights of further variants to the dense matrix
+        :param log_mls: log likelihood matrix (#rows x #mps)
+        :param row_map: row of each appended variant; by default each row corresponds to one variant
+        :param closed_form: further rows given in closed form which are appended after the rows in log_mls:
+                            list of column ids and log likelihoods of the most likely pattern (first) and of the
+                            patterns differing in a single sample, clipped log probabilities of absence and of presence
+        """
+
+        assert self.dense, 'Rows with all entries can only be added to a dense weight matrix.'
+        assert log_mls.shape[1] == self.no_cols, 'Number of mutation patterns does not match.'
+
+        if closed_form is not None:
+            assert self.col_patterns is not None, 'Closed-form rows require the patterns of the columns.'
+            rows, clipped_lp0, clipped_lp1 = closed_form
+            closed_form = (self._as_sparse_rows(rows), np.asarray(clipped_lp0, dtype=np.float64),
+                           np.asarray(clipped_lp1, dtype=np.float64))
+            no_cf_rows = len(rows)
+        else:
+            no_cf_rows = 0
+
+        row_map = self._append_row_map(log_mls.shape[0] + no_cf_rows, row_map)
+        self._blocks.append((np.array(log_mls, dtype=np.float64), closed_form, row_map))
+
+    def add_sparse_rows(self, rows, row_map=None):
+        """
+        Append the weights of further variants to the sparse matrix
+        :param rows: list of column ids of the mutation patterns and of the corresponding log likelihoods
+        :param row_map: row of each appended variant; by default each row corresponds to one variant
+        """
+
+        assert not self.dense, 'Individual entries can only be added to a sparse weight matrix.'
+
+        rows = self._as_sparse_rows(rows)
+        for col_ids, _ in rows:
+            if len(col_ids) > 0:
+                self.no_cols = max(self.no_cols, int(col_ids.max()) + 1)
+
+        row_map = self._append_row_map(len(rows), row_map)
+        self._blocks.append((None, (rows, None, None), row_map))
+
+    def _consolidate(self):
+        """
+        Merge the appended rows into the storage arrays
+        """
+
+        if len(self._blocks) == 0:
+            return
+
+        stored_dense = [self._stored_dense]
+        stored_pos = [self._stored_pos]
+        no_dense_rows = self._values.shape[0]
+        no_sparse_rows = len(self._indptr) - 1
+        rows = list()
+        for log_mls, sparse, _ in self._blocks:
+            if log_mls is not None:
+                stored_dense.append(np.ones(log_mls.shape[0], dtype=bool))
+                stored_pos.append(no_dense_rows + np.arange(log_mls.shape[0], dtype=np.int64))
+                no_dense_rows += log_mls.shape[0]
+            if sparse is not None:
+                stored_dense.append(np.zeros(len(sparse[0]), dtype=bool))
+                stored_pos.append(no_sparse_rows + np.arange(len(sparse[0]), dtype=np.int64))
+                no_sparse_rows += len(sparse[0])
+                rows += sparse[0]
+
+        self._stored_dense = np.concatenate(stored_dense)
+        self._stored_pos = np.concatenate(stored_pos)
+
+        if self.dense:
+            self._values = np.vstack([self._values] + [log_mls for log_mls, _, _ in self._blocks])
+
+            cf_blocks = [sparse for _, sparse, _ in self._blocks if sparse is not None]
+            if len(cf_blocks) > 0:
+                n = cf_blocks[0][1].shape[1]
+                if self._cf_lp0 is None:
+                    self._cf_lp0, self._cf_lp1 = np.zeros((0, n)), np.zeros((0, n))
+                self._cf_lp0 = np.vstack([self._cf_lp0] + [clipped_lp0 for _, clipped_lp0, _ in cf_blocks])
+                self._cf_lp1 = np.vstack([self._cf_lp1] + [clipped_lp1 for _, _, clipped_lp1 in cf_blocks])
+
+        if len(rows) > 0:
+            lengths = np.array([len(col_ids) for col_ids, _ in rows], dtype=np.int64)
+            self._indptr = np.concatenate((self._indptr, self._indptr[-1] + np.cumsum(lengths)))
+            self._indices = np.concatenate([self._indices] + [col_ids for col_ids, _ in rows])
+            self._data = np.concatenate([self._data] + [log_mls for _, log_mls in rows])
+
+        self._row_map = np.concatenate([self._row_map] + [row_map for _, _, row_map in self._blocks])
+        self._blocks = list()
+
+    def row(self, mut_idx):
+        """
+        :param mut_idx: variant index
+        :return: array of column ids and array of the corresponding log likelihoods of this variant
+                 (for closed-form rows only the stored entries are returned)
+        """
+
+        self._consolidate()
+        row_idx = self._row_map[mut_idx]
+        pos = self._stored_pos[row_idx]
+        if self._stored_dense[row_idx]:
+            return np.arange(self.no_cols), self._values[pos]
+        else:
+            start, end = self._indptr[pos], self._indptr[pos+1]
+            return self._indices[start:end], self._data[start:end]
+
+    def column_scores(self, counts=None):
+        """
+        Sum the contributions of the entries to the reliability scores over the variants: - log(1 - p);
+        the contributions of the dense rows are computed in chunks of the counted rows instead of being kept
+        as a second matrix of the size of the stored weights
+        :param counts: number of times each variant is counted (e.g. in a bootstrap sample); all once by default
+        :return: array of the summed contributions per column (mutation pattern)
+        """
+
+        self._consolidate()
+        # number of times each stored row is counted
+        row_counts = np.bincount(self._row_map, weights=counts, minlength=self._no_stored_rows)
+
+        dense_counts = np.zeros(self._values.shape[0])
+        dense_counts[self._stored_pos[self._stored_dense]] = row_counts[self._stored_dense]
+        sparse_counts = np.zeros(len(self._indptr) - 1)
+        sparse_counts[self._stored_pos[~self._stored_dense]] = row_counts[~self._stored_dense]
+
+        scores = np.zeros(self.no_cols)
+        if len(self._indices) > 0:
+            entry_counts = np.repeat(sparse_counts, np.diff(self._indptr))
+            counted = entry_counts != 0
+            scores += np.bincount(self._indices[counted], weights=-np.log(-np.expm1(self._data[counted])) *
+                                  entry_counts[counted], minlength=self.no_cols)
+        if self.dense:
+            counted_rows = np.nonzero(dense_counts)[0]
+            chunk_size = mpl.get_chunk_size(self.no_cols)
+            for start in range(0, len(counted_rows), chunk_size):
+                chunk = counted_rows[start:start+chunk_size]
+                scores += dense_counts[chunk].dot(-np.log(-np.expm1(self._values[chunk])))
+
+        return scores
+
+    def max_weight_columns(self, col_mask):
+        """
+        Find the most likely of the allowed mutation patterns of each variant; ties are broken by the order
+        of the entries in a row
+        :param col_mask: boolean array indicating the allowed columns
+        :return: array of the column ids (-1 if no allowed column is stored for a variant), array of their weights
+        """
+
+        self._consolidate()
+        col_mask = np.asarray(col_mask, dtype=bool)
+        ml_cols = np.full(self._no_stored_rows, -1, dtype=np.int64)
+        ml_weights = np.full(self._no_stored_rows, -np.inf)
+        allowed = np.nonzero(col_mask)[0]
+        dense_ids = np.nonzero(self._stored_dense)[0]
+        sparse_ids = np.nonzero(~self._stored_dense)[0]
+
+        if self.dense:
+            if len(dense_ids) > 0 and len(allowed) > 0:
+                values = self._values[self._stored_pos[dense_ids]]
+                best = np.argmax(values[:, allowed], axis=1)
+                ml_cols[dense_ids] = allowed[best]
+                ml_weights[dense_ids] = values[np.arange(len(dense_ids)), allowed[best]]
+
+            if len(sparse_ids) > 0 and len(allowed) > 0:
+                # closed-form rows: the most likely pattern is the first stored entry
+                starts = self._indptr[self._stored_pos[sparse_ids]]
+                dominant = col_mask[self._indices[starts]]
+                ml_cols[sparse_ids[dominant]] = self._indices[starts[dominant]]
+                ml_weights[sparse_ids[dominant]] = self._data[starts[dominant]]
+
+                # otherwise the allowed patterns are evaluated from the clipped posterior profile
+                if not dominant.all():
+                    cf_pos = self._stored_pos[sparse_ids[~dominant]]
+                    pattern_mat = mpl.get_pattern_matrix([self.col_patterns[col] for col in allowed],
+                                                         self._cf_lp0.shape[1])
+                    log_mls = mpl.calculate_log_likelihoods(self._cf_lp0[cf_pos], self._cf_lp1[cf_pos], pattern_mat)
+                    best = np.argmax(log_mls, axis=1)
+                    ml_cols[sparse_ids[~dominant]] = allowed[best]
+                    ml_weights[sparse_ids[~dominant]] = log_mls[np.arange(len(cf_pos)), best]
+        elif len(self._indices) > 0:
+            # maximum of the allowed entries in each non-empty stored row
+            entry_allowed = col_mask[self._indices]
+            masked = np.where(entry_allowed, self._data, -np.inf)
+            lengths = np.diff(self._indptr)
+            non_empty = lengths > 0
+            row_max = np.full(len(lengths), -np.inf)
+            row_max[non_empty] = np.maximum.reduceat(masked, self._indptr[:-1][non_empty])
+
+            # first allowed entry attaining the maximum of its row
+            entry_rows = np.repeat(np.arange(len(lengths)), lengths)
+            max_entries = np.flatnonzero(entry_allowed & (masked == row_max[entry_rows]))
+            max_rows, first = np.unique(entry_rows[max_entries], return_index=True)
+            best_cols = np.full(len(lengths), -1, dtype=np.int64)
+            best_cols[max_rows] = self._indices[max_entries[first]]
+
+            ml_cols[sparse_ids] = best_cols[self._stored_pos[sparse_ids]]
+            ml_weights[sparse_ids] = row_max[self._stored_pos[sparse_ids]]
+
+        return ml_cols[self._row_map], ml_weights[self._row_map]
+
+    def nbytes(self):
+        """
+        :return: memory required by the stored weights in bytes
+        """
+
+        self._consolidate()
+        nbytes = (self._values.nbytes + self._indptr.nbytes + self._indices.nbytes + self._data.nbytes +
+                  self._row_map.nbytes + self._stored_dense.nbytes + self._stored_pos.nbytes)
+        if self._cf_lp0 is not None:
+            nbytes += self._cf_lp0.nbytes + self._cf_lp1.nbytes
+
+        return nbytes
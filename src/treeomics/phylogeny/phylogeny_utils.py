@@ -8,9 +8,13 @@ import itertools
 import os
 from copy import deepcopy
 from collections import defaultdict
+import numpy as np
 import networkx as nx
 from networkx.readwrite import json_graph
 import json
+import utils.int_settings as def_sets
+from phylogeny.conflict_graph import ConflictGraph
+from phylogeny.laminar_index import LaminarIndex
 
 
 # get logger for application
@@ -70,19 +74,22 @@ class Phylogeny(object):
             if mp == founding_mp:
                 for mut in muts:
                     tree.edge[TREE_ROOT][mp]['muts'].add(mut)
-            elif len(mp) > 1:
-                _add_evolutionary_node(tree, founding_mp, mp, '', muts, confidence=confidence)
-            else:
-                # leaves (private mutations) are considered separately
-                pass
 
-        # Insert the leaves (samples) into the tree with all its private mutations
-        for sc_idx in range(
-                len(self.patient.sample_names) if self.patient.sc_names is None else len(self.patient.sc_names)):
-            # add leaves to the evolutionary tree
-            _add_evolutionary_node(tree, founding_mp, frozenset([sc_idx]),
-                                   self.patient.sample_names[sc_idx] if self.patient.sc_names is None
-                                   else self.patient.sc_names[sc_idx], unique_mutations[sc_idx])
+        # leaves (samples with their private mutations) and the parsimony-informative patterns form a laminar family;
+        # the parent of each clone is its smallest superset
+        leaves = [frozenset([sc_idx]) for sc_idx in range(len(founding_mp))]
+        lattice = LaminarIndex([mp for mp in updated_mps.keys() if 1 < len(mp) < len(founding_mp)] + leaves)
+        for mp in lattice.top_down():
+            parent = lattice.parent(mp)
+            if len(mp) > 1:
+                _add_evolutionary_node(tree, founding_mp if parent is None else parent, mp, '', updated_mps[mp],
+                                       confidence=confidence)
+            else:
+                # Insert the leaves (samples) into the tree with all its private mutations
+                sc_idx = next(iter(mp))
+                _add_evolutionary_node(tree, founding_mp if parent is None else parent, mp,
+                                       self.patient.sample_names[sc_idx] if self.patient.sc_names is None
+                                       else self.patient.sc_names[sc_idx], unique_mutations[sc_idx])
 
         # _add_subclone_mutations(tree, TREE_ROOT, set())
         # prepare tree for meaningful output in the figures
@@ -170,48 +177,103 @@ def create_conflict_graph(nodes, weights=None):
     :return conflict graph
     """
 
-    # create empty conflict graph
-    cf_graph = nx.Graph()
-    incompatible_mp = defaultdict(set)
+    patterns = list(nodes.keys())
+    sources, sinks = get_conflict_edges(patterns)
 
-    # since each mutation occurs at most once running through this is
-    # in O(m^2 * n) = O(|mutations|*|mutations|*|samples|) as
-    # the number of clones is bounded by the number of distinct mutations
-    for (node1, node2) in itertools.combinations(nodes.keys(), 2):
+    # only conflicting patterns are added (in the order of their first conflict)
+    endpoints = np.column_stack((sources, sinks)).ravel()
+    _, first_occurrences = np.unique(endpoints, return_index=True)
+    cf_nodes = endpoints[np.sort(first_occurrences)]
+    node_ids = np.zeros(len(patterns), dtype=np.int64)
+    node_ids[cf_nodes] = np.arange(len(cf_nodes))
 
-        # characters need to appear at least in two samples
-        # otherwise a conflict is not possible
-        if len(node1) < 2 or len(node2) < 2:
-            continue
+    cf_nodes = [patterns[pattern_idx] for pattern_idx in cf_nodes.tolist()]
+    if weights is not None:
+        cf_weights = [weights[node] for node in cf_nodes]
+    else:
+        cf_weights = [len(nodes[node]) for node in cf_nodes]
 
-        if len(node1.intersection(node2)) > 0:     # at least one sample where both characters are present (11)
+    cf_graph = ConflictGraph(cf_nodes, cf_weights, node_ids[sources], node_ids[sinks], mutations=nodes)
 
-            # check if some characters are present in one clone but not in the other and visa versa
-            if len(node1.difference(node2)) > 0 and len(node2.difference(node1)) > 0:   # check for 01 and 10
-                # => conflict exists among characters of clone 1 and clone 2
+    logger.info('Created conflict graph with {} nodes of weight {:.2f} and {} evolutionary conflicts.'.format(
+        cf_graph.order(), np.sum(cf_graph.weights), cf_graph.size()))
 
-                incompatible_mp[node1].add(node2)
-                incompatible_mp[node2].add(node1)
+    return cf_graph
 
-                if node1 not in cf_graph:
-                    if weights is not None:
-                        cf_graph.add_node(node1, weight=weights[node1], muts=deepcopy(nodes[node1]))
-                    else:
-                        cf_graph.add_node(node1, weight=len(nodes[node1]), muts=deepcopy(nodes[node1]))
 
-                if node2 not in cf_graph:
-                    if weights is not None:
-                        cf_graph.add_node(node2, weight=weights[node2], muts=deepcopy(nodes[node2]))
-                    else:
-                        cf_graph.add_node(node2, weight=len(nodes[node2]), muts=deepcopy(nodes[node2]))
+def get_pattern_bitmasks(patterns):
+    """
+    Encode mutation patterns as integer bitmasks
+    :param patterns: list of mutation patterns (frozensets of sample indices)
+    :return: array (#patterns x #words) of unsigned 64-bit integers where bit s % 64 of word s // 64 is set
+             if the pattern is present in sample s
+    """
 
-                # add edge between conflicting clones
-                cf_graph.add_edge(node1, node2)
+    pattern_ids = [pattern_idx for pattern_idx, pattern in enumerate(patterns) for _ in pattern]
+    sa_ids = np.array([sa_idx for pattern in patterns for sa_idx in pattern], dtype=np.uint64)
 
-    logger.info('Created conflict graph with {} nodes of weight {:.2f} and {} evolutionary conflicts.'.format(
-        cf_graph.order(), sum(data['weight'] for _, data in cf_graph.nodes_iter(data=True)), cf_graph.size()))
+    no_words = int(sa_ids.max()) // 64 + 1 if len(sa_ids) > 0 else 1
+    masks = np.zeros((len(patterns), no_words), dtype=np.uint64)
+    np.bitwise_or.at(masks, (pattern_ids, (sa_ids // np.uint64(64)).astype(np.int64)),
+                     np.left_shift(np.uint64(1), sa_ids % np.uint64(64)))
 
-    return cf_graph
+    return masks
+
+
+def get_conflict_edges(patterns, pattern_ids=None):
+    """
+    Find the evolutionary conflicts among the given mutation patterns: patterns a and b are conflicting if
+    a & b != 0 (present in a common sample) and a & ~b != 0 and b & ~a != 0 (each is present in a sample where
+    the other is absent); the bitmasks of blocks of patterns are compared with all subsequent patterns at once
+    :param patterns: list of mutation patterns (frozensets of sample indices)
+    :param pattern_ids: only find the conflicts of the patterns with these indices (None: all conflicts)
+    :return: arrays of the indices of the first and of the second pattern of each conflict in lexicographic order
+    """
+
+    # patterns present in less than two samples can not conflict with any other pattern
+    candidates = np.array([pattern_idx for pattern_idx, pattern in enumerate(patterns) if len(pattern) > 1],
+                          dtype=np.int64)
+    masks = get_pattern_bitmasks([patterns[pattern_idx] for pattern_idx in candidates])
+    no_candidates, no_words = masks.shape
+
+    if pattern_ids is None:
+        # compare each pattern only with the subsequent patterns
+        queries = np.arange(no_candidates)
+    else:
+        # compare the given patterns with all patterns; the conflicts among the given patterns are reported once
+        selected = np.zeros(len(patterns), dtype=bool)
+        selected[pattern_ids] = True
+        queries = np.flatnonzero(selected[candidates])
+    is_query = np.zeros(no_candidates, dtype=bool)
+    is_query[queries] = True
+
+    sources = [np.zeros(0, dtype=np.int64)]
+    sinks = [np.zeros(0, dtype=np.int64)]
+    block_size = max(1, def_sets.CONFLICT_BLOCK_ENTRIES // max(1, no_candidates * no_words))
+    for start in range(0, len(queries), block_size):
+        rows = queries[start:start+block_size]
+        first = rows[0] + 1 if pattern_ids is None else 0
+        block = masks[rows, np.newaxis, :]
+        others = masks[np.newaxis, first:, :]
+
+        conflicts = (np.any(block & others, axis=2) & np.any(block & ~others, axis=2) &
+                     np.any(others & ~block, axis=2))
+
+        block_rows, cols = np.nonzero(conflicts)
+        block_rows = rows[block_rows]
+        cols += first
+        # each pair is only reported once
+        once = (cols > block_rows) | ~is_query[cols]
+        block_rows, cols = block_rows[once], cols[once]
+        sources.append(candidates[np.minimum(block_rows, cols)])
+        sinks.append(candidates[np.maximum(block_rows, cols)])
+
+    sources, sinks = np.concatenate(sources), np.concatenate(sinks)
+    if pattern_ids is not None:
+        order = np.lexsort((sinks, sources))
+        sources, sinks = sources[order], sinks[order]
+
+    return sources, sinks
 
 
 def compute_graph_nodes(mps, sample_names, mut_names, present_p_values, absent_p_values,
@@ -334,53 +396,27 @@ def compute_graph_nodes(mps, sample_names, mut_names, present_p_values, absent_p
 
 def _add_evolutionary_node(tree, parent, mp, node_name, mutations, confidence=None):
     """
-
-    Find the right place in the tree to insert the new node (clone)
-    There is exactly one such place. Depth-first-search is used.
+    Insert the new node (clone) as child of its smallest superset in the tree; clones are inserted
+    after their supersets (see LaminarIndex) and hence no existing child needs to be moved below the new node
     :param tree:
-    :param parent:
+    :param parent: smallest superset of the clone in the tree
     :param mp:
     :param node_name:
     :param mutations:
     :param confidence: confidence in branching
-    :return:
     """
 
     # logger.debug('Parent {} - clone {} - mutations {}'.format(parent, clone, mutations))
-    # find a node where the given clone is a subset of the node's samples
-    # but none of its children is a superset of the given clone => insertion place is found
-    for child in tree.successors(parent):
-        if mp.issubset(child):
-            if _add_evolutionary_node(tree, child, mp, node_name, mutations, confidence=confidence):
-                return True
-
-    # clone is not a subset of any existing children
-    # hence, a new node has to be created on this level
     tree.add_node(mp, name=node_name, muts=mutations.union(tree.node[parent]['muts']))
     # add confidence value of this branching
     if confidence is not None and mp in confidence:
         tree.node[mp]['conf'] = confidence[mp]
 
-    # check if any of the existing children of the parent are subsets of the new node
-    new_grandchildren = set()
-    for child in tree.successors(parent):
-        if child.issubset(mp):
-            new_grandchildren.add(child)
-
-    for grandchild in new_grandchildren:
-        helper_mutations = tree[parent][grandchild]['muts']
-        tree.remove_edge(parent, grandchild)
-        tree.add_edge(mp, grandchild, muts=helper_mutations)
-        tree.node[grandchild]['muts'] = tree.node[grandchild]['muts'].union(mutations)
-        # logger.debug('{} became a child of {}.'.format(grandchild, clone))
-
     # insert edge to the newly added clone (node)
     tree.add_edge(parent, mp, muts=mutations)
     # logger.debug('Successfully inserted {} with {} mutations as child of {}.'.format(clone,
     #              len(tree.node[clone]['muts']), parent))
 
-    return True
-
 
 def _get_html_template():
 
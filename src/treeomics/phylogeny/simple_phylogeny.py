@@ -42,7 +42,10 @@ class SimplePhylogeny(Phylogeny):
         # dictionary of the individual mutation pattern scores, dict key is given by the mut_idx
         self.mp_weights = None
 
-    def find_max_compatible_tree(self, time_limit=None):
+        # name of the solver (cplex, highs, laminar or heuristic)
+        self.solver = 'cplex'
+
+    def find_max_compatible_tree(self, time_limit=None, solver='cplex'):
         """
         Find the largest set of compatible characters and create from this largest
         set a phylogenetic tree.
@@ -50,9 +53,12 @@ class SimplePhylogeny(Phylogeny):
         If the minimum coverage is not met, the variant status is unknown and both patterns (presence and
         absence) will be explored.
         :param time_limit: time limit for MILP solver in seconds
+        :param solver: name of the solver (cplex, highs, laminar or heuristic)
         :return inferred evolutionary tree
         """
 
+        self.solver = solver
+
         # compute various mutation patterns (nodes) and their reliability scores
         self.nodes, self.node_scores, self.mp_weights = determine_graph_nodes(
             self.patient, self.patient.sample_names, self.patient.mut_keys, self.patient.gene_names)
@@ -62,7 +68,8 @@ class SimplePhylogeny(Phylogeny):
 
         # translate the conflict graph into a minimum vertex cover problem
         # and solve this using integer linear programming
-        self.conflicting_nodes, _ = cps.solve_conflicting_phylogeny(self.cf_graph, time_limit=time_limit)
+        self.conflicting_nodes, _ = cps.solve_conflicting_phylogeny(self.cf_graph, time_limit=time_limit,
+                                                                    solver=solver)
 
         self.compatible_nodes = dict()
 
@@ -110,11 +117,11 @@ class SimplePhylogeny(Phylogeny):
 
         # Most reliable mutation patterns need to be identified before
         if self.compatible_nodes is None:
-            self.find_max_compatible_tree()
+            self.find_max_compatible_tree(solver=self.solver)
 
         node_frequencies = cps.solve_downsampled_binary_nodes(
             self.cf_graph, self.mp_weights, self.patient.shared_mutations,
-            no_replications, len(self.patient.sample_names))
+            no_replications, len(self.patient.sample_names), solver=self.solver)
 
         comp_node_frequencies = defaultdict(dict)
 
@@ -22,7 +22,7 @@ def create_raw_data_file(raw_data_filename, mutations, mut_pos, data=None, sampl
     :param raw_data_filename: output filename
     :param mutations: dictionary with all mutations mapping to the set of samples where it is present
     :param mut_pos: array of tuples with the mutation position (chr, start_pos, end_pos)
-    :param data:
+    :param data: conventional classification matrix of the variants (negative states are unknown)
     :param sample_names:
     """
 
@@ -120,7 +120,7 @@ def create_mutation_links_file(links_filename, phylogeny, mut_pos):
         links_file.write('# chr1 start1 end1 chr2 start2 end2 [options]\n')
 
         # run through all edges of conflicting mutation patterns
-        for source, sink in phylogeny.cf_graph.edges_iter():
+        for source, sink in phylogeny.cf_graph.edges():
 
             if source not in phylogeny.patient.mps or sink not in phylogeny.patient.mps:
                 # only generate the conflict links among the present and absent mutation patterns
@@ -155,7 +155,7 @@ def create_conflict_graph_files(cfg_nodes_filename, cfg_mutnode_labels_filename,
     :param phylogeny: instance of the class phylogeny
     :param gene_names:
     :param driver_pathways:
-    :param data:
+    :param data: conventional classification matrix of the variants (negative states are unknown)
     :param min_node_weight: minimal reliability score of a mutation pattern to be displayed
     :param max_no_mps: apply min_node_weight if there are more than this number of MPs in the data
     """
@@ -182,7 +182,7 @@ def _create_cfg_nodes_files(cfg_nodes_filename, cfg_mutnode_labels_filename, cfg
     :param phylogeny: data structure around the phylogenetic tree
     :param gene_names: gene names of the position of the mutation
     :param driver_pathways: is this mutation a known driver
-    :param data:
+    :param data: conventional classification matrix of the variants (negative states are unknown)
     :param min_node_weight: minimal reliability score of a mutation pattern to be displayed
     :param max_no_mps: apply min_node_weight if there are more than this number of MPs in the data
     :return: cfg_nodes: mapping from clones (nodes) to node id in the circos files
@@ -219,7 +219,7 @@ def _create_cfg_nodes_files(cfg_nodes_filename, cfg_mutnode_labels_filename, cfg
                     phylogeny.node_scores[node] < min_node_weight:
                 cfg_nodes_file.write('<{:.2f} 0 1 grey\n'.format(min_node_weight))
                 cfg_labels_file.write('n{} 0 1 {}-{} driver=0,conflicting=0,chosen=0,unknown=1\n'.format(
-                    node_idx, node_idx+1, len(phylogeny.cf_graph.nodes())))
+                    node_idx, node_idx+1, phylogeny.cf_graph.order()))
                 del cfg_nodes[node]
                 break
 
@@ -283,7 +283,7 @@ def create_mlh_graph_files(res_nodes_filename, res_mutnode_labels_filename, res_
     :param res_nodes_filename: output filename for the nodes
     :param res_mutnode_labels_filename: output filename for the labels of the mutation present in the node
     :param res_mutnode_data_filename: output filename for mutation pattern data in each clone
-    :param data: holds the detailed mutation data
+    :param data: conventional classification matrix of the variants (negative states are unknown)
     :param phylogeny: data structure around the phylogenetic tree
     :param gene_names: gene names of the position of the mutation
     :param driver_pathways: is this mutation a known driver
@@ -531,7 +531,7 @@ def _create_cfg_links_file(cfg_links_filename, phylogeny, cfg_nodes):
         links_file.write('# n1 start1 end1 n2 start2 end2 [options]\n')
 
         # run through all edges of conflicting clones
-        for source, sink in phylogeny.cf_graph.edges_iter():
+        for source, sink in phylogeny.cf_graph.edges():
 
             if source not in cfg_nodes or sink not in cfg_nodes:
                 # logger.debug('Edge endnode is not shown in the circos file and hence the link is also not depicted.')
@@ -540,9 +540,9 @@ def _create_cfg_links_file(cfg_links_filename, phylogeny, cfg_nodes):
             # write link to file
             links_file.write('n{} 0 {} '.format(
                 cfg_nodes[source],
-                len(phylogeny.cf_graph.node[source]['muts']) if 'muts' in phylogeny.cf_graph.node[source] else '1'))
+                len(phylogeny.cf_graph.mutations[source]) if phylogeny.cf_graph.mutations is not None else '1'))
             links_file.write('n{} 0 {}\n'.format(
                 cfg_nodes[sink],
-                len(phylogeny.cf_graph.node[sink]['muts'] if 'muts' in phylogeny.cf_graph.node[sink] else '1')))
+                len(phylogeny.cf_graph.mutations[sink]) if phylogeny.cf_graph.mutations is not None else '1'))
 
         logger.info('Circos conflict graph links file created: {}'.format(os.path.abspath(cfg_links_filename)))
@@ -376,7 +376,7 @@ def create_incompatible_mp_table(patient, filename, phylogeny, row_labels=None,
         return -1, -1
 
     x_length = ((-label_x_pos + 20) if row_labels is not None else 0) + (len(displayed_mutations) * width * 3)
-    y_length = (len(patient.data[0]) * (height+y_spacing) - y_spacing
+    y_length = (patient.cls_states.shape[1] * (height+y_spacing) - y_spacing
                 + (label_y_pos + 20 if column_labels is not None else 0))
 
     x_length += x_space + cb_width
@@ -400,7 +400,7 @@ def create_incompatible_mp_table(patient, filename, phylogeny, row_labels=None,
     for x_pos, mut_idx in enumerate(
             sorted(displayed_mutations, key=lambda k: (column_labels[k].lower() if column_labels is not None else k))):
 
-        for sa_idx, maf in enumerate(patient.data[mut_idx]):
+        for sa_idx, state in enumerate(patient.cls_states[mut_idx]):
 
             cov = float(patient.coverage[patient.mut_keys[mut_idx]][patient.sample_names[sa_idx]])
             if cov > 0:
@@ -408,12 +408,12 @@ def create_incompatible_mp_table(patient, filename, phylogeny, row_labels=None,
             else:
                 raw_maf = 0.0
 
-            if maf > 0:     # mutation is present
+            if state > 0:     # mutation is present
                 class_color = present_color
-            elif maf == POS_UNKNOWN:
+            elif state == POS_UNKNOWN:
                 # merge the two unknown categories when variants are displayed
                 class_color = unknown_color
-            elif maf == NEG_UNKNOWN:
+            elif state == NEG_UNKNOWN:
                 # merge the two unknown categories when variants are displayed
                 class_color = unknown_color
             else:
@@ -423,12 +423,12 @@ def create_incompatible_mp_table(patient, filename, phylogeny, row_labels=None,
             cov_color = plt.cm.Greens(math.log(cov, 10)/3 if 0 < cov < 1000 else 0.0 if cov <= 0.0 else 1.0)
 
             rect_maf = plt.Rectangle([(x_pos * width * 3) + 0,
-                                      (height+y_spacing) * (len(patient.data[mut_idx]) - sa_idx - 1)],
+                                      (height+y_spacing) * (patient.cls_states.shape[1] - sa_idx - 1)],
                                      width, height, linewidth=0, facecolor=maf_color)
             rect_cov = plt.Rectangle([(x_pos * width * 3) + 1,
-                                      (height+y_spacing) * (len(patient.data[mut_idx]) - sa_idx - 1)],
+                                      (height+y_spacing) * (patient.cls_states.shape[1] - sa_idx - 1)],
                                      width, height, linewidth=0, facecolor=cov_color)
-            box = plt.Rectangle([(x_pos * width * 3), (height+y_spacing) * (len(patient.data[mut_idx]) - sa_idx - 1)],
+            box = plt.Rectangle([(x_pos * width * 3), (height+y_spacing) * (patient.cls_states.shape[1] - sa_idx - 1)],
                                 width*2, height, linewidth=4, facecolor=None, edgecolor=class_color, clip_on=False)
             ax.add_patch(box)
             ax.add_patch(rect_maf)
@@ -439,13 +439,13 @@ def create_incompatible_mp_table(patient, filename, phylogeny, row_labels=None,
                         sa_idx in phylogeny.false_positives[mut_idx]:
 
                     af = plt.Rectangle([(x_pos * width * 3), (height+y_spacing) *
-                                        (len(patient.data[mut_idx]) - sa_idx - 1)],
+                                        (patient.cls_states.shape[1] - sa_idx - 1)],
                                        width*2, height/2, facecolor=absent_color, linewidth=0)
                     ax.add_patch(af)
 
                 elif mut_idx in phylogeny.false_negatives.keys() and sa_idx in phylogeny.false_negatives[mut_idx]:
                     af = plt.Rectangle([(x_pos * width * 3), (height+y_spacing) *
-                                        (len(patient.data[mut_idx]) - sa_idx - 1)],
+                                        (patient.cls_states.shape[1] - sa_idx - 1)],
                                        width*2, height/2, facecolor=present_color, linewidth=0)
                     ax.add_patch(af)
 
@@ -458,7 +458,7 @@ def create_incompatible_mp_table(patient, filename, phylogeny, row_labels=None,
         for x_pos, mut_idx in enumerate(sorted(displayed_mutations,
                                                key=lambda k: (column_labels[k].lower()))):
 
-            ax.text(x_pos * width * 3 + width+0.1, label_y_pos+(height+y_spacing) * (len(patient.data[mut_idx])),
+            ax.text(x_pos * width * 3 + width+0.1, label_y_pos+(height+y_spacing) * (patient.cls_states.shape[1]),
                     _format_gene_name(column_labels[mut_idx], max_length=12),
                     rotation='vertical', horizontalalignment='center', verticalalignment='bottom', fontsize=8)
 
@@ -730,12 +730,12 @@ def clustered_table(filename, patient, clusters, row_labels=None, column_labels=
 
     # show all mutations in the table if no subset is given
     if displayed_mutations is None:
-        displayed_mutations = [i for i in range(len(patient.data))]
+        displayed_mutations = [i for i in range(patient.cls_states.shape[0])]
 
     table_ax_width = -label_x_pos + (len(displayed_mutations) * width)
     dendrogram_ax_width = patient.n * width / 2.0
     x_length = ((-label_x_pos + 20) if row_labels is not None else 0) + table_ax_width + dendrogram_ax_width
-    y_length = (len(patient.data[0]) * (height+y_spacing) - y_spacing
+    y_length = (patient.cls_states.shape[1] * (height+y_spacing) - y_spacing
                 + (label_y_pos + 20 if column_labels is not None else 0))
 
     fig = plt.figure(figsize=(x_length / 20.0, y_length / 20.0), dpi=150)
@@ -757,46 +757,46 @@ def clustered_table(filename, patient, clusters, row_labels=None, column_labels=
     ax_hin.yaxis.set_major_locator(plt.NullLocator())
 
     # sort mutation table according to clustering and status
-    priorities = [0 for _ in range(len(patient.data))]
+    priorities = [0 for _ in range(patient.cls_states.shape[0])]
     leave_ordering = deepcopy(den['leaves'])    # leave ordering based on the results of the clustering
     leave_ordering.reverse()
     for mut_idx in displayed_mutations:
-        for i in range(len(patient.data[mut_idx])):
+        for i in range(patient.cls_states.shape[1]):
 
             sa_idx = int(leave_ordering[i])
-            maf = patient.data[mut_idx][sa_idx]
+            state = patient.cls_states[mut_idx, sa_idx]
 
-            if maf > 0:     # mutation is present
-                priorities[mut_idx] += 3 * (4 ** (len(patient.data[mut_idx])-i-1))
-            elif maf == POS_UNKNOWN:
+            if state > 0:     # mutation is present
+                priorities[mut_idx] += 3 * (4 ** (patient.cls_states.shape[1]-i-1))
+            elif state == POS_UNKNOWN:
                 # merge the two unknown categories when variants are displayed
-                priorities[mut_idx] += 1 * (4 ** (len(patient.data[mut_idx])-i-1))
-            elif maf == NEG_UNKNOWN:
-                priorities[mut_idx] += 1 * (4 ** (len(patient.data[mut_idx])-i-1))
+                priorities[mut_idx] += 1 * (4 ** (patient.cls_states.shape[1]-i-1))
+            elif state == NEG_UNKNOWN:
+                priorities[mut_idx] += 1 * (4 ** (patient.cls_states.shape[1]-i-1))
             else:
-                priorities[mut_idx] += 0 * (4 ** (len(patient.data[mut_idx])-i-1))
+                priorities[mut_idx] += 0 * (4 ** (patient.cls_states.shape[1]-i-1))
 
     edge_color = 'black'
     for x_pos, mut_idx in enumerate(sorted(displayed_mutations, key=lambda k: (-priorities[k],
                                                                                patient.gene_names[k]))):
 
-        for i in range(len(patient.data[mut_idx])):
+        for i in range(patient.cls_states.shape[1]):
 
             sa_idx = leave_ordering[i]
-            maf = patient.data[mut_idx][sa_idx]
+            state = patient.cls_states[mut_idx, sa_idx]
 
-            if maf > 0:     # mutation is present
+            if state > 0:     # mutation is present
                 color = 'blue'
-            elif maf == POS_UNKNOWN:
+            elif state == POS_UNKNOWN:
                 # merge the two unknown categories when variants are displayed
                 color = (0.9, 0.75, 0.75)
-            elif maf == NEG_UNKNOWN:
+            elif state == NEG_UNKNOWN:
                 # merge the two unknown categories when variants are displayed
                 color = (0.9, 0.75, 0.75)
             else:
                 color = (1.0, 0.3, 0.3)
 
-            rect = plt.Rectangle([x_pos * width, (height+y_spacing) * (len(patient.data[mut_idx]) - i - 1)],
+            rect = plt.Rectangle([x_pos * width, (height+y_spacing) * (patient.cls_states.shape[1] - i - 1)],
                                  width, height, facecolor=color, edgecolor=edge_color)
             ax_hin.add_patch(rect)
 
@@ -812,7 +812,7 @@ def clustered_table(filename, patient, clusters, row_labels=None, column_labels=
         for x_pos, mut_idx in enumerate(sorted(displayed_mutations, key=lambda k: (-priorities[k],
                                                                                    patient.gene_names[k]))):
 
-            ax_hin.text(x_pos * width+0.5, label_y_pos+(height+y_spacing) * (len(patient.data[mut_idx])),
+            ax_hin.text(x_pos * width+0.5, label_y_pos+(height+y_spacing) * (patient.cls_states.shape[1]),
                         _format_gene_name(patient.gene_names[mut_idx], max_length=12),
                         rotation='vertical', horizontalalignment='left', verticalalignment='bottom', fontsize=8)
 
@@ -885,7 +885,7 @@ def p_value_absent_plot(filename, patient, min_maf):
         for sa_idx, sample_name in enumerate(patient.sample_names):
 
             # don't show p-values for variants classified as present
-            if patient.data[mut_idx][sa_idx] > 0:    # mutation has been classified as present
+            if patient.cls_states[mut_idx, sa_idx] > 0:    # mutation has been classified as present
                 continue
 
             absent_p_value = math.log(calculate_absent_pvalue(patient.mut_reads[mut_key][sample_name],
@@ -10,6 +10,12 @@ NO_BOOTSTRAP_SAMPLES = 0
 # subclone detection enabled
 SUBCLONE_DETECTION = False
 
+# MILP solver: 'cplex' (IBM ILOG CPLEX, requires a license) or 'highs' (open-source HiGHS via scipy);
+# alternatively, 'laminar' solves the problem exactly by dynamic programming without any MILP solver
+# (fast for up to 15-20 samples; the time limit is ignored) and 'heuristic' finds a good solution quickly by greedy
+# construction and local search within the time limit (reports an upper bound on the optimal solution)
+SOLVER = 'cplex'
+
 # Time limit for MILP solver in seconds
 # For data sets with less than 10-15 samples, a time limit is typically not required (TIME_LIMIT = None)
 TIME_LIMIT = None
@@ -17,6 +23,29 @@ TIME_LIMIT = None
 # For efficiency, the number of explored mutation pattern per variant can be limited
 # Note that if MAX_NO_MPS is not None, the optimal solution is no longer guaranteed
 MAX_NO_MPS = None
+# Alternatively, only the most likely mutation patterns covering the given fraction of the probability mass of each
+# variant are explored (e.g. 0.999); adapts the number of patterns to the uncertainty of each variant
+MP_MASS = None
+# Alternatively, the mutation patterns are generated iteratively (column generation) until no further pattern can
+# improve the solution; for data sets with many samples where the full solution space can not be explored
+COLUMN_GENERATION = False
+# For conflict graphs with many more conflicts than mutation patterns, the conflicts can be added to the MILP
+# iteratively once they are violated by the current solution instead of generating all constraints upfront
+LAZY_CONSTRAINTS = False
+
+# Evolutionary conflicts among all mutation patterns only depend on the number of samples; if not None, they are
+# generated once per number of samples, stored in this directory and memory-mapped by all following runs
+LATTICE_CACHE_DIR = None
+
+# For efficiency, mutation patterns with a negligible reliability score can be excluded before the conflict graph
+# and the MILP are generated (treated as conflicting); the maximal resulting error in the objective value is reported
+# absolute bound on the normalized reliability score of a pattern (None: no pruning)
+MIN_PATTERN_SCORE = None
+# bound relative to the highest reliability score of any pattern (None: no pruning)
+MIN_REL_PATTERN_SCORE = None
+
+# Number of processes computing the weights of the mutation patterns of chunks of variants in parallel
+NO_PROCESSES = 1
 
 # #################### BAYESIAN sequencing data analysis settings ######################
 BI_E = 0.01            # sequencing error rate for bayesian inference
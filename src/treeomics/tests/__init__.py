@@ -0,0 +1,2 @@
+"""Unit tests of treeomics"""
+__author__ = 'Johannes REITER'
@@ -0,0 +1,73 @@
+"""Random mutation patterns, their conflict graphs and exhaustive reference solutions for the tests"""
+from itertools import combinations
+import numpy as np
+from phylogeny.conflict_graph import ConflictGraph
+from phylogeny.phylogeny_utils import get_conflict_edges
+
+__author__ = 'Johannes REITER'
+
+
+def random_patterns(no_samples, no_patterns, seed=0):
+    """
+    :param no_samples: number of samples
+    :param no_patterns: number of distinct mutation patterns (at most 2^no_samples - 1)
+    :param seed: seed of the random number generator
+    :return: list of distinct non-empty mutation patterns (frozensets of sample indices), array of their weights
+    """
+
+    rng = np.random.RandomState(seed)
+    patterns = set()
+    while len(patterns) < no_patterns:
+        pattern = frozenset(np.flatnonzero(rng.randint(0, 2, size=no_samples)).tolist())
+        if len(pattern) > 0:
+            patterns.add(pattern)
+
+    patterns = sorted(patterns, key=sorted)
+    return patterns, rng.uniform(0.1, 10.0, size=len(patterns))
+
+
+def create_graph(patterns, weights):
+    """
+    :param patterns: list of distinct mutation patterns
+    :param weights: array with the weight of each pattern
+    :return: conflict graph of the given mutation patterns
+    """
+
+    sources, sinks = get_conflict_edges(patterns)
+    return ConflictGraph(patterns, weights, sources, sinks)
+
+
+def is_compatible(a, b):
+    """
+    :return: True if the mutation patterns are disjoint or one contains the other
+    """
+
+    return len(a & b) == 0 or a <= b or b <= a
+
+
+def max_compatible_weight(patterns, weights):
+    """
+    Find the maximum weight set of pairwise compatible mutation patterns by enumerating all subsets
+    :param patterns: list of mutation patterns (at most about 20)
+    :param weights: array with the weight of each pattern
+    :return: maximum weight
+    """
+
+    best = 0.0
+    for size in range(1, len(patterns) + 1):
+        for subset in combinations(range(len(patterns)), size):
+            if all(is_compatible(patterns[i], patterns[j]) for i, j in combinations(subset, 2)):
+                best = max(best, float(sum(weights[i] for i in subset)))
+
+    return best
+
+
+def is_compatible_set(patterns, selected):
+    """
+    :param patterns: list of mutation patterns
+    :param selected: boolean array of the selected patterns
+    :return: True if the selected patterns are pairwise compatible
+    """
+
+    chosen = [pattern for pattern, is_selected in zip(patterns, selected) if is_selected]
+    return all(is_compatible(a, b) for a, b in combinations(chosen, 2))
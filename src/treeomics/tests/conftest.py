@@ -0,0 +1,9 @@
+"""Make the modules of treeomics importable in the same way as when treeomics is run from its directory"""
+import os
+import sys
+
+__author__ = 'Johannes REITER'
+
+TREEOMICS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if TREEOMICS_DIR not in sys.path:
+    sys.path.insert(0, TREEOMICS_DIR)
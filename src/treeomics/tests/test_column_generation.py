@@ -0,0 +1,79 @@
+"""Tests of the column generation of the mutation patterns against the full solution space"""
+import time
+import unittest
+import numpy as np
+import utils.int_settings as def_sets
+import phylogeny.cplex_solver as cps
+from phylogeny.max_lh_phylogeny import generate_ml_graph_nodes, infer_ml_graph_nodes, create_conflict_graph
+
+__author__ = 'Johannes REITER'
+
+
+def random_log_p01(no_variants, n, seed=0):
+    """
+    :return: posterior log probabilities of absence and presence of variants which are mostly present in the
+             samples of a few clones
+    """
+
+    rng = np.random.RandomState(seed)
+    clones = rng.randint(0, 2, size=(4, n)).astype(bool)
+    presence = clones[rng.randint(0, len(clones), size=no_variants)]
+    p1 = np.where(presence, rng.uniform(0.99, 1.0, size=presence.shape), rng.uniform(0.0, 0.01, size=presence.shape))
+    p1 = np.clip(p1, 1e-06, 1.0 - 1e-06)
+
+    return [[(np.log1p(-p1[mut_idx, sa_idx]), np.log(p1[mut_idx, sa_idx])) for sa_idx in range(n)]
+            for mut_idx in range(no_variants)]
+
+
+def compatible_weight(node_scores, solver):
+    """
+    :return: weight of the compatible mutation patterns
+    """
+
+    _, compatible_nodes = cps.solve_conflicting_phylogeny(create_conflict_graph(node_scores), solver=solver)
+    return sum(node_scores[node] for node in compatible_nodes)
+
+
+class ColumnGenerationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.n = 8
+        self.sample_names = ['S{}'.format(sa_idx) for sa_idx in range(self.n)]
+        self.log_p01 = random_log_p01(40, self.n)
+        self.mut_keys = ['m{}'.format(mut_idx) for mut_idx in range(len(self.log_p01))]
+
+    def test_optimal_weight(self):
+        node_scores, idx_to_mp, _, mp_weights, _ = generate_ml_graph_nodes(
+            self.log_p01, self.sample_names, self.mut_keys, solver='laminar')
+        self.assertLess(len(idx_to_mp), 2 ** self.n)
+        self.assertEqual(len(mp_weights), len(self.log_p01))
+
+        full_scores, _, _, _, _ = infer_ml_graph_nodes(self.log_p01, self.sample_names, self.mut_keys)
+        optimum = compatible_weight(full_scores, 'laminar')
+        self.assertGreaterEqual(compatible_weight(node_scores, 'laminar'),
+                                optimum * (1.0 - def_sets.CG_GAP_TOLERANCE) - 1e-12)
+
+    def test_deadline(self):
+        # no restricted problem is solved after the deadline
+        with self.assertLogs('treeomics', level='WARNING') as logs:
+            _, idx_to_mp, _, mp_weights, _ = generate_ml_graph_nodes(
+                self.log_p01, self.sample_names, self.mut_keys, deadline=time.time() - 1.0, solver='laminar')
+        self.assertTrue(any('optimality of the generated mutation patterns is not proven' in message
+                            for message in logs.output))
+        self.assertEqual(len(mp_weights), len(self.log_p01))
+
+    def test_optimality_not_proven(self):
+        # the gap of the heuristic solution does not certify optimality
+        with self.assertLogs('treeomics', level='WARNING') as logs:
+            generate_ml_graph_nodes(self.log_p01, self.sample_names, self.mut_keys, solver='heuristic')
+        self.assertTrue(any('Restricted problem was not solved to optimality (heuristic' in message
+                            for message in logs.output))
+
+    def test_optimal_states(self):
+        self.assertTrue(cps.is_optimal({'trivial': 2, 'optimal': 1}))
+        self.assertFalse(cps.is_optimal({'optimal': 1, 'time_limit_feasible': 1}))
+        self.assertFalse(cps.is_optimal({'heuristic': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Tests of finding the evolutionary conflicts among mutation patterns on their bitmasks"""
+import unittest
+from itertools import combinations
+import numpy as np
+import utils.int_settings as def_sets
+from phylogeny.phylogeny_utils import get_pattern_bitmasks, get_conflict_edges
+from tests.brute_force import random_patterns, is_compatible
+
+__author__ = 'Johannes REITER'
+
+
+def get_pairwise_conflicts(patterns, pattern_ids=None):
+    """
+    :return: set of the pairs of conflicting patterns (smaller index first) by comparing all pairs of frozensets
+    """
+
+    return set((i, j) for i, j in combinations(range(len(patterns)), 2)
+               if not is_compatible(patterns[i], patterns[j]) and
+               (pattern_ids is None or i in pattern_ids or j in pattern_ids))
+
+
+class ConflictEdgesTest(unittest.TestCase):
+
+    def assert_conflicts(self, patterns, pattern_ids=None):
+        sources, sinks = get_conflict_edges(patterns, pattern_ids=pattern_ids)
+        edges = list(zip(sources.tolist(), sinks.tolist()))
+        # each conflict is reported once in lexicographic order
+        self.assertEqual(edges, sorted(set(edges)))
+        self.assertEqual(set(edges), get_pairwise_conflicts(patterns, pattern_ids=pattern_ids))
+
+    def test_bitmasks(self):
+        masks = get_pattern_bitmasks([frozenset([0, 2]), frozenset([63, 64]), frozenset()])
+        self.assertEqual(masks.shape, (3, 2))
+        self.assertEqual(masks[0].tolist(), [5, 0])
+        self.assertEqual(masks[1].tolist(), [1 << 63, 1])
+        self.assertEqual(masks[2].tolist(), [0, 0])
+
+    def test_all_conflicts(self):
+        patterns, _ = random_patterns(6, 40, seed=3)
+        self.assert_conflicts(patterns)
+
+    def test_conflicts_of_selected_patterns(self):
+        patterns, _ = random_patterns(6, 40, seed=4)
+        self.assert_conflicts(patterns, pattern_ids=[0, 7, 8, 30])
+        self.assert_conflicts(patterns, pattern_ids=[])
+
+    def test_many_samples(self):
+        # bitmasks span several 64-bit words
+        rng = np.random.RandomState(5)
+        patterns = list(set(frozenset(rng.choice(150, size=rng.randint(1, 6), replace=False).tolist())
+                            for _ in range(60)))
+        patterns += [frozenset(range(100, 140)), frozenset(range(60, 70)), frozenset([65, 120])]
+        self.assert_conflicts(patterns)
+
+    def test_blocks(self):
+        patterns, _ = random_patterns(7, 60, seed=6)
+        block_entries = def_sets.CONFLICT_BLOCK_ENTRIES
+        try:
+            # few patterns are compared at once
+            def_sets.CONFLICT_BLOCK_ENTRIES = 100
+            self.assert_conflicts(patterns)
+            self.assert_conflicts(patterns, pattern_ids=list(range(0, 60, 7)))
+        finally:
+            def_sets.CONFLICT_BLOCK_ENTRIES = block_entries
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Tests of the compact conflict graph in compressed sparse row format"""
+import unittest
+import numpy as np
+import networkx as nx
+from phylogeny.conflict_graph import ConflictGraph
+from phylogeny.phylogeny_utils import get_conflict_edges
+from tests.brute_force import random_patterns, create_graph
+
+__author__ = 'Johannes REITER'
+
+
+class ConflictGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        patterns, weights = random_patterns(5, 12, seed=7)
+        # patterns over further samples form separate components
+        other_patterns, other_weights = random_patterns(3, 5, seed=8)
+        self.patterns = patterns + [frozenset(sa_idx + 5 for sa_idx in pattern) for pattern in other_patterns]
+        self.weights = np.concatenate((weights, other_weights))
+        self.cf_graph = create_graph(self.patterns, self.weights)
+        self.graph = self.cf_graph.to_networkx()
+
+    def assert_same_graph(self, cf_graph, other):
+        self.assertEqual(cf_graph.nodes, other.nodes)
+        np.testing.assert_array_equal(cf_graph.weights, other.weights)
+        np.testing.assert_array_equal(cf_graph.sources, other.sources)
+        np.testing.assert_array_equal(cf_graph.sinks, other.sinks)
+        np.testing.assert_array_equal(cf_graph.indptr, other.indptr)
+        np.testing.assert_array_equal(cf_graph.indices, other.indices)
+
+    def test_adjacency(self):
+        self.assertEqual(self.cf_graph.order(), self.graph.number_of_nodes())
+        self.assertEqual(self.cf_graph.size(), self.graph.number_of_edges())
+        for node in self.patterns:
+            self.assertEqual(set(self.cf_graph.neighbors(node)), set(self.graph.neighbors(node)))
+            self.assertEqual(self.cf_graph.degrees()[self.cf_graph.node_ids[node]], self.graph.degree(node))
+            self.assertEqual(self.cf_graph.weight(node), self.graph.nodes[node]['weight'])
+            # neighbors are sorted
+            neighbor_ids = self.cf_graph.neighbor_ids(self.cf_graph.node_ids[node])
+            self.assertEqual(neighbor_ids.tolist(), sorted(neighbor_ids.tolist()))
+
+    def test_components(self):
+        components = self.cf_graph.components()
+        expected = [component for component in nx.connected_components(self.graph) if len(component) > 1]
+        self.assertEqual(len(components), len(expected))
+        self.assertEqual(sorted(frozenset(self.cf_graph.nodes[node_id] for node_id in node_ids.tolist())
+                                for node_ids, _ in components),
+                         sorted(frozenset(component) for component in expected))
+
+        # each edge is in the component of its endpoints and the largest component comes first
+        self.assertEqual(sorted(np.concatenate([edge_ids for _, edge_ids in components]).tolist()),
+                         list(range(self.cf_graph.size())))
+        for node_ids, edge_ids in components:
+            self.assertTrue(set(self.cf_graph.sources[edge_ids].tolist()) <= set(node_ids.tolist()))
+            self.assertTrue(set(self.cf_graph.sinks[edge_ids].tolist()) <= set(node_ids.tolist()))
+        self.assertEqual([len(edge_ids) for _, edge_ids in components],
+                         sorted((len(edge_ids) for _, edge_ids in components), reverse=True))
+
+    def test_no_conflicts(self):
+        cf_graph = ConflictGraph([frozenset([0]), frozenset([1])], [1.0, 2.0], [], [])
+        self.assertEqual(cf_graph.components(), [])
+
+    def test_subgraph(self):
+        for node_ids, edge_ids in self.cf_graph.components():
+            subgraph = self.cf_graph.subgraph(node_ids, edge_ids)
+            expected = self.graph.subgraph(self.cf_graph.nodes[node_id] for node_id in node_ids.tolist())
+            self.assertEqual(subgraph.nodes, [self.cf_graph.nodes[node_id] for node_id in node_ids.tolist()])
+            self.assertEqual(set(frozenset(edge) for edge in subgraph.edges()),
+                             set(frozenset(edge) for edge in expected.edges()))
+            np.testing.assert_array_equal(subgraph.weights, self.weights[node_ids])
+
+    def test_update_edges(self):
+        # relabel some patterns, add new ones and recompute only their conflicts
+        mapping = {self.patterns[0]: frozenset([0, 1, 2, 3, 4, 5]), self.patterns[3]: frozenset([1, 5])}
+        new_patterns = [frozenset([2, 6]), frozenset([0, 4])]
+        new_patterns = [pattern for pattern in new_patterns if pattern not in self.patterns]
+        relabeled_ids = self.cf_graph.relabel_nodes(mapping)
+        new_ids = self.cf_graph.add_nodes(new_patterns, [1.5 for _ in new_patterns])
+        changed_ids = np.concatenate((relabeled_ids, new_ids))
+        sources, sinks = get_conflict_edges(self.cf_graph.nodes, pattern_ids=changed_ids)
+        self.cf_graph.update_edges(changed_ids, sources, sinks)
+
+        # the updated graph is identical to the graph built from scratch
+        patterns = [mapping.get(pattern, pattern) for pattern in self.patterns] + new_patterns
+        weights = np.concatenate((self.weights, [1.5 for _ in new_patterns]))
+        self.assert_same_graph(self.cf_graph, create_graph(patterns, weights))
+        for node_id, node in enumerate(patterns):
+            self.assertEqual(self.cf_graph.node_ids[node], node_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
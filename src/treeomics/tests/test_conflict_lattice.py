@@ -0,0 +1,63 @@
+"""Tests of the cached evolutionary conflicts among all mutation patterns of a given number of samples"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from phylogeny.conflict_lattice import get_lattice_path, load_lattice_conflicts, filter_lattice_conflicts
+from phylogeny.max_lh_phylogeny import get_mp_columns, create_conflict_graph
+from phylogeny.phylogeny_utils import get_conflict_edges
+
+__author__ = 'Johannes REITER'
+
+
+class ConflictLatticeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.n = 6
+        self.lattice_patterns, self.lattice_col_ids = get_mp_columns(self.n)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_cached_conflicts(self):
+        conflicts = load_lattice_conflicts(self.lattice_patterns, self.n, self.cache_dir)
+        self.assertTrue(os.path.isfile(get_lattice_path(self.cache_dir, self.n)))
+        sources, sinks = get_conflict_edges(self.lattice_patterns)
+        np.testing.assert_array_equal(conflicts[0], sources)
+        np.testing.assert_array_equal(conflicts[1], sinks)
+
+        # the stored lattice is reused
+        self.assertIs(load_lattice_conflicts(self.lattice_patterns, self.n, self.cache_dir), conflicts)
+
+    def test_filtered_conflicts(self):
+        conflicts = load_lattice_conflicts(self.lattice_patterns, self.n, self.cache_dir)
+        rng = np.random.RandomState(13)
+        for ordered in (True, False):
+            lattice_ids = rng.choice(len(self.lattice_patterns), size=40, replace=False)
+            if ordered:
+                lattice_ids.sort()
+            patterns = [self.lattice_patterns[lattice_idx] for lattice_idx in lattice_ids.tolist()]
+
+            sources, sinks = filter_lattice_conflicts(conflicts, lattice_ids, len(self.lattice_patterns))
+            expected_sources, expected_sinks = get_conflict_edges(patterns)
+            np.testing.assert_array_equal(sources, expected_sources)
+            np.testing.assert_array_equal(sinks, expected_sinks)
+
+    def test_conflict_graph(self):
+        rng = np.random.RandomState(14)
+        reliability_scores = dict((pattern, rng.uniform()) for pattern in self.lattice_patterns
+                                  if rng.uniform() < 0.8)
+        cf_graph = create_conflict_graph(reliability_scores, n=self.n, lattice_cache=self.cache_dir)
+        self.assertTrue(os.path.isfile(get_lattice_path(self.cache_dir, self.n)))
+
+        expected = create_conflict_graph(reliability_scores)
+        self.assertEqual(cf_graph.nodes, expected.nodes)
+        np.testing.assert_array_equal(cf_graph.weights, expected.weights)
+        np.testing.assert_array_equal(cf_graph.sources, expected.sources)
+        np.testing.assert_array_equal(cf_graph.sinks, expected.sinks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Tests of the anytime heuristic for compatible mutation patterns and its upper bound"""
+import unittest
+import numpy as np
+from phylogeny.conflict_graph import ConflictGraph
+from phylogeny.heuristic_solver import (solve_heuristic, greedy_independent_set, improve_independent_set,
+                                        get_upper_bound)
+from tests.brute_force import random_patterns, max_compatible_weight, create_graph
+
+__author__ = 'Johannes REITER'
+
+
+class HeuristicSolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.instances = []
+        for seed in range(8):
+            patterns, weights = random_patterns(5, 14, seed=seed)
+            self.instances.append((create_graph(patterns, weights), max_compatible_weight(patterns, weights)))
+
+    def assert_independent(self, cf_graph, selected):
+        self.assertFalse(np.any(selected[cf_graph.sources] & selected[cf_graph.sinks]))
+
+    def test_feasible_cover(self):
+        for cf_graph, optimum in self.instances:
+            cover = solve_heuristic(cf_graph, cf_graph.weights)
+            self.assert_independent(cf_graph, ~cover)
+            self.assertLessEqual(float(np.dot(cf_graph.weights, ~cover)), optimum + 1e-9)
+
+    def test_local_search_improves(self):
+        for cf_graph, _ in self.instances:
+            greedy = greedy_independent_set(cf_graph, cf_graph.weights)
+            self.assert_independent(cf_graph, greedy)
+            improved = improve_independent_set(cf_graph, cf_graph.weights, greedy)
+            self.assert_independent(cf_graph, improved)
+            self.assertGreaterEqual(float(np.dot(cf_graph.weights, improved)),
+                                    float(np.dot(cf_graph.weights, greedy)))
+
+    def test_start_solution(self):
+        for cf_graph, _ in self.instances:
+            # a start solution with all nodes in the cover is feasible but never better than the greedy solution
+            cover = solve_heuristic(cf_graph, cf_graph.weights, start=np.ones(cf_graph.order(), dtype=bool))
+            self.assert_independent(cf_graph, ~cover)
+
+    def test_time_limit(self):
+        cf_graph, _ = self.instances[0]
+        cover = solve_heuristic(cf_graph, cf_graph.weights, time_limit=0.0)
+        self.assert_independent(cf_graph, ~cover)
+
+    def test_upper_bound(self):
+        for cf_graph, optimum in self.instances:
+            bound = get_upper_bound(cf_graph, cf_graph.weights)
+            self.assertGreaterEqual(bound, optimum - 1e-9)
+            self.assertLessEqual(bound, float(np.sum(cf_graph.weights)) + 1e-9)
+
+    def test_upper_bound_small_graphs(self):
+        cf_graph = ConflictGraph([frozenset([0]), frozenset([1])], [1.0, 2.0], [], [])
+        self.assertAlmostEqual(get_upper_bound(cf_graph, cf_graph.weights), 3.0)
+        # a clique of conflicting patterns contributes its heaviest pattern
+        cf_graph = create_graph([frozenset([0, 1]), frozenset([1, 2]), frozenset([0, 2])], [1.0, 2.0, 3.0])
+        self.assertEqual(cf_graph.size(), 3)
+        self.assertAlmostEqual(get_upper_bound(cf_graph, cf_graph.weights), 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
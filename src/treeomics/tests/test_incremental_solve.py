@@ -0,0 +1,66 @@
+"""Tests of the incremental re-solve of the conflict graph after mutation patterns have been relabeled"""
+import unittest
+import numpy as np
+from phylogeny.max_lh_phylogeny import create_conflict_graph, update_conflict_graph
+from phylogeny.cplex_solver import solve_conflicting_phylogeny
+
+__author__ = 'Johannes REITER'
+
+
+class IncrementalSolveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.a = frozenset([1, 2])
+        self.b = frozenset([0, 1])
+        self.c = frozenset([0, 3])
+        self.scores = {self.a: 10.0, self.b: 5.0, self.c: 4.0}
+
+    def solve(self, cf_graph, warm_start=None, changed_nodes=None):
+        incompatible, _ = solve_conflicting_phylogeny(cf_graph, warm_start=warm_start, changed_nodes=changed_nodes,
+                                                      solver='highs')
+        return incompatible
+
+    def test_first_solve(self):
+        # path A - B - C: removing B resolves both conflicts
+        cf_graph = create_conflict_graph(self.scores)
+        self.assertEqual(cf_graph.size(), 2)
+        self.assertEqual(self.solve(cf_graph), {self.b})
+
+    def test_former_neighbor_of_relabeled_node(self):
+        cf_graph = create_conflict_graph(self.scores)
+        incompatible = self.solve(cf_graph)
+        previous_cover = np.array([node in incompatible for node in cf_graph.nodes], dtype=bool)
+
+        # A = {1} is contained in B and hence only the conflict between B and C remains;
+        # neither B nor C has been relabeled but the optimal solution of their component changed
+        a_relabeled = frozenset([1])
+        scores = {a_relabeled: 10.0, self.b: 5.0, self.c: 4.0}
+        changed_nodes = update_conflict_graph(cf_graph, {self.a: a_relabeled}, scores)
+        self.assertEqual(cf_graph.size(), 1)
+        self.assertTrue(changed_nodes[cf_graph.node_ids[self.b]])
+
+        incompatible = self.solve(cf_graph, warm_start=previous_cover, changed_nodes=changed_nodes)
+        self.assertEqual(incompatible, {self.c})
+        self.assertEqual(incompatible, self.solve(create_conflict_graph(scores)))
+
+    def test_unchanged_component_keeps_solution(self):
+        d = frozenset([4, 5])
+        e = frozenset([5, 6])
+        scores = dict(self.scores)
+        scores.update({d: 3.0, e: 2.0})
+        cf_graph = create_conflict_graph(scores)
+        incompatible = self.solve(cf_graph)
+        self.assertEqual(incompatible, {self.b, e})
+        previous_cover = np.array([node in incompatible for node in cf_graph.nodes], dtype=bool)
+
+        a_relabeled = frozenset([1])
+        scores[a_relabeled] = scores.pop(self.a)
+        changed_nodes = update_conflict_graph(cf_graph, {self.a: a_relabeled}, scores)
+        self.assertFalse(changed_nodes[cf_graph.node_ids[d]])
+        self.assertFalse(changed_nodes[cf_graph.node_ids[e]])
+        self.assertEqual(self.solve(cf_graph, warm_start=previous_cover, changed_nodes=changed_nodes),
+                         self.solve(create_conflict_graph(scores)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Tests of the subset and superset queries on a laminar family of mutation patterns"""
+import unittest
+import numpy as np
+from phylogeny.laminar_index import LaminarIndex, get_bitmask
+
+__author__ = 'Johannes REITER'
+
+
+def random_laminar_family(no_samples, seed=0):
+    """
+    Split the samples recursively into random parts; every part is a pattern with probability 0.7
+    :return: list of the patterns of a laminar family
+    """
+
+    rng = np.random.RandomState(seed)
+    family = []
+    parts = [list(range(no_samples))]
+    while len(parts):
+        part = parts.pop()
+        if rng.uniform() < 0.7:
+            family.append(frozenset(part))
+        if len(part) > 1:
+            split = rng.randint(1, len(part))
+            rng.shuffle(part)
+            parts.extend((part[:split], part[split:]))
+
+    return family
+
+
+class LaminarIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.family = random_laminar_family(12, seed=9)
+        self.index = LaminarIndex(self.family)
+        rng = np.random.RandomState(10)
+        # queries for patterns in the family and arbitrary patterns
+        self.queries = self.family + [frozenset(np.flatnonzero(rng.randint(0, 2, size=12)).tolist())
+                                      for _ in range(50)]
+
+    def test_family(self):
+        # any two patterns are either disjoint or one contains the other
+        for a in self.family:
+            for b in self.family:
+                self.assertTrue(len(a & b) == 0 or a <= b or b <= a)
+        self.assertEqual(len(self.index), len(self.family))
+        for pattern in self.family:
+            self.assertIn(pattern, self.index)
+        self.assertNotIn(frozenset([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]), self.index)
+
+    def test_parent(self):
+        for pattern in self.family:
+            supersets = [other for other in self.family if pattern < other]
+            expected = min(supersets, key=len) if len(supersets) else None
+            self.assertEqual(self.index.parent(pattern), expected)
+
+    def test_supersets(self):
+        for query in self.queries:
+            supersets = self.index.supersets(query)
+            self.assertEqual(set(supersets), set(pattern for pattern in self.family if query <= pattern))
+            # largest first
+            self.assertEqual([len(pattern) for pattern in supersets],
+                             sorted((len(pattern) for pattern in supersets), reverse=True))
+
+    def test_subsets(self):
+        for query in self.queries:
+            subsets = self.index.subsets(query)
+            self.assertEqual(len(subsets), len(set(subsets)))
+            self.assertEqual(set(subsets), set(pattern for pattern in self.family if pattern <= query))
+
+    def test_top_down(self):
+        order = list(self.index.top_down())
+        self.assertEqual(sorted(order, key=sorted), sorted(self.family, key=sorted))
+        positions = dict((pattern, position) for position, pattern in enumerate(order))
+        for pattern in self.family:
+            if self.index.parent(pattern) is not None:
+                self.assertLess(positions[self.index.parent(pattern)], positions[pattern])
+
+    def test_empty_pattern(self):
+        index = LaminarIndex(self.family + [frozenset()])
+        self.assertIn(frozenset(), index)
+        self.assertEqual(len(index), len(self.family) + 1)
+        self.assertIn(frozenset(), index.subsets(frozenset([0])))
+        self.assertEqual(len(index.supersets(frozenset())), len(self.family) + 1)
+
+    def test_bitmask(self):
+        self.assertEqual(get_bitmask(frozenset([0, 3, 70])), 1 + 8 + (1 << 70))
+
+
+if __name__ == '__main__':
+    unittest.main()
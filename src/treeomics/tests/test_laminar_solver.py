@@ -0,0 +1,42 @@
+"""Tests of the exact dynamic programming solver for the maximum weight set of compatible mutation patterns"""
+import unittest
+import numpy as np
+import utils.int_settings as def_sets
+from phylogeny.laminar_solver import solve_max_laminar_family
+from tests.brute_force import random_patterns, max_compatible_weight, is_compatible_set
+
+__author__ = 'Johannes REITER'
+
+
+class LaminarSolverTest(unittest.TestCase):
+
+    def test_exhaustive(self):
+        for seed in range(8):
+            patterns, weights = random_patterns(5, 14, seed=seed)
+            selected = solve_max_laminar_family(patterns, weights)
+            self.assertTrue(is_compatible_set(patterns, selected))
+            self.assertAlmostEqual(float(np.dot(weights, selected)), max_compatible_weight(patterns, weights))
+
+    def test_non_positive_weights(self):
+        patterns, weights = random_patterns(4, 10, seed=11)
+        weights[::3] = 0.0
+        weights[1] = -1.0
+        selected = solve_max_laminar_family(patterns, weights)
+        self.assertFalse(np.any(selected[weights <= 0]))
+        self.assertAlmostEqual(float(np.dot(weights, selected)),
+                               max_compatible_weight(patterns, np.maximum(weights, 0.0)))
+
+    def test_sparse_samples(self):
+        # sample indices do not need to be consecutive
+        patterns, weights = random_patterns(5, 12, seed=12)
+        patterns = [frozenset(sa_idx * 7 + 3 for sa_idx in pattern) for pattern in patterns]
+        selected = solve_max_laminar_family(patterns, weights)
+        self.assertAlmostEqual(float(np.dot(weights, selected)), max_compatible_weight(patterns, weights))
+
+    def test_too_many_samples(self):
+        patterns = [frozenset(range(def_sets.LAMINAR_MAX_SAMPLES + 1)), frozenset([0, 1])]
+        self.assertRaises(RuntimeError, solve_max_laminar_family, patterns, np.ones(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Tests of the lazy separation of the evolutionary conflict constraints"""
+import unittest
+import numpy as np
+import phylogeny.cplex_solver as cps
+from tests.brute_force import random_patterns, create_graph
+
+__author__ = 'Johannes REITER'
+
+
+class LazyConstraintsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graphs = [create_graph(*random_patterns(6, 25, seed=seed)) for seed in range(4)]
+
+    def test_lazy_equals_full(self):
+        for cf_graph in self.graphs:
+            components = cf_graph.components()
+            full_cover, full_value, _ = cps.solve_components(cf_graph, components, cf_graph.weights, quiet=True,
+                                                             solver='highs')
+            lazy_cover, lazy_value, _ = cps.solve_components(cf_graph, components, cf_graph.weights, quiet=True,
+                                                             lazy_constraints=True, solver='highs')
+            # the lazily separated solution is feasible for all conflicts and optimal
+            self.assertFalse(np.any(~lazy_cover[cf_graph.sources] & ~lazy_cover[cf_graph.sinks]))
+            self.assertAlmostEqual(lazy_value, full_value, places=6)
+            self.assertAlmostEqual(float(np.dot(cf_graph.weights, lazy_cover)),
+                                   float(np.dot(cf_graph.weights, full_cover)), places=6)
+
+    def get_components(self):
+        """
+        :return: conflict graphs of the components (every node has at least one conflict)
+        """
+
+        return [cf_graph.subgraph(node_ids, edge_ids) for cf_graph in self.graphs
+                for node_ids, edge_ids in cf_graph.components()]
+
+    def test_seed_conflicts(self):
+        for cf_graph in self.get_components():
+            seeds = cps.get_seed_conflicts(cf_graph, cf_graph.weights)
+            # every node with conflicts is covered by the conflict with its heaviest neighbor
+            for node_id in range(cf_graph.order()):
+                heaviest = np.max(cf_graph.weights[cf_graph.neighbor_ids(node_id)])
+                seeded = np.flatnonzero(seeds & ((cf_graph.sources == node_id) | (cf_graph.sinks == node_id)))
+                self.assertTrue(any(cf_graph.weights[cf_graph.sinks[edge_id] if cf_graph.sources[edge_id] == node_id
+                                                     else cf_graph.sources[edge_id]] == heaviest
+                                    for edge_id in seeded.tolist()))
+
+    def test_separation(self):
+        for cf_graph in self.get_components():
+            added = cps.get_seed_conflicts(cf_graph, cf_graph.weights)
+            cover = np.zeros(cf_graph.order(), dtype=bool)
+            violated = cps.separate_conflicts(cf_graph, cf_graph.weights, cover, added)
+            # only violated conflicts which are not yet in the MILP; at most one per pattern and direction
+            self.assertFalse(np.any(added[violated]))
+            self.assertLessEqual(len(violated), 2 * cf_graph.order())
+            self.assertEqual(len(violated) > 0, bool(np.any(~added)))
+
+            # no conflicts are violated by a vertex cover
+            cover = cps.repair_cover(cf_graph, cf_graph.weights, cover)
+            self.assertEqual(len(cps.separate_conflicts(cf_graph, cf_graph.weights, cover, added)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
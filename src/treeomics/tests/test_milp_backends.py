@@ -0,0 +1,62 @@
+"""Tests of the MILP solvers for the minimum weight vertex cover of the conflict graph against exhaustive search"""
+import logging
+import unittest
+from itertools import combinations
+import numpy as np
+import phylogeny.milp_backends as milp_backends
+from tests.brute_force import random_patterns, is_compatible, max_compatible_weight
+
+__author__ = 'Johannes REITER'
+
+
+def solve_cover(solver, patterns, weights, start=None):
+    """
+    :return: boolean array of the patterns in the minimum weight vertex cover of the conflicts, objective value
+    """
+
+    lp = milp_backends.create_milp(solver, weights, names=['x{}'.format(i) for i in range(len(patterns))], quiet=True)
+    lp.add_constraints([[[i, j], [1, 1]] for i, j in combinations(range(len(patterns)), 2)
+                        if not is_compatible(patterns[i], patterns[j])])
+    if start is not None:
+        lp.set_start(start)
+    solution, objective, _ = lp.solve()
+
+    return solution, objective
+
+
+class MILPBackendsTest(unittest.TestCase):
+
+    def check_solver(self, solver):
+        for seed in range(4):
+            patterns, weights = random_patterns(5, 12, seed=seed)
+            solution, objective = solve_cover(solver, patterns, weights, start=np.ones(len(patterns), dtype=bool))
+
+            # the patterns outside of the cover are compatible and have the maximum weight
+            self.assertTrue(all(is_compatible(patterns[i], patterns[j]) for i, j in combinations(
+                np.nonzero(~solution)[0].tolist(), 2)))
+            self.assertAlmostEqual(np.sum(weights) - objective, max_compatible_weight(patterns, weights), places=6)
+            self.assertAlmostEqual(objective, float(np.dot(weights, solution)), places=9)
+
+    def test_highs(self):
+        self.check_solver('highs')
+
+    @unittest.skipIf(milp_backends.cp is None, 'CPLEX is not installed')
+    def test_cplex(self):
+        self.check_solver('cplex')
+
+    def test_highs_ignored_starts_reported_once(self):
+        milp_backends._ignored_starts_reported = False
+        try:
+            with self.assertLogs('treeomics', level=logging.DEBUG) as logs:
+                for _ in range(3):
+                    solve_cover('highs', *random_patterns(3, 4), start=np.ones(4, dtype=bool))
+            self.assertEqual(sum('Start solutions are ignored' in message for message in logs.output), 1)
+        finally:
+            milp_backends._ignored_starts_reported = False
+
+    def test_unknown_solver(self):
+        self.assertRaises(AttributeError, milp_backends.create_milp, 'glpk', np.ones(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+"""Tests of the vectorized, the blocked and the closed-form computation of the mutation pattern log likelihoods
+and of the enumeration of the most likely patterns"""
+import unittest
+from itertools import product
+import numpy as np
+import utils.int_settings as def_sets
+import phylogeny.mp_likelihoods as mpl
+
+__author__ = 'Johannes REITER'
+
+
+def random_log_posteriors(no_variants, n, seed=0):
+    """
+    :return: posterior log probabilities of absence and presence (#variants x n x 2)
+    """
+
+    rng = np.random.RandomState(seed)
+    p1 = rng.uniform(0.0, 1.0, size=(no_variants, n))
+    # some variants are almost certainly present or absent in some samples
+    p1[rng.uniform(size=p1.shape) < 0.1] = 1.0 - 1e-12
+    p1[rng.uniform(size=p1.shape) < 0.1] = 1e-12
+
+    return np.stack((np.log1p(-p1), np.log(p1)), axis=2)
+
+
+def confident_log_posteriors(no_variants, n, seed=0):
+    """
+    :return: posterior log probabilities of variants which are confidently present in all but at most one sample
+    """
+
+    rng = np.random.RandomState(seed)
+    p1 = np.full((no_variants, n), 1.0 - 1e-07)
+    absent = rng.randint(-1, n, size=no_variants)
+    p1[absent >= 0, absent[absent >= 0]] = 1e-07
+
+    return np.stack((np.log1p(-p1), np.log(p1)), axis=2)
+
+
+class PatternLikelihoodsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.n = 6
+        self.idx_to_mp = [frozenset(sa_idx for sa_idx in range(self.n) if present[sa_idx])
+                          for present in product((False, True), repeat=self.n)]
+        self.sample_names = ['S{}'.format(sa_idx) for sa_idx in range(self.n)]
+        self.lp01 = random_log_posteriors(40, self.n)
+        self.mut_keys = ['m{}'.format(mut_idx) for mut_idx in range(len(self.lp01))]
+        self.clipped_lp0, self.clipped_lp1 = mpl.clip_log_posteriors(self.lp01)
+        self.expected = mpl.calculate_log_likelihoods(self.clipped_lp0, self.clipped_lp1,
+                                                      mpl.get_pattern_matrix(self.idx_to_mp, self.n))
+
+    def test_pattern_blocks(self):
+        pattern_masks = mpl.get_pattern_masks(self.idx_to_mp, self.n)
+        np.testing.assert_array_equal(mpl.get_pattern_block(self.idx_to_mp, pattern_masks, 5, 17, self.n),
+                                      mpl.get_pattern_matrix(self.idx_to_mp[5:17], self.n))
+        np.testing.assert_array_equal(mpl.get_pattern_block(self.idx_to_mp, None, 5, 17, self.n),
+                                      mpl.get_pattern_matrix(self.idx_to_mp[5:17], self.n))
+
+    def test_blocked_log_likelihoods(self):
+        chunk_entries = def_sets.LH_CHUNK_ENTRIES
+        try:
+            # blocks of 5 patterns
+            def_sets.LH_CHUNK_ENTRIES = 5 * self.n
+            log_mls = mpl.calculate_blocked_log_likelihoods(self.clipped_lp0, self.clipped_lp1, self.idx_to_mp,
+                                                            mpl.get_pattern_masks(self.idx_to_mp, self.n))
+        finally:
+            def_sets.LH_CHUNK_ENTRIES = chunk_entries
+        # the matrix products may round differently on blocks
+        np.testing.assert_allclose(log_mls, self.expected, rtol=1e-12)
+
+    def test_iter_log_likelihoods_in_blocks(self):
+        def collect():
+            log_mls = np.zeros((len(self.lp01), len(self.idx_to_mp)))
+            scores = np.zeros(len(self.idx_to_mp))
+            for start, chunk_mls, chunk_scores in mpl.iter_log_likelihoods(
+                    self.lp01, self.idx_to_mp, self.sample_names, self.mut_keys):
+                log_mls[start:start+len(chunk_mls)] = chunk_mls
+                scores += chunk_scores
+            return log_mls, scores
+
+        full_mls, full_scores = collect()
+        chunk_entries = def_sets.LH_CHUNK_ENTRIES
+        try:
+            # the pattern matrix exceeds the bound and is computed in blocks of columns
+            def_sets.LH_CHUNK_ENTRIES = 10 * self.n
+            blocked_mls, blocked_scores = collect()
+        finally:
+            def_sets.LH_CHUNK_ENTRIES = chunk_entries
+
+        np.testing.assert_allclose(blocked_mls, full_mls, rtol=1e-12)
+        np.testing.assert_allclose(blocked_scores, full_scores, rtol=1e-12)
+
+
+class ClosedFormPatternsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.n = 6
+        self.idx_to_mp = [frozenset(sa_idx for sa_idx in range(self.n) if present[sa_idx])
+                          for present in product((False, True), repeat=self.n)]
+        self.mp_col_ids = dict((node, col) for col, node in enumerate(self.idx_to_mp))
+        self.lp01 = np.concatenate((random_log_posteriors(30, self.n, seed=2),
+                                    confident_log_posteriors(10, self.n, seed=3)))
+        self.clipped_lp0, self.clipped_lp1 = mpl.clip_log_posteriors(self.lp01)
+        self.full = mpl.calculate_log_likelihoods(self.clipped_lp0, self.clipped_lp1,
+                                                  mpl.get_pattern_matrix(self.idx_to_mp, self.n))
+
+    def test_closed_form_patterns(self):
+        ml_presence, ml_log_mls, flip_costs, bounds = mpl.get_closed_form_patterns(self.clipped_lp0,
+                                                                                   self.clipped_lp1)
+        for row in range(len(self.lp01)):
+            ml_node = frozenset(np.nonzero(ml_presence[row])[0].tolist())
+            self.assertEqual(self.mp_col_ids[ml_node], np.argmax(self.full[row]))
+            self.assertAlmostEqual(ml_log_mls[row], self.full[row].max(), delta=1e-12)
+
+            # patterns differing from the most likely pattern in a single sample
+            cf_cols = [self.mp_col_ids[ml_node]]
+            for sa_idx in range(self.n):
+                cf_cols.append(self.mp_col_ids[ml_node.symmetric_difference([sa_idx])])
+                self.assertAlmostEqual(ml_log_mls[row] - flip_costs[row, sa_idx], self.full[row, cf_cols[-1]],
+                                       delta=1e-12)
+
+            # bound on the contributions of all other patterns to the reliability scores
+            remaining = np.delete(self.full[row], cf_cols)
+            self.assertGreaterEqual(bounds[row] * (1.0 + 1e-09), -np.sum(np.log(-np.expm1(remaining))))
+
+        # the confidently classified variants are given in closed form
+        self.assertTrue(np.all(bounds[-10:] <= def_sets.CLOSED_FORM_TOLERANCE))
+        self.assertFalse(np.all(bounds[:-10] <= def_sets.CLOSED_FORM_TOLERANCE))
+
+
+class MostLikelyPatternsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.n = 7
+        self.idx_to_mp = [frozenset(sa_idx for sa_idx in range(self.n) if present[sa_idx])
+                          for present in product((False, True), repeat=self.n)]
+        self.mp_col_ids = dict((node, col) for col, node in enumerate(self.idx_to_mp))
+        self.sample_names = ['S{}'.format(sa_idx) for sa_idx in range(self.n)]
+        self.lp01 = random_log_posteriors(25, self.n, seed=4)
+        self.mut_keys = ['m{}'.format(mut_idx) for mut_idx in range(len(self.lp01))]
+        self.clipped_lp0, self.clipped_lp1 = mpl.clip_log_posteriors(self.lp01)
+        self.full = mpl.calculate_log_likelihoods(self.clipped_lp0, self.clipped_lp1,
+                                                  mpl.get_pattern_matrix(self.idx_to_mp, self.n))
+
+    def test_top_k_patterns(self):
+        for k in (1, 5, 40, len(self.idx_to_mp), 2 * len(self.idx_to_mp)):
+            for row in range(len(self.lp01)):
+                nodes = mpl.get_most_likely_patterns(self.clipped_lp0[row], self.clipped_lp1[row], k=k)
+                self.assertEqual(len(nodes), min(k, len(self.idx_to_mp)))
+                self.assertEqual(len(set(nodes)), len(nodes))
+
+                # patterns are generated in decreasing order of their likelihood (up to rounding in near ties)
+                log_mls = self.full[row, [self.mp_col_ids[node] for node in nodes]]
+                np.testing.assert_allclose(log_mls, np.sort(self.full[row])[::-1][:len(nodes)], rtol=0, atol=1e-09)
+
+    def test_probability_mass_patterns(self):
+        # total probability mass of all patterns of each variant
+        log_totals = np.sum(np.logaddexp(self.clipped_lp0, self.clipped_lp1), axis=1)
+        for mass in (0.1, 0.5, 0.9, 0.99, 1.0 - 1e-06):
+            for row in range(len(self.lp01)):
+                nodes = mpl.get_most_likely_patterns(self.clipped_lp0[row], self.clipped_lp1[row], mass=mass)
+                fractions = np.exp(self.full[row, [self.mp_col_ids[node] for node in nodes]] - log_totals[row])
+
+                # the fewest most likely patterns covering the target mass (up to rounding)
+                self.assertGreaterEqual(np.sum(fractions), mass - 1e-09)
+                self.assertLess(np.sum(fractions[:-1]), mass + 1e-09)
+                np.testing.assert_allclose(fractions, np.sort(np.exp(self.full[row] - log_totals[row]))[::-1][
+                    :len(nodes)], rtol=0, atol=1e-09)
+
+                # whichever limit is reached first applies
+                limited = mpl.get_most_likely_patterns(self.clipped_lp0[row], self.clipped_lp1[row], k=3, mass=mass)
+                self.assertEqual(limited, nodes[:3])
+
+    def test_iter_most_likely_patterns(self):
+        results = list(mpl.iter_most_likely_patterns(self.lp01, 6, self.sample_names, self.mut_keys))
+        self.assertEqual(len(results), len(self.lp01))
+        for row, (nodes, log_mls) in enumerate(results):
+            self.assertEqual(nodes, mpl.get_most_likely_patterns(self.clipped_lp0[row], self.clipped_lp1[row], k=6))
+            # weights agree with the ones in the full solution space (up to the rounding of the matrix products)
+            np.testing.assert_allclose(log_mls, self.full[row, [self.mp_col_ids[node] for node in nodes]],
+                                       rtol=1e-12)
+
+        # with a mass target the number of patterns per variant varies
+        results = list(mpl.iter_most_likely_patterns(self.lp01, None, self.sample_names, self.mut_keys, mass=0.8))
+        for row, (nodes, log_mls) in enumerate(results):
+            self.assertEqual(nodes, mpl.get_most_likely_patterns(self.clipped_lp0[row], self.clipped_lp1[row],
+                                                                 mass=0.8))
+            self.assertEqual(len(log_mls), len(nodes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+"""Tests of the dense, the sparse and the closed-form storage of the pattern weights of the variants against numpy
+computations"""
+import unittest
+from itertools import product
+import numpy as np
+import utils.int_settings as def_sets
+import phylogeny.mp_likelihoods as mpl
+from phylogeny.mp_weights import MPWeights
+
+__author__ = 'Johannes REITER'
+
+
+def random_log_mls(no_rows, no_cols, rng):
+    """
+    :return: log likelihood matrix where the patterns of each row form a probability distribution (#rows x #cols)
+    """
+
+    probs = rng.dirichlet(np.full(no_cols, 0.5), size=no_rows)
+    return np.log(np.maximum(probs, 1e-300))
+
+
+def neg_log_absence_probs(log_mls):
+    """
+    :return: contributions of the entries to the reliability scores
+    """
+
+    return -np.log(-np.expm1(log_mls))
+
+
+class DenseWeightsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.no_cols = 16
+        # two appended blocks of distinct rows and the variants sharing them
+        self.blocks = [random_log_mls(5, self.no_cols, rng), random_log_mls(3, self.no_cols, rng)]
+        self.row_maps = [np.array([0, 1, 1, 2, 3, 4, 4, 4]), np.array([2, 0, 1, 1])]
+        self.full = np.vstack([block[row_map] for block, row_map in zip(self.blocks, self.row_maps)])
+
+        self.mp_weights = MPWeights(dense=True, no_cols=self.no_cols)
+        for block, row_map in zip(self.blocks, self.row_maps):
+            self.mp_weights.add_rows(block, row_map=row_map)
+        self.rng = rng
+
+    def test_rows(self):
+        self.assertEqual(len(self.mp_weights), len(self.full))
+        self.assertEqual(self.mp_weights.no_stored_rows, sum(len(block) for block in self.blocks))
+        for mut_idx in range(len(self.full)):
+            col_ids, log_mls = self.mp_weights.row(mut_idx)
+            np.testing.assert_array_equal(col_ids, np.arange(self.no_cols))
+            np.testing.assert_array_equal(log_mls, self.full[mut_idx])
+
+    def test_column_scores(self):
+        np.testing.assert_allclose(self.mp_weights.column_scores(), neg_log_absence_probs(self.full).sum(axis=0),
+                                   rtol=1e-12)
+        counts = self.rng.randint(0, 4, size=len(self.full)).astype(float)
+        np.testing.assert_allclose(self.mp_weights.column_scores(counts), counts.dot(neg_log_absence_probs(self.full)),
+                                   rtol=1e-12)
+
+        chunk_entries = def_sets.LH_CHUNK_ENTRIES
+        try:
+            # contributions of the dense rows are summed in chunks of three rows
+            def_sets.LH_CHUNK_ENTRIES = 3 * self.no_cols
+            np.testing.assert_allclose(self.mp_weights.column_scores(counts),
+                                       counts.dot(neg_log_absence_probs(self.full)), rtol=1e-12)
+        finally:
+            def_sets.LH_CHUNK_ENTRIES = chunk_entries
+
+    def test_max_weight_columns(self):
+        for _ in range(10):
+            col_mask = self.rng.uniform(size=self.no_cols) < 0.3
+            col_mask[self.rng.randint(self.no_cols)] = True
+            ml_cols, ml_weights = self.mp_weights.max_weight_columns(col_mask)
+            allowed = np.nonzero(col_mask)[0]
+            expected = allowed[np.argmax(self.full[:, allowed], axis=1)]
+            np.testing.assert_array_equal(ml_cols, expected)
+            np.testing.assert_array_equal(ml_weights, self.full[np.arange(len(self.full)), expected])
+
+        # rows added after a consolidation are appended
+        block = random_log_mls(2, self.no_cols, self.rng)
+        self.mp_weights.add_rows(block)
+        ml_cols, _ = self.mp_weights.max_weight_columns(np.ones(self.no_cols, dtype=bool))
+        np.testing.assert_array_equal(ml_cols[-2:], np.argmax(block, axis=1))
+        self.assertEqual(len(self.mp_weights), len(self.full) + 2)
+
+
+class SparseWeightsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        self.no_cols = 20
+        # the entries of the distinct rows are given in decreasing order of their likelihood
+        self.rows = list()
+        for _ in range(6):
+            col_ids = rng.choice(self.no_cols, size=rng.randint(1, 6), replace=False)
+            log_mls = np.sort(np.log(rng.uniform(0.01, 0.3, size=len(col_ids))))[::-1]
+            self.rows.append((col_ids.tolist(), log_mls))
+        self.row_map = np.array([0, 1, 2, 2, 3, 4, 5, 5, 0])
+
+        self.full = np.full((len(self.row_map), self.no_cols), -np.inf)
+        for mut_idx, row_idx in enumerate(self.row_map):
+            col_ids, log_mls = self.rows[row_idx]
+            self.full[mut_idx, col_ids] = log_mls
+
+        # the last variant is appended with its own copy of the first row
+        self.mp_weights = MPWeights(dense=False)
+        self.mp_weights.add_sparse_rows(self.rows[:3], row_map=self.row_map[:4])
+        self.mp_weights.add_sparse_rows(self.rows[3:], row_map=self.row_map[4:8] - 3)
+        self.mp_weights.add_sparse_rows(self.rows[:1])
+        self.rng = rng
+
+    def test_rows(self):
+        self.assertEqual(len(self.mp_weights), len(self.row_map))
+        self.assertEqual(self.mp_weights.no_stored_rows, len(self.rows) + 1)
+        self.assertEqual(self.mp_weights.no_cols, max(max(col_ids) for col_ids, _ in self.rows) + 1)
+        for mut_idx, row_idx in enumerate(self.row_map):
+            col_ids, log_mls = self.mp_weights.row(mut_idx)
+            # entries are kept in the order in which they were added
+            np.testing.assert_array_equal(col_ids, self.rows[row_idx][0])
+            np.testing.assert_array_equal(log_mls, self.rows[row_idx][1])
+
+    def test_column_scores(self):
+        contributions = np.where(np.isinf(self.full), 0.0, neg_log_absence_probs(self.full))
+        contributions = contributions[:, :self.mp_weights.no_cols]
+        counts = self.rng.randint(0, 4, size=len(self.row_map)).astype(float)
+        np.testing.assert_allclose(self.mp_weights.column_scores(), contributions.sum(axis=0), rtol=1e-12)
+        np.testing.assert_allclose(self.mp_weights.column_scores(counts), counts.dot(contributions), rtol=1e-12)
+
+    def test_max_weight_columns(self):
+        for _ in range(10):
+            col_mask = self.rng.uniform(size=self.mp_weights.no_cols) < 0.4
+            ml_cols, ml_weights = self.mp_weights.max_weight_columns(col_mask)
+            for mut_idx in range(len(self.row_map)):
+                log_mls = np.where(col_mask, self.full[mut_idx, :self.mp_weights.no_cols], -np.inf)
+                if np.isneginf(log_mls).all():
+                    # no allowed pattern is stored for this variant
+                    self.assertEqual(ml_cols[mut_idx], -1)
+                    self.assertEqual(ml_weights[mut_idx], -np.inf)
+                else:
+                    self.assertEqual(ml_cols[mut_idx], np.argmax(log_mls))
+                    self.assertEqual(ml_weights[mut_idx], log_mls.max())
+
+        ml_cols, _ = self.mp_weights.max_weight_columns(np.zeros(self.mp_weights.no_cols, dtype=bool))
+        np.testing.assert_array_equal(ml_cols, -1)
+
+    def test_max_weight_columns_ties(self):
+        # ties are broken by the order of the entries in a row; variants may have no stored entry
+        mp_weights = MPWeights(dense=False)
+        mp_weights.add_sparse_rows([([3, 1, 2], np.log([0.2, 0.5, 0.5])), ([], []), ([0, 4], np.log([0.1, 0.1]))],
+                                   row_map=[0, 1, 2, 0])
+        ml_cols, ml_weights = mp_weights.max_weight_columns(np.ones(5, dtype=bool))
+        np.testing.assert_array_equal(ml_cols, [1, -1, 0, 1])
+        np.testing.assert_array_equal(ml_weights, [np.log(0.5), -np.inf, np.log(0.1), np.log(0.5)])
+
+        ml_cols, _ = mp_weights.max_weight_columns(np.array([False, False, True, True, True]))
+        np.testing.assert_array_equal(ml_cols, [2, -1, 4, 2])
+
+
+class ClosedFormWeightsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(2)
+        self.n = 5
+        self.idx_to_mp = [frozenset(sa_idx for sa_idx in range(self.n) if present[sa_idx])
+                          for present in product((False, True), repeat=self.n)]
+        mp_col_ids = dict((node, col) for col, node in enumerate(self.idx_to_mp))
+
+        # uncertain variants and variants which are confidently present in all but at most one sample
+        p1 = rng.uniform(size=(12, self.n))
+        p1[6:] = 1.0 - 1e-07
+        absent = rng.randint(-1, self.n, size=6)
+        p1[6:][absent >= 0, absent[absent >= 0]] = 1e-07
+        clipped_lp0, clipped_lp1 = mpl.clip_log_posteriors(np.stack((np.log1p(-p1), np.log(p1)), axis=2))
+        self.full = mpl.calculate_log_likelihoods(clipped_lp0, clipped_lp1,
+                                                  mpl.get_pattern_matrix(self.idx_to_mp, self.n))
+
+        # rows are given in closed form as in the inference of the reliability scores
+        ml_presence, ml_log_mls, flip_costs, bounds = mpl.get_closed_form_patterns(clipped_lp0, clipped_lp1)
+        self.closed_form = (bounds <= def_sets.CLOSED_FORM_TOLERANCE) & (ml_log_mls < 0.0)
+        self.assertTrue(np.all(self.closed_form[6:]) and not np.any(self.closed_form[:6]))
+        self.bounds = bounds[self.closed_form]
+
+        self.cf_rows = list()
+        for row in np.nonzero(self.closed_form)[0]:
+            ml_node = frozenset(np.nonzero(ml_presence[row])[0].tolist())
+            nodes = [ml_node] + [ml_node.symmetric_difference([sa_idx]) for sa_idx in range(self.n)]
+            log_mls = np.concatenate(([ml_log_mls[row]], ml_log_mls[row] - flip_costs[row]))
+            self.cf_rows.append(([mp_col_ids[node] for node in nodes], log_mls))
+
+        # closed-form rows are stored after the dense rows; the variants are interleaved
+        self.order = rng.permutation(len(p1))
+        positions = np.empty(len(p1), dtype=np.int64)
+        positions[~self.closed_form] = np.arange(np.count_nonzero(~self.closed_form))
+        positions[self.closed_form] = np.count_nonzero(~self.closed_form) + np.arange(len(self.cf_rows))
+
+        self.mp_weights = MPWeights(dense=True, no_cols=len(self.idx_to_mp), col_patterns=list(self.idx_to_mp))
+        self.mp_weights.add_rows(self.full[~self.closed_form], row_map=positions[self.order],
+                                 closed_form=(self.cf_rows, clipped_lp0[self.closed_form],
+                                              clipped_lp1[self.closed_form]))
+        self.full = self.full[self.order]
+        self.rng = rng
+
+    def test_rows(self):
+        cf_ids = np.cumsum(self.closed_form) - 1
+        for mut_idx, row in enumerate(self.order.tolist()):
+            col_ids, log_mls = self.mp_weights.row(mut_idx)
+            if self.closed_form[row]:
+                # only the most likely pattern and the patterns differing in a single sample are stored
+                np.testing.assert_array_equal(col_ids, self.cf_rows[cf_ids[row]][0])
+            else:
+                self.assertEqual(len(col_ids), len(self.idx_to_mp))
+            np.testing.assert_allclose(log_mls, self.full[mut_idx, col_ids], rtol=1e-12)
+
+    def test_max_weight_columns(self):
+        for _ in range(20):
+            # the most likely patterns of the closed-form rows are often not allowed
+            col_mask = self.rng.uniform(size=len(self.idx_to_mp)) < 0.2
+            col_mask[self.rng.randint(len(self.idx_to_mp))] = True
+            ml_cols, ml_weights = self.mp_weights.max_weight_columns(col_mask)
+            allowed = np.nonzero(col_mask)[0]
+            expected = allowed[np.argmax(self.full[:, allowed], axis=1)]
+            np.testing.assert_array_equal(ml_cols, expected)
+            np.testing.assert_allclose(ml_weights, self.full[np.arange(len(self.full)), expected], rtol=1e-12)
+
+    def test_column_scores(self):
+        # only the stored entries of the closed-form rows contribute to the reliability scores
+        contributions = neg_log_absence_probs(self.full)
+        stored = np.zeros(self.full.shape, dtype=bool)
+        for mut_idx in range(len(self.full)):
+            stored[mut_idx, self.mp_weights.row(mut_idx)[0]] = True
+        np.testing.assert_allclose(self.mp_weights.column_scores(), np.where(stored, contributions, 0.0).sum(axis=0),
+                                   rtol=1e-12)
+
+        # the neglected contributions of each closed-form row are within its bound
+        neglected = np.where(stored, 0.0, contributions).sum(axis=1)
+        cf_ids = np.cumsum(self.closed_form) - 1
+        for mut_idx, row in enumerate(self.order.tolist()):
+            if self.closed_form[row]:
+                self.assertLessEqual(neglected[mut_idx], self.bounds[cf_ids[row]] * (1.0 + 1e-09))
+            else:
+                self.assertEqual(neglected[mut_idx], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
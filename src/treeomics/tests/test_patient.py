@@ -0,0 +1,90 @@
+"""Tests of appending variants to the processed sequencing data of a patient"""
+import os
+import shutil
+import tempfile
+import unittest
+import settings
+from patient import Patient
+from utils.data_tables import read_mutation_table
+
+__author__ = 'Johannes REITER'
+
+INPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'input')
+VAR_TABLE = os.path.join(INPUT_DIR, 'Makohon2016', 'Pam01_1-6_mutant_reads.txt')
+COV_TABLE = os.path.join(INPUT_DIR, 'Makohon2016', 'Pam01_1-6_phredcoverage.txt')
+
+
+def create_patient(var_table, cov_table):
+    patient = Patient(error_rate=settings.BI_E, c0=settings.BI_C0, max_absent_vaf=settings.MAX_ABSENT_VAF,
+                      pat_name='Pam01', min_absent_cov=settings.MIN_ABSENT_COVERAGE)
+    patient.process_raw_data(settings.FPR, settings.FDR, settings.MIN_ABSENT_COVERAGE, 0, 0.0,
+                             var_table=var_table, cov_table=cov_table)
+    return patient
+
+
+def write_first_variants(filepath, out_filepath, no_variants):
+    """
+    Write the header and the first variants of the given table to a new table
+    """
+
+    with open(filepath) as data_file, open(out_filepath, 'w') as out_file:
+        for line_idx, line in enumerate(data_file):
+            if line_idx <= no_variants:
+                out_file.write(line)
+
+
+class AddVariantsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            # union of all variants
+            cls.union = create_patient(VAR_TABLE, COV_TABLE)
+
+            # first half of the variants
+            var_table = os.path.join(tmp_dir, 'mutant_reads.txt')
+            cov_table = os.path.join(tmp_dir, 'coverage.txt')
+            write_first_variants(VAR_TABLE, var_table, len(cls.union.mut_keys) // 2)
+            write_first_variants(COV_TABLE, cov_table, len(cls.union.mut_keys) // 2)
+            cls.patient = create_patient(var_table, cov_table)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        # the remaining variants are added
+        mut_reads, gene_names, _ = read_mutation_table(VAR_TABLE)
+        coverage, _, _ = read_mutation_table(COV_TABLE)
+        new_keys = [mut_key for mut_key in cls.union.mut_keys if mut_key not in cls.patient.mut_reads]
+        cls.new_mut_ids = cls.patient.add_variants(
+            dict((mut_key, mut_reads[mut_key]) for mut_key in new_keys),
+            dict((mut_key, coverage[mut_key]) for mut_key in new_keys),
+            dict((mut_key, gene_names[mut_key]) for mut_key in new_keys), settings.FPR, settings.FDR)
+
+    def test_variants(self):
+        self.assertGreater(len(self.new_mut_ids), 0)
+        self.assertEqual(self.new_mut_ids, list(range(len(self.union.mut_keys) - len(self.new_mut_ids),
+                                                      len(self.union.mut_keys))))
+        self.assertEqual(sorted(self.patient.mut_keys), sorted(self.union.mut_keys))
+        self.assertEqual(self.patient.sample_names, self.union.sample_names)
+        self.assertEqual(self.patient.vafs.shape, self.union.vafs.shape)
+        self.assertEqual(len(self.patient.log_p01), len(self.union.log_p01))
+
+    def test_sample_statistics(self):
+        for sample_name in self.union.sample_names:
+            self.assertEqual(sorted(self.patient.sample_coverages[sample_name]),
+                             sorted(self.union.sample_coverages[sample_name]))
+            self.assertEqual(sorted(self.patient.sample_mafs[sample_name]),
+                             sorted(self.union.sample_mafs[sample_name]))
+
+        summary = self.patient.sample_summary
+        union_summary = self.union.sample_summary
+        for statistic in ('median_coverages', 'mean_coverages', 'median_mafs', 'mean_mafs'):
+            for sample_name in self.union.sample_names:
+                self.assertAlmostEqual(getattr(summary, statistic)[sample_name],
+                                       getattr(union_summary, statistic)[sample_name], msg=statistic)
+        self.assertAlmostEqual(summary.median_coverage, union_summary.median_coverage)
+        self.assertAlmostEqual(summary.mean_coverage, union_summary.mean_coverage)
+
+
+if __name__ == '__main__':
+    unittest.main()
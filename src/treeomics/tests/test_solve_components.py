@@ -0,0 +1,87 @@
+"""Tests of solving the connected components of the conflict graph independently"""
+import multiprocessing as mp
+import time
+import unittest
+import numpy as np
+import phylogeny.cplex_solver as cps
+from tests.brute_force import random_patterns, max_compatible_weight, create_graph
+
+__author__ = 'Johannes REITER'
+
+
+class SolveComponentsTest(unittest.TestCase):
+
+    def setUp(self):
+        # two groups of patterns over disjoint samples give at least two components
+        patterns, weights = random_patterns(4, 7, seed=1)
+        other_patterns, other_weights = random_patterns(4, 6, seed=2)
+        self.patterns = patterns + [frozenset(sa_idx + 4 for sa_idx in pattern) for pattern in other_patterns]
+        self.weights = np.concatenate((weights, other_weights))
+        self.cf_graph = create_graph(self.patterns, self.weights)
+        self.components = self.cf_graph.components()
+
+    def test_optimal_cover(self):
+        self.assertGreater(len(self.components), 1)
+        cover, objective_value, _ = cps.solve_components(self.cf_graph, self.components, self.weights,
+                                                         quiet=True, solver='highs')
+        self.assertAlmostEqual(float(np.dot(self.weights, ~cover)),
+                               max_compatible_weight(self.patterns, self.weights))
+        self.assertAlmostEqual(objective_value, float(np.dot(self.weights, cover)))
+
+    def test_time_limits_split_upfront(self):
+        time_limit = 10.0
+        no_workers = 2
+        tasks = list(cps._generate_component_tasks(
+            self.cf_graph, self.components, self.weights, time_limit, no_workers, False, None, True, 'highs',
+            [None for _ in self.components]))
+        total_conflicts = sum(len(edge_ids) for _, edge_ids in self.components)
+
+        # all tasks are generated at once but share the time limit according to their conflicts
+        deadlines = set(task[3] for task in tasks)
+        self.assertEqual(len(deadlines), 1)
+        self.assertLessEqual(deadlines.pop(), time.time() + time_limit)
+        for (_, edge_ids), task in zip(self.components, tasks):
+            self.assertAlmostEqual(task[2], min(time_limit, time_limit * no_workers * len(edge_ids) / total_conflicts))
+
+    def test_deadline_passed(self):
+        task = next(cps._generate_component_tasks(
+            self.cf_graph, self.components, self.weights, 10.0, 1, False, None, True, 'highs', [None]))
+        task = task[:3] + (time.time() - 1.0,) + task[4:]
+
+        # no time is left for the MILP but a feasible solution is still returned
+        component = task[0]
+        cover, objective_value, status = cps._solve_component(task)
+        self.assertEqual(status, 'repaired')
+        self.assertFalse(np.any(~cover[component.sources] & ~cover[component.sinks]))
+        self.assertAlmostEqual(objective_value, float(np.dot(task[1], cover)))
+
+    def test_model_reuse(self):
+        model_series = cps.new_model_series()
+        try:
+            for seed in range(3):
+                weights = np.random.RandomState(seed).uniform(0.1, 10.0, size=self.cf_graph.order())
+                cover, _, _ = cps.solve_components(self.cf_graph, self.components, weights, quiet=True,
+                                                   solver='highs', model_series=model_series)
+                fresh_cover, _, _ = cps.solve_components(self.cf_graph, self.components, weights, quiet=True,
+                                                         solver='highs')
+                self.assertAlmostEqual(float(np.dot(weights, cover)), float(np.dot(weights, fresh_cover)))
+            self.assertTrue(any(model_key[0] == model_series for model_key in cps._component_models))
+        finally:
+            cps.release_models(model_series)
+        self.assertFalse(any(model_key[0] == model_series for model_key in cps._component_models))
+
+    def test_no_model_reuse_with_pool(self):
+        model_series = cps.new_model_series()
+        pool = mp.Pool(processes=2)
+        try:
+            cover, _, _ = cps.solve_components(self.cf_graph, self.components, self.weights, pool=pool,
+                                               no_processes=2, quiet=True, solver='highs', model_series=model_series)
+        finally:
+            pool.terminate()
+        self.assertAlmostEqual(float(np.dot(self.weights, ~cover)),
+                               max_compatible_weight(self.patterns, self.weights))
+        self.assertFalse(any(model_key[0] == model_series for model_key in cps._component_models))
+
+
+if __name__ == '__main__':
+    unittest.main()
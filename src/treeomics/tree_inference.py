@@ -18,7 +18,7 @@ __date__ = 'July 11, 2015'
 logger = logging.getLogger('treeomics')
 
 
-def infer_max_compatible_tree(filepath, patient, drivers=set(), time_limit=None):
+def infer_max_compatible_tree(filepath, patient, drivers=set(), time_limit=None, solver='cplex'):
     """
     Create an evolutionary tree where most conflicting mutations have been ignored
     due to the ambiguous binary classification of variants being present/absent
@@ -26,6 +26,7 @@ def infer_max_compatible_tree(filepath, patient, drivers=set(), time_limit=None)
     :param patient: data structure around the patient
     :param drivers: known driver genes in considered cancer type
     :param time_limit: time limit for MILP solver in seconds
+    :param solver: name of the solver (cplex, highs, laminar or heuristic)
     :return: evolutionary tree as graph
     """
 
@@ -33,7 +34,7 @@ def infer_max_compatible_tree(filepath, patient, drivers=set(), time_limit=None)
 
     # infer the tree which as to ignore the least number of mutation
     # to derive a conflict-free tree
-    simple_tree = phylogeny.find_max_compatible_tree(time_limit=time_limit)
+    simple_tree = phylogeny.find_max_compatible_tree(time_limit=time_limit, solver=solver)
 
     # number of mutations inferred to be present in at least one sample
     no_present_muts = len(phylogeny.compatible_mutations)+len(phylogeny.conflicting_mutations)
@@ -74,7 +75,9 @@ def infer_max_compatible_tree(filepath, patient, drivers=set(), time_limit=None)
 
 def create_max_lh_tree(patient, tree_filepath=None, mm_filepath=None, mp_filepath=None, subclone_detection=False,
                        loh_frequency=0.0, drivers=set(), max_no_mps=None, time_limit=None, plots=True,
-                       no_bootstrap_samples=0):
+                       no_bootstrap_samples=0, min_pattern_score=None, min_rel_pattern_score=None, no_processes=1,
+                       mp_mass=None, column_generation=False, lazy_constraints=False, lattice_cache=None,
+                       solver='cplex'):
     """
     Create an evolutionary tree based on the maximum likelihood mutation patterns of each variant
     :param patient: data structure around the patient
@@ -89,13 +92,30 @@ def create_max_lh_tree(patient, tree_filepath=None, mm_filepath=None, mp_filepat
     :param time_limit: time limit for MILP solver in seconds
     :param plots: generate pdf from tex file
     :param no_bootstrap_samples: number of samples with replacement for the bootstrapping
+    :param min_pattern_score: mutation patterns with a lower reliability score are excluded from the MILP
+    :param min_rel_pattern_score: mutation patterns with a lower reliability score relative to the highest score
+            are excluded from the MILP
+    :param no_processes: number of processes computing the mutation pattern weights and solving the MILP
+            components in parallel
+    :param mp_mass: only the most likely mutation patterns of each variant covering this fraction of its
+            probability mass are explored; limits the solution space
+    :param column_generation: generate the relevant mutation patterns iteratively instead of exploring the full
+            solution space
+    :param lazy_constraints: add the evolutionary conflicts iteratively to the MILP once they are violated
+    :param lattice_cache: directory of the cached evolutionary conflicts among all mutation patterns
+    :param solver: name of the solver (cplex, highs, laminar or heuristic)
     :return: evolutionary tree as graph
     """
 
     mlh_pg = MaxLHPhylogeny(patient, patient.mps, loh_frequency=loh_frequency)
 
     mlh_tree = mlh_pg.infer_max_lh_tree(subclone_detection=subclone_detection, max_no_mps=max_no_mps,
-                                        time_limit=time_limit, no_bootstrap_samples=no_bootstrap_samples)
+                                        time_limit=time_limit, no_bootstrap_samples=no_bootstrap_samples,
+                                        min_pattern_score=min_pattern_score,
+                                        min_rel_pattern_score=min_rel_pattern_score, no_processes=no_processes,
+                                        mp_mass=mp_mass, column_generation=column_generation,
+                                        lazy_constraints=lazy_constraints, lattice_cache=lattice_cache,
+                                        solver=solver)
 
     if mlh_tree is not None:
 
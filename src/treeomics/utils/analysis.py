@@ -5,9 +5,6 @@ __author__ = 'Johannes REITER'
 
 import logging
 import csv
-import math
-from utils.int_settings import NEG_UNKNOWN, POS_UNKNOWN
-import numpy as np
 from phylogeny.simple_phylogeny import SimplePhylogeny
 from phylogeny.max_lh_phylogeny import MaxLHPhylogeny
 
@@ -43,24 +40,17 @@ def create_analysis_file(patient, min_sa_cov, analysis_filepath, phylogeny=None,
                 min_sa_cov))
 
         # provide some analysis about the raw sequencing data
+        summary = patient.sample_summary
         for sample_name in patient.sample_names:
             analysis_file.write('# Median phred coverage in sample {}: {} (mean: {:.2f})\n'.format(
-                sample_name, np.median(patient.sample_coverages[sample_name]),
-                np.mean(patient.sample_coverages[sample_name])))
+                sample_name, summary.median_coverages[sample_name], summary.mean_coverages[sample_name]))
 
             analysis_file.write('# Median MAF in sample {}: {:.2%}\n'.format(
-                                sample_name, np.median(patient.sample_mafs[sample_name])))
+                                sample_name, summary.median_mafs[sample_name]))
 
         # median and mean coverage
-        coverages = []
-        for mut_key in patient.mut_reads.keys():
-            # for sample_name in patient.mut_reads[mut_key].keys():     # all samples
-            for sample_name in patient.sample_names:
-                if patient.coverage[mut_key][sample_name] >= 0:
-                    coverages.append(patient.coverage[mut_key][sample_name])
-
         analysis_file.write('# Median coverage in the used samples of patient {}: {} (mean: {:.2f})\n'.format(
-            patient.name, np.median(coverages), np.mean(coverages)))
+            patient.name, summary.median_coverage, summary.mean_coverage))
 
         analysis_file.write('# The average number of mutations per sample in patient {} is {}.\n'.format(patient.name,
                             (float(sum(len(muts) for sa_idx, muts in patient.samples.items()))
@@ -175,24 +165,24 @@ def create_data_analysis_file(patient, analysis_filepath):
                             'BayPresent', 'BayAbsent', 'Present', 'Absent', 'Unknown'))
 
         # build up output data sequentially
-        pres_lp = math.log(0.5)
+        summary = patient.sample_summary
         for sa_idx, sample_name in enumerate(patient.sample_names):
 
             row = list()
             row.append(sample_name)
 
-            row.append(np.median(patient.sample_coverages[sample_name]))
-            if sample_name in patient.estimated_purities:
-                row.append('{:.5f}'.format(patient.estimated_purities[sample_name]))
+            row.append(summary.median_coverages[sample_name])
+            if sample_name in summary.purities:
+                row.append('{:.5f}'.format(summary.purities[sample_name]))
             else:
                 row.append('-')
 
-            row.append('{:.3f}'.format(np.median(patient.sample_mafs[sample_name])))
+            row.append('{:.3f}'.format(summary.median_mafs[sample_name]))
 
             # Bayesian inference model
             # present if probability to be present is greater than 50%
-            row.append(sum(1 for ps in patient.log_p01.values() if ps[sa_idx][1] > pres_lp))
-            row.append(sum(1 for ps in patient.log_p01.values() if ps[sa_idx][1] <= pres_lp))
+            row.append(summary.bay_present[sample_name])
+            row.append(summary.bay_absent[sample_name])
 
             # conventional classification
             row.append(patient.positives[sample_name])
@@ -209,57 +199,9 @@ def print_genetic_distance_table(patient):
     :param patient: instance of class around sequencing data of a subject
     """
 
-    gds = [[0 for _ in range(patient.n)] for _ in range(patient.n)]
-    homogeneity = [[0 for _ in range(patient.n)] for _ in range(patient.n)]
-
-    for s1_idx in range(len(patient.data[0])):
-        for s2_idx in range(len(patient.data[0])):
-
-            disagree = 0
-            present_agree = 0
-            no_known_variants = 0
-
-            for mut_idx in range(len(patient.data)):
-
-                if patient.data[mut_idx][s1_idx] > 0:          # mutation present
-                    if patient.data[mut_idx][s2_idx] == 0:     # disagree
-                        no_known_variants += 1
-                        disagree += 1
-
-                    # mutation present in both
-                    elif patient.data[mut_idx][s2_idx] > 0:    # agree
-                        no_known_variants += 1
-                        present_agree += 1
-
-                    elif patient.data[mut_idx][s2_idx] == NEG_UNKNOWN:
-                        # no indication of a mutation at this position but low coverage
-                        pass
-
-                elif patient.data[mut_idx][s1_idx] == 0:     # mutation absent
-                    if patient.data[mut_idx][s2_idx] > 0:
-                        no_known_variants += 1
-                        disagree += 1
-
-                    elif patient.data[mut_idx][s2_idx] == 0:   # agree
-                        pass
-
-                    elif patient.data[mut_idx][s2_idx] == POS_UNKNOWN:
-                        # indication of a mutation at this position but insufficient mutant reads
-                        # maybe penalize distance with two epsilon
-                        pass
-
-                # mutation believed to be present but insufficient mutant reads
-                elif patient.data[mut_idx][s1_idx] == POS_UNKNOWN:
-                    if patient.data[mut_idx][s2_idx] == 0:
-                        pass
-
-                # mutation believed to be absent but insufficient coverage
-                elif patient.data[mut_idx][s1_idx] == NEG_UNKNOWN:
-                    if patient.data[mut_idx][s2_idx] > 0:
-                        pass
-
-            gds[s1_idx][s2_idx] = disagree
-            homogeneity[s1_idx][s2_idx] = float(present_agree) / no_known_variants
+    # genetic distance and Jaccard similarity coefficient based on the conventional classification
+    gds = patient.gen_dis
+    homogeneity = patient.sim_coff
 
     # Produce latex table with the genetic distance between samples
     print('Genetic distance across the samples:')
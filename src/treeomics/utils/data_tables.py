@@ -32,7 +32,7 @@ def read_mutation_table(filename, normal_sample=None, excluded_columns=set(), ex
     :return: dictionary of the data per variant and sample, dictionary of the gene names per variant
     """
 
-    with open(filename, 'rU') as data_file:
+    with open(filename, 'r') as data_file:
 
         logger.debug('Reading data file {}'.format(filename))
         f_tsv = csv.reader(data_file, delimiter='\t')
@@ -295,14 +295,14 @@ def read_table(filename, variant_key_column_names, variant_key_pattern, data_col
         return data
 
 
-def write_posterior_table(filepath, sample_names, estimated_purities, sample_vafs, mut_positions,
+def write_posterior_table(filepath, sample_names, estimated_purities, median_vafs, mut_positions,
                           gene_names, log_p01, betas):
     """
     Write file with posterior probabilities and parameter details to given file path
     :param filepath: path to output file with posterior probabilities
     :param sample_names: ordered list of sample names
     :param estimated_purities: estimated sample purities
-    :param sample_vafs: dictionary with variant allele frequencies per sample
+    :param median_vafs: dictionary with the median variant allele frequency per sample
     :param mut_positions: data tuples about the mutation: chromosome, start position, and end position
     :param gene_names: arrary with gene names
     :param betas: beta values for the beta distribution used in the prior calculation
@@ -323,7 +323,7 @@ def write_posterior_table(filepath, sample_names, estimated_purities, sample_vaf
                              [('{:.3%}'.format(estimated_purities[sa_name]) if sa_name in estimated_purities else '')
                               for sa_name in sample_names])
         post_writer.writerow(['#MedianVAFs', '', '', ''] +
-                             ['{:.3%}'.format(np.median(sample_vafs[sa_name])) for sa_name in sample_names])
+                             ['{:.3%}'.format(median_vafs[sa_name]) for sa_name in sample_names])
         post_writer.writerow(['#PriorAlpha', '', '', ''] +
                              ['{:.3f}'.format(def_sets.PSEUDO_ALPHA) for _ in range(len(sample_names))])
         post_writer.writerow(['#PriorBeta', '', '', ''] +
@@ -93,33 +93,33 @@ class HTMLReport(object):
         header = ''.join('<th class="text-center">{}</th>'.format(col_name) for col_name in col_names)
         self.file.write(self._inds[self._ind]+header+'\n')
 
-        pres_lp = math.log(0.5)  # log probability of 50%
+        summary = patient.sample_summary
         # build up output data sequentially
         for sa_idx, sample_name in enumerate(patient.sample_names):
 
             row = list()
             row.append(sample_name.replace('_', ' '))
 
-            row.append('{:.1f} ({:.1f})'.format(np.median(patient.sample_coverages[sample_name]),
-                                                np.mean(patient.sample_coverages[sample_name])))
+            row.append('{:.1f} ({:.1f})'.format(summary.median_coverages[sample_name],
+                                                summary.mean_coverages[sample_name]))
             # if patient.sample_dis_phred_coverages is not None:
             #     row.append(np.median(patient.sample_dis_phred_coverages[sample_name]))
             # else:
             #     row.append('n/a')
 
-            row.append('{:.1%} ({:.1%})'.format(np.median(patient.sample_mafs[sample_name]),
-                                                np.mean(patient.sample_mafs[sample_name])))
+            row.append('{:.1%} ({:.1%})'.format(summary.median_mafs[sample_name],
+                                                summary.mean_mafs[sample_name]))
 
             # estimated purity
-            if sample_name in patient.estimated_purities:
-                row.append('{:.1%}'.format(patient.estimated_purities[sample_name]))
+            if sample_name in summary.purities:
+                row.append('{:.1%}'.format(summary.purities[sample_name]))
             else:
                 row.append('-')
 
             # Bayesian inference model classification
             # present if probability to be present is greater than 50%
-            row.append(sum(1 for ps in patient.log_p01.values() if ps[sa_idx][1] > pres_lp))
-            row.append(sum(1 for ps in patient.log_p01.values() if ps[sa_idx][1] <= pres_lp))
+            row.append(summary.bay_present[sample_name])
+            row.append(summary.bay_absent[sample_name])
 
             # # Previous conventional classification
             # row.append(patient.positives[sample_name])
@@ -138,14 +138,8 @@ class HTMLReport(object):
         self.file.write(self._inds[self._ind]+'Samples that passed the filtering: {}/{}</br>\n'.format(
             len(patient.sample_names), len(patient.sample_names) + len(patient.discarded_samples)))
         # median and mean coverage
-        coverages = []
-        for mut_key in patient.mut_reads.keys():
-            # for sample_name in patient.mut_reads[mut_key].keys():     # all samples
-            for sample_name in patient.sample_names:
-                if patient.coverage[mut_key][sample_name] >= 0:
-                    coverages.append(patient.coverage[mut_key][sample_name])
         self.file.write(self._inds[self._ind]+'Median coverage in the passed samples: {} (mean: {:.2f})'
-                        .format(np.median(coverages), np.mean(coverages))+'\n')
+                        .format(summary.median_coverage, summary.mean_coverage)+'\n')
         self._ind -= 1      # indentation level decreases by 1
         self.file.write(self._inds[self._ind]+'</p>\n')
 
@@ -308,6 +302,12 @@ class HTMLReport(object):
         self.file.write(
             self._inds[self._ind] + 'Treeomics considered {:.0f} distinct mutation patterns (MPs).\n'.format(
                 math.pow(2, len(patient.sample_names))+1))
+        if phylogeny is not None and getattr(phylogeny, 'mp_weights', None) is not None and \
+                phylogeny.mp_weights.no_stored_rows > 0:
+            self.file.write(
+                self._inds[self._ind] + 'Their likelihoods were computed for {} distinct posterior profiles '.format(
+                    phylogeny.mp_weights.no_stored_rows) + 'of {} variants (compression ratio {:.2f}).\n'.format(
+                    len(phylogeny.mp_weights), float(len(phylogeny.mp_weights)) / phylogeny.mp_weights.no_stored_rows))
         self.file.write(self._inds[self._ind]+'Each circular line represents a distinct sample. '
                         + 'Inner to outer lines denote: '
                         + ', '.join(sa_name.replace('_', ' ') for sa_name in patient.sample_names)
@@ -498,7 +498,7 @@ class HTMLReport(object):
                             pat.mut_reads[pat.mut_keys[mut_idx]][pat.sample_names[sa_idx]],
                             pat.coverage[pat.mut_keys[mut_idx]][pat.sample_names[sa_idx]]) for sa_idx
                             in sorted(samples, key=lambda x: pat.sample_names[x])
-                            if sa_idx not in pat.mutations[mut_idx] and pat.data[mut_idx][sa_idx] >= 0)))
+                            if sa_idx not in pat.mutations[mut_idx] and pat.cls_states[mut_idx, sa_idx] >= 0)))
 
             self._ind -= 1      # indentation level decreases by 1
             self.file.write(self._inds[self._ind]+'</ul>\n')
@@ -24,10 +24,49 @@ MAX_PRE_PROB = 1.0 - (100.0 / 45e06)
 # for most sequencing depth this lower bound is irrelevant
 MAX_ABS_PROB = 1.0 - 1e-04
 
+# maximal number of entries of the (variants x mutation patterns) log likelihood matrix
+# that are computed at once; bounds the memory requirements for large numbers of samples
+LH_CHUNK_ENTRIES = 2 ** 22
+
+# maximal number of pairs of mutation patterns (times the number of 64-bit words of their bitmasks)
+# which are compared at once when the evolutionary conflicts are determined
+CONFLICT_BLOCK_ENTRIES = 2 ** 22
+
+# cached evolutionary conflicts among all mutation patterns of n samples (see settings.LATTICE_CACHE_DIR):
+# format version of the cache files, maximal number of samples (the cache grows with 4^n) and minimal fraction of the
+# 2^n patterns retained in the conflict graph such that filtering the cached conflicts is faster than computing them
+LATTICE_CACHE_VERSION = 1
+LATTICE_CACHE_MAX_SAMPLES = 12
+LATTICE_CACHE_MIN_FRACTION = 0.25
+
+# exact combinatorial solver (dynamic programming over the sets of samples): maximal number of samples in the
+# mutation patterns of a connected component of the conflict graph
+LAMINAR_MAX_SAMPLES = 20
+
+# variants with identical clipped posterior log probabilities share their mutation pattern likelihoods;
+# if not None, log probabilities are rounded to the given number of decimals before variants are grouped
+PROFILE_DECIMALS = None
+
+# variants whose probability mass outside of their most likely pattern and the patterns differing from it in a single
+# sample is negligible are not evaluated on all 2^n patterns; the neglected contributions of such a variant to the
+# (not yet normalized) reliability scores are at most this tolerance (None: all variants are fully evaluated)
+CLOSED_FORM_TOLERANCE = 1e-09
+
+# column generation: number of initially generated most likely patterns per variant and tolerated relative gap
+# between the weight of the compatible patterns in the restricted problem and its upper bound for the full problem
+CG_INITIAL_NO_MPS = 1
+CG_GAP_TOLERANCE = 1e-03
+
+# assumed number of mutation patterns per variant when chunks of variants are sized for a probability mass target
+MASS_EXPECTED_NO_MPS = 64
+
 # default prior when variant is believed to be present
 PSEUDO_ALPHA = 1.0  # alpha parameter for the beta prior
 PSEUDO_BETA = 1.5     # beta parameter for the beta prior
 
 # Necessary constants: do NOT change
+# states of the conventional classification (positive for present, negative for unknown)
+PRESENT = 1
+ABSENT = 0
 POS_UNKNOWN = -2
 NEG_UNKNOWN = -1
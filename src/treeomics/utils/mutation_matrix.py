@@ -3,6 +3,7 @@
 import logging
 import csv
 import os
+from phylogeny.laminar_index import LaminarIndex
 
 __author__ = 'Johannes REITER'
 __date__ = 'January, 2016'
@@ -36,6 +37,9 @@ def write_mutation_matrix(phylogeny, filepath):
             len(phylogeny.patient.sample_names) if phylogeny.patient.sc_names is None
             else len(phylogeny.patient.sc_names))])
 
+        # index of the subset relations among the (evolutionarily compatible) shared mutation patterns
+        shared_mps = LaminarIndex(phylogeny.shared_mlh_mps.keys())
+
         for mut_idx, (chrom, start_pos, _) in enumerate(phylogeny.patient.mut_positions):
 
             row = ['{}_{}'.format(chrom, start_pos)]
@@ -49,12 +53,12 @@ def write_mutation_matrix(phylogeny, filepath):
                 mp = phylogeny.max_lh_mutations[mut_idx]
 
                 # check for descending mutations
-                for desc_mp in phylogeny.shared_mlh_mps.keys():
-                    if desc_mp.issubset(mp) and len(desc_mp) < len(mp):
+                for desc_mp in shared_mps.subsets(mp):
+                    if len(desc_mp) < len(mp):
                         for desc_idx in phylogeny.shared_mlh_mps[desc_mp]:
                             descendants.add(desc_idx)
 
-                    elif desc_mp == mp:     # mutations are acquired on the same edge
+                    else:     # mutations are acquired on the same edge
                         for desc_idx in phylogeny.shared_mlh_mps[desc_mp]:
                             same_subclone.add(desc_idx)
 
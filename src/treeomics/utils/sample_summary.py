@@ -0,0 +1,93 @@
+#!/usr/bin/python
+"""Summary statistics of the sequencing data in each sample shared by all reports"""
+import logging
+import math
+import numpy as np
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+
+class SampleSummary(object):
+    """
+    Median and mean coverages and variant allele frequencies, estimated purities,
+    and the number of present and absent variants in each sample
+    Computed once such that the filtering, the inference, and the reports do not need to rescan the data
+    """
+
+    def __init__(self, sample_coverages, sample_mafs):
+        """
+        Compute coverage and MAF statistics of all given samples
+        :param sample_coverages: dictionary from sample names to the list of coverages of the variants
+        :param sample_mafs: dictionary from sample names to the list of MAFs of the confirmed present variants
+        """
+
+        # median and mean coverages per sample
+        self.median_coverages = dict()
+        self.mean_coverages = dict()
+        # median and mean MAFs of all confirmed present mutations per sample
+        self.median_mafs = dict()
+        self.mean_mafs = dict()
+        self.update_sample_statistics(sample_coverages, sample_mafs, sample_coverages.keys())
+
+        # median and mean coverage across all passed samples
+        self.median_coverage = None
+        self.mean_coverage = None
+
+        # estimated purities from the shared variants
+        self.purities = None
+
+        # number of present and absent variants in each sample according to the bayesian inference model
+        self.bay_present = None
+        self.bay_absent = None
+
+    def update_sample_statistics(self, sample_coverages, sample_mafs, sample_names):
+        """
+        (Re-)compute the coverage and MAF statistics of the given samples (e.g. after variants have been added)
+        :param sample_coverages: dictionary from sample names to the list of coverages of the variants
+        :param sample_mafs: dictionary from sample names to the list of MAFs of the confirmed present variants
+        :param sample_names: samples whose statistics are computed
+        """
+
+        for sample_name in sample_names:
+            coverages = sample_coverages[sample_name]
+            self.median_coverages[sample_name] = np.median(coverages)
+            self.mean_coverages[sample_name] = np.mean(coverages)
+
+            mafs = sample_mafs[sample_name] if sample_name in sample_mafs else []
+            self.median_mafs[sample_name] = np.median(mafs)
+            self.mean_mafs[sample_name] = np.mean(mafs)
+
+    def add_classifications(self, sample_names, log_p01, estimated_purities, mut_reads, coverage):
+        """
+        Summarize the classification of the variants in each sample
+        :param sample_names: ordered list of the samples having passed the filtering
+        :param log_p01: posterior: log probability that VAF = 0, log probability that VAF > 0
+        :param estimated_purities: dictionary from sample names to the estimated purities
+        :param mut_reads: dictionary of mutation keys to dictionaries of sample names to the number of mutant reads
+        :param coverage: dictionary of mutation keys to dictionaries of sample names to the coverage
+        """
+
+        self.purities = estimated_purities
+
+        # variant is present if probability to be present is greater than 50%
+        pres_lp = math.log(0.5)
+        if len(log_p01) > 0:
+            log_p1s = np.array([[p1 for _, p1 in log_p01[mut_idx]] for mut_idx in range(len(log_p01))])
+            no_present = np.sum(log_p1s > pres_lp, axis=0)
+        else:
+            no_present = np.zeros(len(sample_names), dtype=int)
+
+        self.bay_present = dict()
+        self.bay_absent = dict()
+        for sa_idx, sample_name in enumerate(sample_names):
+            self.bay_present[sample_name] = int(no_present[sa_idx])
+            self.bay_absent[sample_name] = len(log_p01) - int(no_present[sa_idx])
+
+        # median and mean coverage in the passed samples
+        coverages = [coverage[mut_key][sample_name] for mut_key in mut_reads.keys() for sample_name in sample_names
+                     if coverage[mut_key][sample_name] >= 0]
+        self.median_coverage = np.median(coverages)
+        self.mean_coverage = np.mean(coverages)
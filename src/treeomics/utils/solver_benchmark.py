@@ -0,0 +1,118 @@
+#!/usr/bin/python
+"""Compare the running times and solutions of the solvers on the conflict graphs of the bundled input data;
+run from the treeomics directory: python -m utils.solver_benchmark [--solvers cplex highs laminar heuristic]"""
+import argparse
+import logging
+import os
+import time
+import settings
+import utils.int_settings as def_sets
+from patient import Patient
+from phylogeny.max_lh_phylogeny import infer_ml_graph_nodes, prune_graph_nodes, create_conflict_graph
+import phylogeny.cplex_solver as cps
+from phylogeny.milp_backends import SOLVERS
+
+__author__ = 'Johannes REITER'
+
+# get logger for application
+logger = logging.getLogger('treeomics')
+
+# bundled data sets given by their name, mutant read table and coverage table
+INPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'input')
+DATA_SETS = (('Pam01', 'Makohon2016/Pam01_1-6_mutant_reads.txt', 'Makohon2016/Pam01_1-6_phredcoverage.txt'),
+             ('Pam02', 'Makohon2016/Pam02_1-11_mutant_reads.txt', 'Makohon2016/Pam02_1-11_phredcoverage.txt'),
+             ('Pam03', 'Makohon2016/Pam03_1-10_mutant_reads.txt', 'Makohon2016/Pam03_1-10_phredcoverage.txt'),
+             ('Case5', 'Bashashati2013/Case5_mutant_reads.txt', 'Bashashati2013/Case5_coverage.txt'),
+             ('case6', 'Cooper2015/case6_mutant_reads.txt', 'Cooper2015/case6_coverage.txt'))
+
+
+def create_benchmark_graph(name, var_table, cov_table):
+    """
+    Compute the reliability scores of all mutation patterns with the default settings
+    :param name: name of the patient
+    :param var_table: path to file with mutant reads
+    :param cov_table: path to file with phred coverage
+    :return: number of samples, conflict graph
+    """
+
+    patient = Patient(error_rate=settings.BI_E, c0=settings.BI_C0, max_absent_vaf=settings.MAX_ABSENT_VAF,
+                      pat_name=name, min_absent_cov=settings.MIN_ABSENT_COVERAGE)
+    patient.process_raw_data(settings.FPR, settings.FDR, settings.MIN_ABSENT_COVERAGE,
+                             settings.SAMPLE_COVERAGE_THRESHOLD, settings.MAF_THRESHOLD,
+                             var_table=var_table, cov_table=cov_table)
+    patient.analyze_data()
+
+    node_scores, _, _, _, _ = infer_ml_graph_nodes(patient.log_p01, patient.sample_names, patient.mut_keys,
+                                                   gene_names=patient.gene_names)
+    pruned_nodes, _ = prune_graph_nodes(node_scores, patient.n)
+
+    return patient.n, create_conflict_graph({node: score for node, score in node_scores.items()
+                                             if node not in pruned_nodes}, n=patient.n)
+
+
+def run_benchmark(solvers, time_limit=None, repetitions=3, lazy_constraints=False, max_milp_conflicts=None,
+                  data_sets=None):
+    """
+    Solve the conflict graph of each bundled data set with each solver and print the fastest of the repeated
+    running times and the weight of the compatible mutation patterns as markdown table
+    :param solvers: names of the compared solvers
+    :param time_limit: time limit for the solvers in seconds
+    :param repetitions: number of runs of each solver
+    :param lazy_constraints: add the evolutionary conflicts to the MILPs once they are violated
+    :param max_milp_conflicts: MILP solvers are skipped for conflict graphs with more conflicts (None: no limit)
+    :param data_sets: names of the benchmarked data sets (None: all bundled data sets)
+    """
+
+    rows = []
+    for name, var_table, cov_table in DATA_SETS:
+        if data_sets is not None and name not in data_sets:
+            continue
+        n, cf_graph = create_benchmark_graph(name, os.path.join(INPUT_DIR, var_table),
+                                             os.path.join(INPUT_DIR, cov_table))
+        for solver in solvers:
+            if solver == 'laminar' and n > def_sets.LAMINAR_MAX_SAMPLES:
+                continue
+            if solver in SOLVERS and max_milp_conflicts is not None and cf_graph.size() > max_milp_conflicts:
+                rows.append((name, n, cf_graph.order(), cf_graph.size(), solver, 'skipped', '-'))
+                continue
+            try:
+                run_times = []
+                for _ in range(repetitions):
+                    start_time = time.time()
+                    _, compatible_nodes = cps.solve_conflicting_phylogeny(
+                        cf_graph, time_limit=time_limit, lazy_constraints=lazy_constraints, solver=solver)
+                    run_times.append(time.time() - start_time)
+            except RuntimeError as e:
+                # e.g. CPLEX is not installed
+                logger.error('Solver {} failed: {}'.format(solver, e))
+                rows.append((name, n, cf_graph.order(), cf_graph.size(), solver, 'not available', '-'))
+                continue
+
+            rows.append((name, n, cf_graph.order(), cf_graph.size(), solver, '{:.3f}'.format(min(run_times)),
+                         '{:.6f}'.format(sum(cf_graph.weight(node) for node in compatible_nodes))))
+
+    # the MILP solvers print their log to the standard output; hence the table is printed at the end
+    print('| Data set | Samples | Patterns | Conflicts | Solver | Time (s) | Compatible weight |')
+    print('|---|---|---|---|---|---|---|')
+    for row in rows:
+        print('| ' + ' | '.join(str(entry) for entry in row) + ' |')
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark of the solvers for the compatible mutation patterns.')
+    parser.add_argument('--solvers', nargs='+', choices=['cplex', 'highs', 'laminar', 'heuristic'],
+                        default=['cplex', 'highs', 'laminar', 'heuristic'])
+    parser.add_argument('--data_sets', nargs='+', choices=[name for name, _, _ in DATA_SETS], default=None)
+    parser.add_argument('-t', '--time_limit', help='time limit for the solvers in seconds', type=int, default=None)
+    parser.add_argument('-r', '--repetitions', help='number of runs of each solver', type=int, default=3)
+    parser.add_argument('--lazy_constraints', help='add violated evolutionary conflicts iteratively to the MILPs',
+                        action='store_true')
+    parser.add_argument('--max_milp_conflicts', help='skip MILP solvers on conflict graphs with more conflicts',
+                        type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    run_benchmark(args.solvers, time_limit=args.time_limit, repetitions=args.repetitions,
+                  lazy_constraints=args.lazy_constraints, max_milp_conflicts=args.max_milp_conflicts,
+                  data_sets=args.data_sets)
@@ -2,7 +2,10 @@
 import logging
 import math
 from scipy.stats import binom
-from scipy.misc import logsumexp
+try:
+    from scipy.special import logsumexp
+except ImportError:     # scipy < 0.19
+    from scipy.misc import logsumexp
 from scipy.special import betainc
 from scipy.special import gammaln
 import utils.int_settings as def_sets